@@ -13,7 +13,7 @@ from pathlib import Path
 from elevenlabs import set_api_key, generate, save
 
 # Local/application specific imports
-from src.utils import reddit_api, utils
+from src.utils import reddit_api, utils, instrumentation
 from src.audio import audio_utils
 
 def check_environment_variables():
@@ -54,6 +54,7 @@ def create_audio_directory(audio_file_location):
     return directory_path
 
 # This function generates an audio file from the specified script using the Eleven Labs API
+@instrumentation.instrumented("tts.elevenlabs")
 def generate_audio(script, voice, model):
     return generate(text=script, voice=voice, model=model)
 
@@ -82,9 +83,13 @@ def main(api_key, audio_file_location):
     input_video_file = r'sample_video.mp4'
     output_video_file = r"sample_0.mp4"
 
-    # Generate the final video with subtitles, filtering out any swear words
+    # Generate the final video with subtitles, filtering out any swear words.
+    # The script is known, so it is aligned to the audio instead of transcribed.
+    # The alignment model is kept warm in the model registry, so further stories
+    # rendered in this process skip loading it.
     utils.generate_video_with_subtitles(
-        complete_audio_path, input_video_file, swear_word_list, output_video_file)
+        complete_audio_path, input_video_file, swear_word_list, output_video_file,
+        script=script_first_story)
 
 if __name__ == '__main__':
     logging.basicConfig(level=logging.INFO)
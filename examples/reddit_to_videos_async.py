@@ -0,0 +1,106 @@
+"""
+This module fetches the top posts of several subreddits and turns every post into a
+video with subtitles. Narration, rendering and upload of different stories overlap,
+see src.utils.story_orchestrator.
+"""
+
+import os
+import sys
+import time
+import asyncio
+import logging
+import argparse
+from argparse import Namespace
+from dotenv import load_dotenv
+
+# Third party imports
+from elevenlabs import set_api_key, generate, save
+
+# Local/application specific imports
+from src.utils import reddit_api, story_orchestrator, upload_video, instrumentation
+from src.audio import audio_utils
+
+
+@instrumentation.instrumented("tts.elevenlabs")
+def synthesize(script: str, audio_path: str) -> None:
+    audio = generate(text=script, voice="Bella", model="eleven_monolingual_v1")
+    save(audio, audio_path)
+
+
+async def fetch_posts(subreddits, limit):
+    # every subreddit is fetched on its own thread so the requests overlap
+    loop = asyncio.get_running_loop()
+    results = await asyncio.gather(*(
+        loop.run_in_executor(None, reddit_api.fetch_reddit_posts, subreddit, limit) for subreddit in subreddits))
+    return [post for posts in results for post in posts]
+
+
+def make_uploader(args):
+    youtube = upload_video.get_authenticated_service()
+
+    def upload(story):
+        options = Namespace(
+            file=story.video_path,
+            title=story.title[:90],
+            description=story.title,
+            category=args.category,
+            keywords='',
+            privacyStatus=args.privacyStatus,
+            thumbnail=args.thumbnail,
+            madeForKids=False,
+            youtubeShort=False)
+        upload_video.initialize_upload(youtube, options)
+    return upload
+
+
+def main(args):
+    parser = argparse.ArgumentParser(description='Turn the top posts of subreddits into videos')
+    parser.add_argument('--subreddits', nargs='+', default=['dndstories'], help='subreddits to fetch posts from')
+    parser.add_argument('--limit', type=int, default=3, help='top posts per subreddit (default: 3)')
+    parser.add_argument('--vid_link', default='sample_video.mp4', help='background video (default: sample_video.mp4)')
+    parser.add_argument('--output_dir', default='assets/stories', help='directory for the stories (default: assets/stories)')
+    parser.add_argument('--tts_workers', type=int, default=2, help='stories narrated at the same time (default: 2)')
+    parser.add_argument('--render_workers', type=int, default=1, help='render processes (default: 1)')
+    parser.add_argument('--queue_size', type=int, default=2, help='stories waiting between two stages (default: 2)')
+    parser.add_argument('--render_mode', choices=['moviepy', 'ffmpeg'], default='moviepy', help='how videos are rendered (default: moviepy)')
+    parser.add_argument('--upload', action='store_true', help='upload every video to YouTube')
+    parser.add_argument('--thumbnail', default='', help='thumbnail image of the uploads, required with --upload')
+    parser.add_argument('--category', default='24', help='numeric YouTube category of the uploads (default: 24)')
+    parser.add_argument('--privacyStatus', choices=['public', 'private', 'unlisted'], default='private', help='privacy of the uploads (default: private)')
+    args = parser.parse_args(args)
+
+    if args.upload and not args.thumbnail:
+        parser.error("--thumbnail is required with --upload")
+
+    ELEVENLABS_API_KEY = os.getenv('ELEVENLABS_API_KEY')
+    if not ELEVENLABS_API_KEY:
+        logging.error("The ELEVENLABS_API_KEY environment variable is not set.")
+        sys.exit(1)
+    set_api_key(ELEVENLABS_API_KEY)
+
+    upload = make_uploader(args) if args.upload else None
+    swear_word_list = [*audio_utils.get_swear_word_list().keys()]
+
+    async def run():
+        posts = await fetch_posts(args.subreddits, args.limit)
+        return await story_orchestrator.run_stories(
+            posts,
+            synthesize,
+            args.vid_link,
+            args.output_dir,
+            swear_word_list,
+            upload=upload,
+            tts_workers=args.tts_workers,
+            render_workers=args.render_workers,
+            queue_size=args.queue_size,
+            render_mode=args.render_mode)
+
+    started = time.perf_counter()
+    stories = asyncio.run(run())
+    story_orchestrator.print_story_report(stories, time.perf_counter() - started)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    load_dotenv()
+    main(sys.argv[1:])
@@ -1,8 +1,9 @@
 import argparse
 import os
+import time
 
 # Local/application specific imports
-from src.utils import utils
+from src.utils import utils, model_registry, batch_render, instrumentation, inference, caption_segmenter
 from src.audio import audio_utils
 
 #TODO:
@@ -19,6 +20,39 @@ def validate_args(args):
         raise ValueError(f"File not found: {args.audio_link}")
     if not os.path.isfile(args.vid_link):
         raise ValueError(f"File not found: {args.vid_link}")
+    if args.script_file and not os.path.isfile(args.script_file):
+        raise ValueError(f"File not found: {args.script_file}")
+
+
+def run_manifest(args):
+    """
+    Renders every job in the manifest on a process pool and reports the results.
+
+    Args:
+        args: The command line arguments.
+    """
+    jobs = batch_render.read_manifest(args.manifest)
+    for job in jobs:
+        if not job.get("swear_word_list"):
+            job["swear_word_list"] = args.swear_word_list
+
+    started = time.perf_counter()
+    results = batch_render.run_batch(
+        jobs,
+        workers=args.workers,
+        model_cache_mb=args.model_cache_mb,
+        render_mode=args.render_mode,
+        use_transcript_cache=not args.no_transcript_cache,
+        scratch_dir=args.scratch_dir,
+        checkpoint_dir=args.checkpoint_dir,
+        keep_checkpoints=args.keep_checkpoints,
+        censor_mode=args.censor_mode,
+        inference_options=inference.options_from_args(args),
+        caption_renderer=args.caption_renderer,
+        caption_mode=args.caption_mode,
+        caption_rules=caption_segmenter.rules_from_args(args)
+        )
+    batch_render.print_batch_report(results, time.perf_counter() - started)
 
 
 def main():
@@ -26,36 +60,97 @@ def main():
     Main function to handle command line arguments and initiate the video generation.
     """
     parser = argparse.ArgumentParser(description='Generate video with subtitles.')
-    parser.add_argument('--audio_link', type=str, required=True,
-                        help='Path to the audio file.')
-    parser.add_argument('--vid_link', type=str, required=True,
-                        help='Path to the video file.')
+    parser.add_argument('--audio_link', type=str, required=False,
+                        help='Path to the audio file. Required unless --manifest is given.')
+    parser.add_argument('--vid_link', type=str, required=False,
+                        help='Path to the video file. Required unless --manifest is given.')
     parser.add_argument('--swear_word_list', type=str, required=False, default="",
                         help='Path to the text file with a list of swear words to be filtered out.')
-    parser.add_argument('--video_output', type=str, required=True,
-                        help='Path for the output video file.')
+    parser.add_argument('--video_output', type=str, required=False,
+                        help='Path for the output video file. Required unless --manifest is given.')
     parser.add_argument('--srtFilename', type=str, required=False, default="",
                         help='Path for the subtitle file. If not provided, no subtitle file will be saved.')
+    parser.add_argument('--render_mode', type=str, required=False, default="moviepy", choices=["moviepy", "ffmpeg"],
+                        help='Render with moviepy (two encodes) or in a single ffmpeg pass.')
+    parser.add_argument('--censor_mode', type=str, required=False, default="pydub", choices=["pydub", "ffmpeg"],
+                        help='Silence swear words in memory, or stream the audio through an ffmpeg filter with constant memory.')
+    parser.add_argument('--asr_workers', type=int, required=False, default=1,
+                        help='Processes transcribing chunks of long audio in parallel (default: 1). Each loads its own Whisper model. Not allowed with --manifest.')
+    parser.add_argument('--caption_renderer', type=str, required=False, default="textclip", choices=["textclip", "pillow", "ass"],
+                        help='With --render_mode moviepy, draw captions with ImageMagick TextClips, cached Pillow bitmaps or libass in ffmpeg.')
+    parser.add_argument('--caption_mode', type=str, required=False, default="static", choices=["static", "highlight", "karaoke"],
+                        help='Show captions as they are, highlight the word being spoken, or fill the words as they are spoken. The word modes need --render_mode ffmpeg or --caption_renderer ass.')
+    caption_segmenter.add_caption_arguments(parser)
+    inference.add_inference_arguments(parser)
+    parser.add_argument('--model_cache_mb', type=int, required=False, default=None,
+                        help='Memory budget in MB for warm Whisper/alignment models (default: WHISPER_MODEL_CACHE_MB).')
+    parser.add_argument('--no_transcript_cache', action='store_true',
+                        help='Always run ASR instead of reusing the cached transcript of unchanged audio.')
+    parser.add_argument('--script_file', type=str, required=False, default="",
+                        help='Path to a text file with the script spoken in the audio. If provided, ASR is skipped and the script is aligned to the audio.')
+    parser.add_argument('--scratch_dir', type=str, required=False, default="",
+                        help='Directory for each run\'s private scratch workspace, e.g. a tmpfs mount (default: SCRATCH_DIRECTORY or the system temp directory).')
+    parser.add_argument('--checkpoint_dir', type=str, required=False, default="",
+                        help='Keep every pipeline stage\'s output in this directory so rerunning after a failure resumes from the first incomplete stage.')
+    parser.add_argument('--keep_checkpoints', action='store_true',
+                        help='Keep --checkpoint_dir after the video has been written.')
+    parser.add_argument('--metrics_file', type=str, required=False, default=None,
+                        help='Append per-stage timing and resource measurements as JSON lines to this file (default: PIPELINE_METRICS_FILE).')
+    parser.add_argument('--prometheus_file', type=str, required=False, default=None,
+                        help='Write per-stage totals in the Prometheus text format to this file (default: PIPELINE_METRICS_PROM_FILE).')
+    parser.add_argument('--manifest', type=str, required=False, default="",
+                        help='Path to a .csv or .jsonl manifest of jobs to render as a batch. Each job has the audio_link, vid_link, video_output and optional swear_word_list, srtFilename and script_file fields.')
+    parser.add_argument('--workers', type=int, required=False, default=None,
+                        help='Number of worker processes for --manifest (default: sized to the machine).')
     
     args = parser.parse_args()
 
+    if args.model_cache_mb is not None:
+        model_registry.configure_model_registry(args.model_cache_mb)
+
+    instrumentation.configure(args.metrics_file, args.prometheus_file)
+
+    if args.manifest:
+        if args.asr_workers > 1:
+            parser.error("--asr_workers can't be used with --manifest, the jobs already run in parallel")
+        run_manifest(args)
+        return
+
+    if not (args.audio_link and args.vid_link and args.video_output):
+        parser.error("--audio_link, --vid_link and --video_output are required unless --manifest is given")
+
     # Validate the arguments
     validate_args(args)
 
     # If no swear word list is provided, default to the predefined list
     if args.swear_word_list:
-        with open(args.swear_word_list, 'r') as file:
-            args.swear_word_list = [word.strip() for word in file.readlines()]
+        args.swear_word_list = audio_utils.read_swear_word_file(args.swear_word_list)
     else:
         args.swear_word_list = audio_utils.get_swear_word_list().keys()
 
+    script = ""
+    if args.script_file:
+        with open(args.script_file, 'r', encoding='utf-8') as file:
+            script = file.read()
 
     utils.generate_video_with_subtitles(
         args.audio_link, 
         args.vid_link, 
         args.swear_word_list, 
         args.video_output,
-        args.srtFilename
+        args.srtFilename,
+        render_mode=args.render_mode,
+        use_transcript_cache=not args.no_transcript_cache,
+        script=script,
+        scratch_dir=args.scratch_dir,
+        checkpoint_dir=args.checkpoint_dir,
+        keep_checkpoints=args.keep_checkpoints,
+        censor_mode=args.censor_mode,
+        asr_workers=args.asr_workers,
+        inference_options=inference.options_from_args(args),
+        caption_renderer=args.caption_renderer,
+        caption_mode=args.caption_mode,
+        caption_rules=caption_segmenter.rules_from_args(args)
         )
 
 
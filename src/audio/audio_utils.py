@@ -1,71 +1,127 @@
-from typing import List, Tuple, Dict, Union
+from typing import List, Tuple, Dict, Union, Optional
 import re
 import os
 
 import csv
 from pydub import AudioSegment
 
-from src.audio import concate_audio
-from src.utils import (generate_subtitles, text_utils)
+from src.audio import concate_audio, silence, ffmpeg_censor
+from src.audio.loaded_audio import LoadedAudio
+from src.utils import (generate_subtitles, text_utils, censor)
 
 
 SWEAR_WORD_LIST_FILE_LOCATION = os.getenv('SWEAR_WORD_LIST_FILE_LOCATION_FILE_LOCATION')
 
-def silence_segments(input_file, output_file, segments):
-    '''silences all selected segments'''
-    # Load audio file
-    audio = AudioSegment.from_file(input_file)
+# path -> ((mtime, size), swear words, replacer)
+_swear_word_lists = {}
+
+def silence_segments(input_file, output_file, segments, fade_ms: float = 0, engine: str = "pydub", audio: Optional[LoadedAudio] = None):
+    '''
+    Silences all selected segments.
 
-    # Loop over the list of segments
-    for segment in segments:
-        # Calculate the start and end times in milliseconds
-        start_ms = segment['start'] * 1000
-        end_ms = segment['end'] * 1000
+    With the "pydub" engine the audio is decoded and the merged segments are silenced on
+    the raw samples in one pass, so the cost does not grow with the number of segments.
+    The output has the same length and format as the input. The "ffmpeg" engine censors
+    the audio as a stream in ffmpeg instead, which keeps memory constant for long inputs.
 
-        # Create a silent audio segment with the same duration as the specified segment
-        duration = end_ms - start_ms
-        silent_segment = AudioSegment.silent(duration=duration)
+    Args:
+        input_file (str): The audio file to censor.
+        output_file (str): The WAV file to write.
+        segments (List[Dict[str, Union[str, float]]]): Segments with 'start' and 'end' keys in seconds.
+        fade_ms (float, optional): Length of a fade out before and fade in after every
+            segment in milliseconds. Defaults to 0, a hard cut.
+        engine (str, optional): "pydub" or "ffmpeg". Defaults to "pydub".
+        audio (LoadedAudio, optional): input_file already decoded, used by the "pydub"
+            engine instead of decoding it again.
+    '''
+    if engine == "ffmpeg":
+        ffmpeg_censor.silence_segments_ffmpeg(input_file, output_file, segments, fade_ms)
+        return
 
-        # Replace the segment with the silent audio
-        audio = audio[:start_ms] + silent_segment + audio[end_ms:]
+    # Load audio file
+    audio_segment = audio.segment if audio is not None else AudioSegment.from_file(input_file)
+
+    raw_data = silence.silence_raw_data(
+        audio_segment.raw_data, audio_segment.sample_width, audio_segment.channels, audio_segment.frame_rate, segments, fade_ms)
 
     # Export the modified audio to a file
-    audio.export(output_file, format="wav")
+    audio_segment._spawn(raw_data).export(output_file, format="wav")
 
-def make_family_friendly(input_data:str,swear_word_list:List[str],output_data:str="output0.wav"):
-    x = generate_subtitles.transcribe_and_align(input_data)
+def make_family_friendly(input_data:str,swear_word_list:List[str],output_data:str="output0.wav",engine:str="pydub"):
+    audio = LoadedAudio(input_data)
+    x = generate_subtitles.transcribe_and_align(input_data, audio=audio)
     x_word_segments = x['word_segments']
 
     swear_word_segements = text_utils.filter_text_by_list(x_word_segments,swear_word_list)
 
-    silence_segments(input_data, output_data, swear_word_segements)
+    silence_segments(input_data, output_data, swear_word_segements, engine=engine, audio=audio)
 
 def mask_swear_segments(word_list: List[str], x_word_segments: List[Dict[str, Union[str, float]]]) -> List[Dict[str, Union[str, float]]]:
-    x_word_segments_copy = []
-    for i in x_word_segments:
-        segment_copy = i.copy()
-        segment_copy['text'] = mask_specific_words(word_list, i['text'])
-        x_word_segments_copy.append(segment_copy)
-    return x_word_segments_copy
+    return censor.get_censor_engine(word_list).mask_segments(x_word_segments)
+
+def remove_swears(audio_script:str, path: Optional[str] = None) ->str:
+    """
+    Replace the swear words in a script with their replacements from the swear word list.
 
-def remove_swears(audio_script:str) ->str:
-    links_dict = get_swear_word_list()
+    The script is scanned once whatever the size of the list. At every position the longest
+    matching entry is replaced.
 
-    for word, replacement in links_dict.items():
-        audio_script = audio_script.replace(word, replacement)
+    Args:
+        audio_script (str): The script to sanitise.
+        path (str, optional): The swear word CSV. Defaults to SWEAR_WORD_LIST_FILE_LOCATION.
 
-    return audio_script
+    Returns:
+        str: The sanitised script.
+    """
+    _, replacer = _load_swear_word_list(path or SWEAR_WORD_LIST_FILE_LOCATION)
+    return replacer.replace(audio_script)
+
+def _load_swear_word_list(path: str) -> Tuple[Dict[str, str], censor.Replacer]:
+    # parsed once per path and reloaded when the file changes
+    stat = os.stat(path)
+    version = (stat.st_mtime_ns, stat.st_size)
+    cached = _swear_word_lists.get(os.path.abspath(path))
+    if cached is not None and cached[0] == version:
+        return cached[1], cached[2]
+
+    with open(path, 'r') as f:
+        reader = csv.reader(f)
+        # create a dictionary with the first column as the keys and the second column as the values
+        links_dict = {rows[0]: rows[1] for rows in reader}
+    replacer = censor.Replacer(links_dict)
+    _swear_word_lists[os.path.abspath(path)] = (version, links_dict, replacer)
+    return links_dict, replacer
+
+def get_swear_word_list(path: Optional[str] = None) -> Dict[str, str]:
+    """
+    Load the swear word CSV, whose rows are a swear word and its replacement.
 
-def get_swear_word_list():
-        with open(SWEAR_WORD_LIST_FILE_LOCATION, 'r') as f:
-            reader = csv.reader(f)
-            # create a dictionary with the first column as the keys and the second column as the values
-            links_dict = {rows[0]: rows[1] for rows in reader}
-        return links_dict
+    The file is parsed once and only read again after it changes.
+
+    Args:
+        path (str, optional): The swear word CSV. Defaults to SWEAR_WORD_LIST_FILE_LOCATION.
+
+    Returns:
+        Dict[str, str]: The replacement of every swear word.
+    """
+    links_dict, _ = _load_swear_word_list(path or SWEAR_WORD_LIST_FILE_LOCATION)
+    return dict(links_dict)
+
+def read_swear_word_file(path: str) -> List[str]:
+    """
+    Read a text file with one swear word per line.
+
+    Args:
+        path (str): The path to the text file.
+
+    Returns:
+        List[str]: The swear words.
+    """
+    with open(path, 'r') as file:
+        return [word.strip() for word in file.readlines()]
 
 def mask_word(match):
-    word = match.group(0)
-    return word[0] + "*" * (len(word) - 2) + word[-1]
+    return censor.mask_word(match.group(0))
 
 def mask_specific_words(words_to_mask: List[str], string_to_mask: str) -> str:
     """
@@ -78,15 +134,5 @@ def mask_specific_words(words_to_mask: List[str], string_to_mask: str) -> str:
     Returns:
         str: Masked string.
     """
-    # Create a set of unique words to mask for faster lookup
-    words_set = set(words_to_mask)
-
-    # Compile the regex pattern to match any of the words to mask
-    pattern = re.compile(r"\b(?:{})\b".format("|".join(re.escape(word) for word in words_set)), flags=re.IGNORECASE)
-
-    # Replace the matched words with asterisks, preserving the first and last characters
-
-    # Perform the replacement using the compiled pattern and mask_word function
-    masked_string = pattern.sub(mask_word, string_to_mask)
-
-    return masked_string
\ No newline at end of file
+    # The pattern for the word list is compiled once and shared by every call
+    return censor.get_censor_engine(words_to_mask).mask(string_to_mask)
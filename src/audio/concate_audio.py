@@ -3,52 +3,199 @@
 import os
 import random
 import sys
+import wave
 import argparse
-from typing import List
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Iterator, List, Optional, Tuple
 from natsort import natsorted
 from pydub import AudioSegment
+from pydub.utils import mediainfo_json
+
+
+# (channels, sample width in bytes, frame rate) of PCM audio
+AudioFormat = Tuple[int, int, int]
+
+# Frames copied from an input track to the output per read
+WAV_CHUNK_FRAMES = 65536
+
+# Tracks decoded at the same time by default
+DECODE_WORKERS = min(8, os.cpu_count() or 1)
+
+# Format of AudioSegment.empty(), used when there are no files to combine
+_EMPTY_FORMAT: AudioFormat = (1, 1, 1)
+
+# WAV stores 8-bit samples unsigned, pydub keeps them signed
+_SIGNED_TO_UNSIGNED_8BIT = bytes((value + 128) % 256 for value in range(256))
 
 
 def get_sorted_audio_files(directory: str) -> List[str]:
     return [os.path.join(directory, f) for f in natsorted(os.listdir(directory)) if f.endswith('.wav')]
 
 
-def combine_audio_files_directory(directory: str, output: str) -> AudioSegment:
+def _wav_format(audio_file: str) -> Optional[AudioFormat]:
+    try:
+        with wave.open(audio_file, 'rb') as track:
+            return track.getnchannels(), track.getsampwidth(), track.getframerate()
+    except (wave.Error, EOFError):
+        # not plain PCM, e.g. float or WAVE_FORMAT_EXTENSIBLE
+        return None
+
+
+def _decode(audio_file: str, audio_format: AudioFormat) -> bytes:
+    channels, sample_width, frame_rate = audio_format
+    audio = AudioSegment.from_file(audio_file)
+    audio = audio.set_channels(channels).set_sample_width(sample_width).set_frame_rate(frame_rate)
+    if sample_width == 1:
+        return audio.raw_data.translate(_SIGNED_TO_UNSIGNED_8BIT)
+    return audio.raw_data
+
+
+def _probed_format(audio_file: str) -> Optional[AudioFormat]:
+    # the format pydub decodes the file to, read with ffprobe instead of decoding it
+    try:
+        info = mediainfo_json(audio_file)
+        stream = next(stream for stream in info['streams'] if stream.get('codec_type') == 'audio')
+        if stream.get('sample_fmt') == 'fltp' and stream.get('codec_name') in ['mp3', 'mp4', 'aac', 'webm', 'ogg']:
+            # pydub decodes these to 16 bits whatever ffprobe says
+            bits_per_sample = 16
+        else:
+            bits_per_sample = int(stream['bits_per_sample'])
+        channels, frame_rate = int(stream['channels']), int(stream['sample_rate'])
+    except (OSError, StopIteration, KeyError, ValueError):
+        return None
+    if bits_per_sample not in (8, 16, 24, 32):
+        return None
+    # pydub keeps 24-bit samples as 32-bit
+    return channels, 4 if bits_per_sample == 24 else bits_per_sample // 8, frame_rate
+
+
+def _track_format(audio_file: str) -> AudioFormat:
+    audio_format = _wav_format(audio_file) or _probed_format(audio_file)
+    if audio_format is None:
+        audio = AudioSegment.from_file(audio_file)
+        audio_format = (audio.channels, audio.sample_width, audio.frame_rate)
+    return audio_format
+
+
+def _output_format(formats: List[AudioFormat]) -> AudioFormat:
+    # like pydub's + operator, use the most channels, widest samples and highest rate of all files
+    return tuple(max(values) for values in zip(*formats))
+
+
+def _wav_frames(audio_file: str) -> Iterator[bytes]:
+    with wave.open(audio_file, 'rb') as track:
+        while True:
+            frames = track.readframes(WAV_CHUNK_FRAMES)
+            if not frames:
+                return
+            yield frames
+
+
+def _track_frames(audio_file: str, decoded: "Future[Optional[bytes]]") -> Iterator[bytes]:
+    # tracks already in the output format are not decoded ahead, they are copied a chunk at a time
+    frames = decoded.result()
+    if frames is None:
+        yield from _wav_frames(audio_file)
+    else:
+        yield frames
+
+
+def _decode_ahead(audio_files: List[str], formats: List[AudioFormat], audio_format: AudioFormat,
+                  executor: ThreadPoolExecutor, max_in_flight: int) -> Iterator[Iterator[bytes]]:
+    """
+    Yield the frames of every track in order, while the next tracks are decoded on the executor.
+
+    Only tracks that need converting are decoded, and at most max_in_flight of them are decoded
+    or waiting to be written at any time.
+    """
+    pending = deque()
+    for audio_file, track_format in zip(audio_files, formats):
+        if track_format == audio_format and _wav_format(audio_file) is not None:
+            decoded = Future()
+            decoded.set_result(None)
+        else:
+            decoded = executor.submit(_decode, audio_file, audio_format)
+        pending.append((audio_file, decoded))
+        if len(pending) >= max_in_flight:
+            yield _track_frames(*pending.popleft())
+    while pending:
+        yield _track_frames(*pending.popleft())
+
+
+def _silence(duration_ms: int, audio_format: AudioFormat) -> bytes:
+    channels, sample_width, frame_rate = audio_format
+    silent_sample = b'\x80' if sample_width == 1 else b'\x00' * sample_width
+    return silent_sample * channels * int(frame_rate * duration_ms / 1000)
+
+
+def concatenate_wav_files(
+        audio_files: List[str],
+        output: str,
+        pause_range_ms: Optional[Tuple[int, int]] = None,
+        workers: int = DECODE_WORKERS,
+        max_in_flight: Optional[int] = None) -> None:
+    """
+    Streams audio files one after the other into a single .wav file.
+
+    Like joining AudioSegments with +, the output has the most channels, the widest samples and the highest
+    frame rate of all the files. Files already in that format are copied a chunk at a time. Every other file
+    is decoded and converted once by pydub on a thread pool, ahead of the writer and in order, so the time
+    spent starting decoders overlaps. The header is written with the final length when the output is closed.
+
+    :param audio_files: Paths of the audio files, in order.
+    :param output: Path to the output .wav file.
+    :param pause_range_ms: If provided, the (min, max) length in milliseconds of the random silence written
+        between consecutive files.
+    :param workers: Number of files decoded at the same time.
+    :param max_in_flight: Most decoded files held in memory waiting to be written. Defaults to twice workers.
+        If no audio files are given, an empty .wav file is written, as AudioSegment.empty() would export.
+    """
+    workers = max(1, workers)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        formats = list(executor.map(_track_format, audio_files))
+        audio_format = _output_format(formats) if formats else _EMPTY_FORMAT
+        channels, sample_width, frame_rate = audio_format
+
+        with wave.open(output, 'wb') as combined:
+            combined.setnchannels(channels)
+            combined.setsampwidth(sample_width)
+            combined.setframerate(frame_rate)
+            tracks = _decode_ahead(audio_files, formats, audio_format, executor, max_in_flight or 2 * workers)
+            for i, track in enumerate(tracks):
+                if i > 0 and pause_range_ms:
+                    combined.writeframes(_silence(random.randint(*pause_range_ms), audio_format))
+                for frames in track:
+                    combined.writeframes(frames)
+
+
+def combine_audio_files_directory(directory: str, output: str, return_audio: bool = True, workers: int = DECODE_WORKERS) -> Optional[AudioSegment]:
     """
     Combines all .wav audio files in a given directory into a single audio file and exports it to the specified output file.
 
     :param directory: Path to the directory containing the audio files to be combined.
     :param output: Path to the output file where the combined audio will be saved.
-    :return: The combined audio as a PyDub AudioSegment object.
+    :param return_audio: Load and return the combined audio. Pass False to keep memory constant.
+    :param workers: Number of files decoded at the same time.
+    :return: The combined audio as a PyDub AudioSegment object, or None if return_audio is False.
     """
-    audio_files = get_sorted_audio_files(directory)
-    combined_audio = AudioSegment.empty()
-    for audio_file in audio_files:
-        audio = AudioSegment.from_file(audio_file)
-        combined_audio += audio
-    combined_audio.export(output, format='wav')
-    return combined_audio
+    concatenate_wav_files(get_sorted_audio_files(directory), output, workers=workers)
+    return AudioSegment.from_wav(output) if return_audio else None
 
 
-def combine_audio_files_with_random_pause(directory:str, output:str) -> AudioSegment:
+def combine_audio_files_with_random_pause(directory:str, output:str, return_audio: bool = True, workers: int = DECODE_WORKERS) -> Optional[AudioSegment]:
     """
     Combines all .wav audio files in a given directory into a single audio file with a random pause (300ms to 500ms) between
     each file and exports it to the specified output file.
-    
+
     :param directory: Path to the directory containing the audio files to be combined.
     :param output: Path to the output file where the combined audio will be saved.
-    :return: The combined audio as a PyDub AudioSegment object.
+    :param return_audio: Load and return the combined audio. Pass False to keep memory constant.
+    :param workers: Number of files decoded at the same time.
+    :return: The combined audio as a PyDub AudioSegment object, or None if return_audio is False.
     """
-    combined_audio = AudioSegment.empty()
-    audio_files = get_sorted_audio_files(directory)
-    combined_audio = AudioSegment.from_file(audio_files[0])
-    for audio_file in audio_files[1:]:
-        pause_duration = random.randint(300, 500)
-        combined_audio += AudioSegment.silent(duration=pause_duration)
-        audio = AudioSegment.from_file(audio_file)
-        combined_audio += audio
-    combined_audio.export(output, format='wav')
-    return combined_audio
+    concatenate_wav_files(get_sorted_audio_files(directory), output, pause_range_ms=(300, 500), workers=workers)
+    return AudioSegment.from_wav(output) if return_audio else None
 
 
 def main(args: List[str]) -> None:
@@ -56,12 +203,13 @@ def main(args: List[str]) -> None:
     parser.add_argument('directory', metavar='DIRECTORY', help='directory containing the audio files to combine')
     parser.add_argument('-o', '--output', default='combined_audio.wav', help='output filename (default: combined_audio.wav)')
     parser.add_argument('--pause', action='store_true', help='add random pause between files')
+    parser.add_argument('--workers', type=int, default=DECODE_WORKERS, help=f'files decoded at the same time (default: {DECODE_WORKERS})')
     args = parser.parse_args(args)
 
     if args.pause:
-        combine_audio_files_with_random_pause(args.directory, args.output)
+        combine_audio_files_with_random_pause(args.directory, args.output, return_audio=False, workers=args.workers)
     else:
-        combine_audio_files_directory(args.directory, args.output)
+        combine_audio_files_directory(args.directory, args.output, return_audio=False, workers=args.workers)
 
 
 
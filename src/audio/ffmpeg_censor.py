@@ -0,0 +1,129 @@
+import os
+import json
+import argparse
+import tempfile
+import subprocess
+from typing import List, Dict, Tuple, Union, Optional
+
+
+SegmentList = List[Dict[str, Union[str, float]]]
+
+# The volume filter switches on and off per audio frame, so frames are cut to this many
+# samples first. At 44.1 kHz that places every cut within 1.5 ms of the word boundary.
+FRAME_SAMPLES = 64
+
+
+def merge_segments(segments: SegmentList) -> List[Tuple[float, float]]:
+    """
+    Sort segments and merge the ones that overlap or touch.
+
+    Args:
+        segments (SegmentList): Segments with 'start' and 'end' keys in seconds.
+
+    Returns:
+        List[Tuple[float, float]]: The merged (start, end) intervals in seconds.
+    """
+    intervals = sorted(
+        (max(0.0, float(segment['start'])), float(segment['end']))
+        for segment in segments
+        if float(segment['end']) > max(0.0, float(segment['start'])))
+
+    merged = []
+    for start, end in intervals:
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def censor_filter(segments: SegmentList, fade_ms: float = 0, frame_samples: int = FRAME_SAMPLES) -> str:
+    """
+    Build an ffmpeg audio filter graph that silences segments.
+
+    Without a fade the volume filter is switched to 0 inside the segments with a timeline
+    expression. With a fade the gain is computed per frame as the product of a linear
+    ramp around every segment, like audio_utils.silence_segments with fade_ms.
+
+    Args:
+        segments (SegmentList): Segments with 'start' and 'end' keys in seconds.
+        fade_ms (float, optional): Length of a fade out before and fade in after every
+            segment in milliseconds. Defaults to 0, a hard cut.
+        frame_samples (int, optional): Samples per frame the volume is evaluated on.
+            Defaults to FRAME_SAMPLES.
+
+    Returns:
+        str: The filter graph, or "anull" if there is nothing to silence.
+    """
+    intervals = merge_segments(segments)
+    if not intervals:
+        return "anull"
+
+    if fade_ms > 0:
+        fade = fade_ms / 1000
+        gain = "*".join(f"clip(max({start:.6f}-t,t-{end:.6f})/{fade:.6f},0,1)" for start, end in intervals)
+        volume = f"volume='{gain}':eval=frame"
+    else:
+        enable = "+".join(f"between(t,{start:.6f},{end:.6f})" for start, end in intervals)
+        volume = f"volume=0:enable='{enable}'"
+    return f"asetnsamples=n={frame_samples}:p=0,{volume}"
+
+
+def silence_segments_ffmpeg(
+        input_file: str,
+        output_file: str,
+        segments: SegmentList,
+        fade_ms: float = 0,
+        scratch_dir: Optional[str] = None) -> None:
+    """
+    Silence segments of an audio file with ffmpeg.
+
+    The audio is censored as a stream by ffmpeg and never decoded into Python, so memory
+    stays constant whatever the length of the input. The filter graph is passed as a
+    filter script because a long list of segments does not fit on a command line.
+
+    Args:
+        input_file (str): The audio file to censor.
+        output_file (str): The file to write. The format is chosen from its extension.
+        segments (SegmentList): Segments with 'start' and 'end' keys in seconds.
+        fade_ms (float, optional): Length of a fade out before and fade in after every
+            segment in milliseconds. Defaults to 0, a hard cut.
+        scratch_dir (str, optional): Directory for the filter script. Defaults to the
+            directory of the output file.
+
+    Raises:
+        subprocess.CalledProcessError: If ffmpeg fails.
+    """
+    script_dir = scratch_dir or os.path.dirname(os.path.abspath(output_file))
+    fd, script_path = tempfile.mkstemp(prefix="censor_", suffix=".txt", dir=script_dir)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(censor_filter(segments, fade_ms))
+
+        ffmpeg_cmd = [
+            "ffmpeg", "-v", "error",
+            "-i", input_file,
+            "-map", "0:a:0",
+            "-filter_script:a", script_path,
+            output_file, "-y"
+        ]
+        subprocess.run(ffmpeg_cmd, check=True)
+    finally:
+        os.remove(script_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Silence segments of an audio file with ffmpeg')
+    parser.add_argument('input_file', help='the audio file to censor')
+    parser.add_argument('segments_file', help='JSON list of segments with start and end times in seconds')
+    parser.add_argument('output_file', help='the file to write')
+    parser.add_argument('--fade_ms', type=float, default=0, help='fade around every segment in milliseconds (default: 0)')
+    args = parser.parse_args()
+
+    with open(args.segments_file, 'r', encoding='utf-8') as f:
+        segments = json.load(f)
+    silence_segments_ffmpeg(args.input_file, args.output_file, segments, args.fade_ms)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+import math
+import threading
+from pathlib import Path
+from typing import Union
+
+import numpy as np
+from pydub import AudioSegment
+from scipy.signal import resample_poly
+
+from src.audio.silence import SAMPLE_TYPES
+
+
+# Whisper and the wav2vec2 aligners take 16 kHz mono
+ASR_SAMPLE_RATE = 16000
+
+
+def to_asr_samples(audio: AudioSegment, sample_rate: int = ASR_SAMPLE_RATE) -> np.ndarray:
+    """
+    Convert decoded audio to the mono float32 samples the ASR and alignment models take.
+
+    Args:
+        audio (AudioSegment): The decoded audio.
+        sample_rate (int, optional): The sample rate to resample to. Defaults to ASR_SAMPLE_RATE.
+
+    Returns:
+        np.ndarray: Mono samples between -1 and 1.
+    """
+    samples = np.frombuffer(audio.raw_data, dtype=SAMPLE_TYPES[audio.sample_width]).reshape(-1, audio.channels)
+    samples = samples.mean(axis=1, dtype=np.float32) / float(1 << (8 * audio.sample_width - 1))
+    if audio.frame_rate != sample_rate:
+        divisor = math.gcd(sample_rate, audio.frame_rate)
+        samples = resample_poly(samples, sample_rate // divisor, audio.frame_rate // divisor)
+    return samples.astype(np.float32, copy=False)
+
+
+class LoadedAudio:
+    """
+    An audio file decoded once and shared by every stage that reads it.
+
+    The file is decoded on first use at its original rate, which is what censoring
+    works on. The 16 kHz mono samples for transcription and alignment are derived
+    from that decode instead of decoding the file again. Both are kept until the
+    object is dropped, and stages that never ask for them never decode the file.
+
+    Args:
+        path (Union[str, Path]): The audio file.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = str(path)
+        self._segment = None
+        self._asr_samples = None
+        self._lock = threading.RLock()
+
+    @property
+    def segment(self) -> AudioSegment:
+        """The audio at its original rate, sample width and channels."""
+        with self._lock:
+            if self._segment is None:
+                self._segment = AudioSegment.from_file(self.path)
+            return self._segment
+
+    @property
+    def asr_samples(self) -> np.ndarray:
+        """The audio as 16 kHz mono float32 samples."""
+        with self._lock:
+            if self._asr_samples is None:
+                self._asr_samples = to_asr_samples(self.segment)
+            return self._asr_samples
+
+    @property
+    def duration(self) -> float:
+        """The length of the audio in seconds."""
+        return self.segment.duration_seconds
@@ -0,0 +1,113 @@
+from typing import Dict, List, Union
+
+import numpy as np
+
+
+# numpy sample type of every pydub sample width. pydub stores 8-bit audio as signed
+# and widens 24-bit audio to 32-bit, so zero is silence for all of them.
+SAMPLE_TYPES = {1: np.int8, 2: np.int16, 4: np.int32}
+
+
+def segment_frames(segments: List[Dict[str, Union[str, float]]], frame_rate: int, frame_count: int) -> np.ndarray:
+    """
+    Convert segments in seconds to sorted, merged frame intervals.
+
+    Frame positions are truncated the way pydub converts milliseconds to frames. Intervals
+    are clipped to the audio, and overlapping or touching intervals are merged.
+
+    Args:
+        segments (List[Dict[str, Union[str, float]]]): Segments with 'start' and 'end' keys in seconds.
+        frame_rate (int): The frame rate of the audio.
+        frame_count (int): The number of frames in the audio.
+
+    Returns:
+        np.ndarray: A (n, 2) array of [start, end) frame intervals.
+    """
+    if not segments:
+        return np.empty((0, 2), dtype=np.int64)
+
+    times = np.array([[segment['start'], segment['end']] for segment in segments], dtype=np.float64)
+    frames = (times * 1000 * frame_rate / 1000.0).astype(np.int64)
+    frames = np.clip(frames, 0, frame_count)
+    frames = frames[frames[:, 1] > frames[:, 0]]
+    if len(frames) == 0:
+        return np.empty((0, 2), dtype=np.int64)
+
+    frames = frames[np.argsort(frames[:, 0], kind="stable")]
+    running_end = np.maximum.accumulate(frames[:, 1])
+    # an interval starts a new group when it begins after every earlier interval has ended
+    new_group = np.empty(len(frames), dtype=bool)
+    new_group[0] = True
+    new_group[1:] = frames[1:, 0] > running_end[:-1]
+    group_starts = np.flatnonzero(new_group)
+    group_ends = np.append(group_starts[1:], len(frames)) - 1
+    return np.column_stack((frames[group_starts, 0], running_end[group_ends]))
+
+
+def silence_frames(samples: np.ndarray, intervals: np.ndarray, fade_frames: int = 0) -> np.ndarray:
+    """
+    Silence frame intervals of an audio buffer in place.
+
+    Args:
+        samples (np.ndarray): A writable (frames, channels) sample array.
+        intervals (np.ndarray): Merged [start, end) frame intervals, as returned by segment_frames.
+        fade_frames (int, optional): Length of a linear fade out before and fade in after
+            every interval. The intervals themselves are always fully silent. Defaults to 0.
+
+    Returns:
+        np.ndarray: The samples.
+    """
+    frame_count = len(samples)
+    if len(intervals) == 0:
+        return samples
+
+    # +1 where an interval starts and -1 where it ends, so the running sum is non-zero inside intervals
+    edges = np.zeros(frame_count + 1, dtype=np.int32)
+    np.add.at(edges, intervals[:, 0], 1)
+    np.add.at(edges, intervals[:, 1], -1)
+    samples[np.cumsum(edges[:-1]) > 0] = 0
+
+    if fade_frames > 0:
+        ramp = np.linspace(1.0, 0.0, fade_frames + 2, dtype=np.float32)[1:-1]
+        for start, end in intervals:
+            fade_out = slice(max(0, start - fade_frames), start)
+            fade_in = slice(end, min(frame_count, end + fade_frames))
+            out_gain = ramp[fade_frames - (fade_out.stop - fade_out.start):]
+            in_gain = ramp[::-1][:fade_in.stop - fade_in.start]
+            # fades of intervals closer than fade_frames overlap and multiply
+            samples[fade_out] = _scale(samples[fade_out], out_gain)
+            samples[fade_in] = _scale(samples[fade_in], in_gain)
+    return samples
+
+
+def _scale(samples: np.ndarray, gain: np.ndarray) -> np.ndarray:
+    return np.round(samples * gain[:, np.newaxis]).astype(samples.dtype)
+
+
+def silence_raw_data(raw_data: bytes, sample_width: int, channels: int, frame_rate: int,
+                     segments: List[Dict[str, Union[str, float]]], fade_ms: float = 0) -> bytes:
+    """
+    Silence segments of raw PCM audio in one pass.
+
+    Args:
+        raw_data (bytes): Interleaved signed PCM samples, like AudioSegment.raw_data.
+        sample_width (int): Bytes per sample, 1, 2 or 4.
+        channels (int): The number of channels.
+        frame_rate (int): The frame rate.
+        segments (List[Dict[str, Union[str, float]]]): Segments with 'start' and 'end' keys in seconds.
+        fade_ms (float, optional): Length of the fade around every silenced segment in
+            milliseconds. Defaults to 0, a hard cut.
+
+    Returns:
+        bytes: The silenced audio, the same length as the input.
+
+    Raises:
+        ValueError: If the sample width is not supported.
+    """
+    if sample_width not in SAMPLE_TYPES:
+        raise ValueError(f"Unsupported sample width: {sample_width}")
+
+    samples = np.frombuffer(bytearray(raw_data), dtype=SAMPLE_TYPES[sample_width]).reshape(-1, channels)
+    intervals = segment_frames(segments, frame_rate, len(samples))
+    silence_frames(samples, intervals, int(fade_ms * frame_rate / 1000))
+    return samples.tobytes()
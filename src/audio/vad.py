@@ -0,0 +1,141 @@
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+
+# Length of the frames the loudness of the audio is measured on, in seconds
+FRAME_SECONDS = 0.03
+# A frame is speech when it is louder than this fraction of the loud end of the audio
+THRESHOLD_RATIO = 0.05
+# Pauses shorter than this stay in, so words are not cut apart
+MIN_SILENCE_SECONDS = 0.5
+# Speech keeps this much audio on either side, so soft onsets and endings survive
+PAD_SECONDS = 0.2
+
+Region = Tuple[float, float]
+
+
+def speech_regions(
+        audio: np.ndarray,
+        sample_rate: int,
+        threshold_ratio: float = THRESHOLD_RATIO,
+        min_silence_seconds: float = MIN_SILENCE_SECONDS,
+        pad_seconds: float = PAD_SECONDS) -> List[Region]:
+    """
+    Find the parts of the audio with speech in them from the loudness of short frames.
+
+    Args:
+        audio (np.ndarray): Mono samples.
+        sample_rate (int): The sample rate of the audio.
+        threshold_ratio (float, optional): A frame is speech when its loudness is over this
+            fraction of the 95th percentile loudness. Defaults to THRESHOLD_RATIO.
+        min_silence_seconds (float, optional): Shorter pauses are kept as speech. Defaults to MIN_SILENCE_SECONDS.
+        pad_seconds (float, optional): Audio kept on either side of speech. Defaults to PAD_SECONDS.
+
+    Returns:
+        List[Region]: (start, end) of every speech region in seconds, in order and not overlapping.
+    """
+    frame = max(1, int(sample_rate * FRAME_SECONDS))
+    n_frames = len(audio) // frame
+    duration = len(audio) / sample_rate
+    if n_frames == 0:
+        return [(0.0, duration)] if len(audio) else []
+
+    frames = np.asarray(audio[:n_frames * frame], dtype=np.float32).reshape(n_frames, frame)
+    energy = np.sqrt(np.mean(frames ** 2, axis=1))
+    threshold = threshold_ratio * np.percentile(energy, 95)
+    if threshold <= 0:
+        return []
+    voiced = np.flatnonzero(energy > threshold)
+    if len(voiced) == 0:
+        return []
+
+    frame_seconds = frame / sample_rate
+    # runs of voiced frames, split where the gap is a long enough pause
+    breaks = np.flatnonzero(np.diff(voiced) * frame_seconds > min_silence_seconds)
+    starts = voiced[np.concatenate(([0], breaks + 1))]
+    ends = voiced[np.concatenate((breaks, [len(voiced) - 1]))] + 1
+
+    regions = []
+    for start, end in zip(starts * frame_seconds - pad_seconds, ends * frame_seconds + pad_seconds):
+        start, end = max(0.0, start), min(duration, end)
+        if regions and start <= regions[-1][1]:
+            regions[-1] = (regions[-1][0], end)
+        else:
+            regions.append((start, end))
+    return regions
+
+
+def keep_regions(audio: np.ndarray, regions: List[Region], sample_rate: int) -> np.ndarray:
+    """
+    Cut everything outside the regions out of the audio.
+
+    Args:
+        audio (np.ndarray): Mono samples.
+        regions (List[Region]): The regions to keep, as returned by speech_regions.
+        sample_rate (int): The sample rate of the audio.
+
+    Returns:
+        np.ndarray: The regions joined together.
+    """
+    if not regions:
+        return audio[:0]
+    return np.concatenate([audio[int(start * sample_rate):int(end * sample_rate)] for start, end in regions])
+
+
+def _region_offsets(regions: List[Region]) -> Tuple[np.ndarray, np.ndarray]:
+    lengths = np.array([end - start for start, end in regions])
+    kept_starts = np.concatenate(([0.0], np.cumsum(lengths)[:-1]))
+    return kept_starts, np.array([start for start, _ in regions])
+
+
+def restore_time(time: float, regions: List[Region]) -> float:
+    """
+    Move a time in the audio returned by keep_regions back to the time in the original audio.
+
+    Args:
+        time (float): The time in the kept audio in seconds.
+        regions (List[Region]): The regions passed to keep_regions.
+
+    Returns:
+        float: The time in the original audio in seconds.
+    """
+    return _restore(time, *_region_offsets(regions))
+
+
+def _restore(time: float, kept_starts: np.ndarray, starts: np.ndarray) -> float:
+    i = max(0, int(np.searchsorted(kept_starts, time, side="right")) - 1)
+    return float(starts[i] + time - kept_starts[i])
+
+
+def _restore_item(item: Dict[str, Any], offsets: Tuple[np.ndarray, np.ndarray]) -> Dict[str, Any]:
+    item = dict(item)
+    for key in ("start", "end"):
+        # NaN times of words the aligner could not place stay NaN
+        if item.get(key) is not None and item[key] == item[key]:
+            item[key] = _restore(item[key], *offsets)
+    for key in ("words", "chars"):
+        if key in item:
+            item[key] = [_restore_item(child, offsets) for child in item[key]]
+    return item
+
+
+def restore_transcript(result: Dict[str, Any], regions: List[Region]) -> Dict[str, Any]:
+    """
+    Move the times of a transcript of the audio returned by keep_regions back to the original audio.
+
+    Args:
+        result (Dict[str, Any]): The aligned transcript with 'segments' and 'word_segments' keys.
+        regions (List[Region]): The regions passed to keep_regions.
+
+    Returns:
+        Dict[str, Any]: A copy of the transcript in original audio time.
+    """
+    if not regions:
+        return result
+    offsets = _region_offsets(regions)
+    result = dict(result)
+    for key in ("segments", "word_segments"):
+        if key in result:
+            result[key] = [_restore_item(item, offsets) for item in result[key]]
+    return result
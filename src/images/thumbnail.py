@@ -118,21 +118,21 @@ def create_thumbnail(segmented_image: str,
     text_y_pos = 0
 
     # Iterate over the list of text objects and draw them on the left side of the background
-    for item in text:
+    for item in text_items:
         # Get the text and formatting information
         text = item["text"]
         color = item["color"]
-        y_spacing = item.get("y_spacing", y_spacing)
+        item_y_spacing = item.get("y_spacing", y_spacing)
         size = item["size"]
         font_location = item.get("font", default_font_location)
 
         # Set the font and color
         font = ImageFont.truetype(font_location, size)
         text_width, text_height = draw.textsize(text, font=font)
-        draw.text((text_x_pos, text_y_pos + y_spacing), text, font=font, fill=color)
+        draw.text((text_x_pos, text_y_pos + item_y_spacing), text, font=font, fill=color)
 
         # Update the text position
-        text_y_pos += text_height + y_spacing
+        text_y_pos += text_height + item_y_spacing
 
     # Save the resulting image
     if output_image:
@@ -0,0 +1,311 @@
+"""
+Reproducible benchmarks of the rendering pipeline on synthetic media.
+
+All inputs are generated locally from fixed seeds: sine and noise WAVs of several
+lengths, a colour-bar background video, a transparent PNG and a fake word-level
+transcript. Each public function is timed several times and the minimum and median
+are written to a JSON file together with the git commit, so results from different
+commits can be compared:
+
+    python -m src.test.benchmarks --output bench_before.json
+    python -m src.test.benchmarks --output bench_after.json --compare bench_before.json
+
+Requires ffmpeg on the PATH. Benchmarks whose dependencies are missing (e.g. ImageMagick
+for the moviepy captions or a TrueType font for the thumbnail) are reported as skipped.
+"""
+
+import os
+import sys
+import json
+import math
+import wave
+import array
+import random
+import shutil
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+
+SAMPLE_RATE = 44100
+DEFAULT_LENGTHS = [10, 60, 300]
+SWEAR_WORDS = ["darn", "heck", "frick"]
+WORDS = ["the", "story", "begins", "when", "my", "neighbour", "decided", "to", "build", "a", "fence"]
+
+
+def write_wav(path: Path, seconds: float, kind: str = "sine", seed: int = 0, frequency: float = 440.0) -> Path:
+    """
+    Write a 16-bit mono WAV file of a sine tone or white noise.
+
+    Args:
+        path (Path): The file to write.
+        seconds (float): The length of the audio.
+        kind (str, optional): "sine" or "noise". Defaults to "sine".
+        seed (int, optional): The seed of the noise generator. Defaults to 0.
+        frequency (float, optional): The frequency of the sine tone in Hz. Defaults to 440.
+
+    Returns:
+        Path: The path of the written file.
+    """
+    rng = random.Random(seed)
+    frames = int(seconds * SAMPLE_RATE)
+    block = SAMPLE_RATE
+    with wave.open(str(path), 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(SAMPLE_RATE)
+        for offset in range(0, frames, block):
+            count = min(block, frames - offset)
+            if kind == "noise":
+                samples = array.array('h', (rng.randint(-8000, 8000) for _ in range(count)))
+            else:
+                step = 2 * math.pi * frequency / SAMPLE_RATE
+                samples = array.array('h', (int(8000 * math.sin(step * (offset + i))) for i in range(count)))
+            if sys.byteorder == "big":
+                samples.byteswap()
+            wav.writeframes(samples.tobytes())
+    return path
+
+
+def write_colour_bars(path: Path, seconds: float, size: str = "1280x720", rate: int = 24) -> Path:
+    """
+    Write a colour-bar test video with ffmpeg.
+
+    Args:
+        path (Path): The file to write.
+        seconds (float): The length of the video.
+        size (str, optional): The frame size. Defaults to "1280x720".
+        rate (int, optional): The frame rate. Defaults to 24.
+
+    Returns:
+        Path: The path of the written file.
+    """
+    ffmpeg_cmd = [
+        "ffmpeg", "-v", "error",
+        "-f", "lavfi", "-i", f"smptebars=size={size}:rate={rate}",
+        "-t", str(seconds),
+        "-c:v", "libx264", "-pix_fmt", "yuv420p",
+        str(path), "-y"
+    ]
+    subprocess.run(ffmpeg_cmd, check=True)
+    return path
+
+
+def write_transparent_png(path: Path, size: int = 512) -> Path:
+    """Write an RGBA image with an opaque disc in the middle of a transparent square."""
+    from PIL import Image, ImageDraw
+
+    image = Image.new("RGBA", (size, size), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(image)
+    draw.ellipse((size // 4, size // 4, 3 * size // 4, 3 * size // 4), fill=(200, 40, 40, 255))
+    image.save(path)
+    return path
+
+
+def fake_word_segments(seconds: float, seed: int = 0, swear_every: int = 25) -> List[Dict[str, Any]]:
+    """
+    Build a fake word-level transcript covering the given length.
+
+    Args:
+        seconds (float): The length of the narration.
+        seed (int, optional): The seed of the word generator. Defaults to 0.
+        swear_every (int, optional): Every n-th word is a swear word. Defaults to 25.
+
+    Returns:
+        List[Dict[str, Any]]: Word segments with 'text', 'start' and 'end' keys.
+    """
+    rng = random.Random(seed)
+    word_segments = []
+    start = 0.1
+    index = 0
+    while start + 0.3 < seconds:
+        index += 1
+        text = SWEAR_WORDS[index % len(SWEAR_WORDS)] if index % swear_every == 0 else rng.choice(WORDS)
+        word_segments.append({"text": text, "start": round(start, 3), "end": round(start + 0.25, 3)})
+        start += 0.3 + rng.random() * 0.1
+    return word_segments
+
+
+def fake_transcript(seconds: float, seed: int = 0) -> Dict[str, Any]:
+    """Build a fake transcribe_and_align result with sentence segments of 12 words."""
+    word_segments = fake_word_segments(seconds, seed)
+    segments = []
+    for i in range(0, len(word_segments), 12):
+        words = word_segments[i:i + 12]
+        segments.append({"text": " ".join(word["text"] for word in words), "start": words[0]["start"], "end": words[-1]["end"]})
+    return {"segments": segments, "word_segments": word_segments}
+
+
+def time_call(func: Callable[[], Any], repeat: int, setup: Optional[Callable[[], Any]] = None) -> Dict[str, Any]:
+    """
+    Time a function several times.
+
+    Args:
+        func (Callable[[], Any]): The function to time.
+        repeat (int): How many times to call it.
+        setup (Callable[[], Any], optional): Called before every timed call, untimed.
+
+    Returns:
+        Dict[str, Any]: The min, median and every timing in seconds.
+    """
+    timings = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return {"min": min(timings), "median": statistics.median(timings), "runs": timings}
+
+
+def git_revision() -> str:
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+        return result.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def build_benchmarks(work_dir: Path, lengths: List[int], font: Optional[str]) -> Dict[str, Callable[[], Any]]:
+    """
+    Generate the synthetic inputs and return the benchmarks to run, keyed by name.
+
+    Args:
+        work_dir (Path): The directory for inputs and outputs.
+        lengths (List[int]): The narration lengths in seconds to benchmark.
+        font (str, optional): A TrueType font for the thumbnail text.
+
+    Returns:
+        Dict[str, Callable[[], Any]]: The benchmarks.
+    """
+    from src.audio import audio_utils, concate_audio
+    from src.images import thumbnail
+    from src.utils import generate_subtitles, utils
+    from src.video import random_sample_clip
+
+    background = write_colour_bars(work_dir / "background.mp4", max(lengths) + 5)
+    png = write_transparent_png(work_dir / "segmented.png")
+    benchmarks = {}
+
+    for length in lengths:
+        sine = write_wav(work_dir / f"sine_{length}s.wav", length, "sine")
+        write_wav(work_dir / f"noise_{length}s.wav", length, "noise", seed=length)
+        word_segments = fake_word_segments(length)
+        swear_segments = [word for word in word_segments if word["text"] in SWEAR_WORDS]
+        captions = generate_subtitles.segment_text_by_word_length(word_segments)
+
+        chunk_dir = work_dir / f"chunks_{length}s"
+        chunk_dir.mkdir()
+        for i in range(max(1, length // 5)):
+            write_wav(chunk_dir / f"track_{i}.wav", 5, "noise", seed=i)
+
+        clip = work_dir / f"clip_{length}s.mp4"
+
+        benchmarks[f"silence_segments[{length}s]"] = lambda sine=sine, swear_segments=swear_segments: audio_utils.silence_segments(
+            str(sine), str(work_dir / "silenced.wav"), swear_segments)
+        benchmarks[f"combine_audio_files_directory[{length}s]"] = lambda chunk_dir=chunk_dir: concate_audio.combine_audio_files_directory(
+            str(chunk_dir), str(work_dir / "combined.wav"))
+        benchmarks[f"combine_audio_files_with_random_pause[{length}s]"] = lambda chunk_dir=chunk_dir: concate_audio.combine_audio_files_with_random_pause(
+            str(chunk_dir), str(work_dir / "combined_pause.wav"))
+        benchmarks[f"segment_text_by_word_length[{length}s]"] = lambda word_segments=word_segments: generate_subtitles.segment_text_by_word_length(
+            word_segments)
+        benchmarks[f"create_clip_with_matching_audio[{length}s]"] = lambda sine=sine, clip=clip: random_sample_clip.create_clip_with_matching_audio(
+            str(background), str(sine), str(clip), temp_dir=str(work_dir))
+        benchmarks[f"add_subtitles_to_video[{length}s]"] = lambda clip=clip, captions=captions: generate_subtitles.add_subtitles_to_video(
+            str(clip), str(work_dir / "captioned.mp4"), captions, temp_dir=str(work_dir))
+        benchmarks[f"add_subtitles_to_video_pillow[{length}s]"] = lambda clip=clip, captions=captions: generate_subtitles.add_subtitles_to_video(
+            str(clip), str(work_dir / "captioned_pillow.mp4"), captions, temp_dir=str(work_dir), renderer="pillow")
+        benchmarks[f"add_subtitles_to_video_ass[{length}s]"] = lambda clip=clip, captions=captions: generate_subtitles.add_subtitles_to_video(
+            str(clip), str(work_dir / "captioned_ass.mp4"), captions, temp_dir=str(work_dir), renderer="ass")
+        benchmarks[f"pipeline_asr_stubbed[{length}s]"] = lambda sine=sine, length=length: run_stubbed_pipeline(
+            utils, generate_subtitles, sine, background, work_dir / "pipeline.mp4", length)
+
+    benchmarks["crop_transparent"] = lambda: thumbnail.crop_transparent(str(png), str(work_dir / "cropped.png"))
+    text_items = []
+    if font:
+        text_items = [
+            {"text": "r/benchmarks", "color": (255, 255, 255), "size": 90, "font": font},
+            {"text": "synthetic story", "color": (255, 215, 0), "size": 90, "font": font},
+        ]
+    benchmarks["create_thumbnail"] = lambda: thumbnail.create_thumbnail(str(png), text_items, str(work_dir / "thumbnail.png"))
+
+    return benchmarks
+
+
+def run_stubbed_pipeline(utils_module, generate_subtitles_module, audio: Path, background: Path, output: Path, length: int) -> None:
+    """Run generate_video_with_subtitles with transcription replaced by a fake transcript."""
+    transcript = fake_transcript(length)
+    original = generate_subtitles_module.transcribe_and_align
+    generate_subtitles_module.transcribe_and_align = lambda *args, **kwargs: transcript
+    try:
+        utils_module.generate_video_with_subtitles(
+            str(audio), str(background), SWEAR_WORDS, str(output), use_transcript_cache=False)
+    finally:
+        generate_subtitles_module.transcribe_and_align = original
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any]) -> None:
+    """Print the change in median time of every benchmark against a baseline run."""
+    print(f"\n{'benchmark':<50} {'baseline':>10} {'current':>10} {'change':>8}")
+    for name, result in results["benchmarks"].items():
+        before = baseline["benchmarks"].get(name)
+        if not before or "median" not in before or "median" not in result:
+            continue
+        change = (result["median"] - before["median"]) / before["median"] * 100
+        print(f"{name:<50} {before['median']:>10.3f} {result['median']:>10.3f} {change:>+7.1f}%")
+
+
+def main(args: List[str]) -> None:
+    parser = argparse.ArgumentParser(description='Benchmark the pipeline on synthetic media')
+    parser.add_argument('--output', default='bench_output.json', help='file to write the results to (default: bench_output.json)')
+    parser.add_argument('--compare', default='', help='results of an earlier run to compare against')
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per benchmark (default: 3)')
+    parser.add_argument('--lengths', type=int, nargs='+', default=DEFAULT_LENGTHS, help='narration lengths in seconds (default: 10 60 300)')
+    parser.add_argument('--filter', default='', help='only run benchmarks whose name contains this text')
+    parser.add_argument('--font', default='', help='TrueType font for the thumbnail text (default: no text)')
+    parser.add_argument('--keep', action='store_true', help='keep the generated media')
+    args = parser.parse_args(args)
+
+    random.seed(0)
+    work_dir = Path(tempfile.mkdtemp(prefix="bench_"))
+    results = {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "repeat": args.repeat,
+        "lengths": args.lengths,
+        "benchmarks": {},
+    }
+
+    try:
+        benchmarks = build_benchmarks(work_dir, args.lengths, args.font or None)
+        for name, func in benchmarks.items():
+            if args.filter and args.filter not in name:
+                continue
+            try:
+                result = time_call(func, args.repeat, setup=lambda: random.seed(0))
+                print(f"{name:<50} min {result['min']:.3f}s  median {result['median']:.3f}s")
+            except Exception as e:
+                result = {"skipped": f"{type(e).__name__}: {e}"}
+                print(f"{name:<50} skipped ({result['skipped']})")
+            results["benchmarks"][name] = result
+    finally:
+        if not args.keep:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            compare(results, json.load(f))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,74 @@
+import re
+
+from ..utils.caption_segmenter import segment_captions
+from ..utils.word_transcript import WordTranscript
+from ..video.ass_subtitles import caption_style, escape_ass_text, format_ass_timestamp, highlight_lines, karaoke_text, write_ass_file
+
+
+def test_format_ass_timestamp():
+    assert format_ass_timestamp(0) == "0:00:00.00"
+    assert format_ass_timestamp(3723.456) == "1:02:03.46"
+    assert format_ass_timestamp(59.999) == "0:01:00.00"
+
+
+def test_escape_ass_text_keeps_override_characters_literal():
+    assert escape_ass_text(" {hi} there\nfriend ") == "\\{hi\\} there\\Nfriend"
+
+
+def test_write_ass_file_in_caption_style(tmp_path):
+    ass_path = tmp_path / "captions.ass"
+    write_ass_file([{"text": " hello there", "start": 0.5, "end": 1.25}], str(ass_path), (1920, 1080), caption_style(1920, 1080))
+
+    content = ass_path.read_text(encoding="utf-8")
+    assert "PlayResX: 1920\nPlayResY: 1080" in content
+    assert "Style: Caption,P052,80,&H00FFFFFF,&H00FFFFFF,&H00000000,&H00000000,-1,0,0,0,100,100,0,0,1,3,0,5,480,480,0,1" in content
+    assert content.endswith("Dialogue: 0,0:00:00.50,0:00:01.25,Caption,,0,0,0,,hello there\n")
+
+
+CAPTION = {
+    "text": "so I said",
+    "start": 1.0,
+    "end": 2.5,
+    "words": [
+        {"text": "so", "start": 1.0, "end": 1.2},
+        {"text": "I"},
+        {"text": "said", "start": 2.0, "end": 2.4},
+    ],
+}
+
+
+def test_karaoke_durations_cover_the_caption():
+    text = karaoke_text(CAPTION)
+
+    assert text == "{\\k20}so {\\k80}I {\\k50}said"
+    assert sum(int(tag) for tag in re.findall(r"\\k(\d+)", text)) == 150
+
+
+def test_highlight_has_one_line_per_spoken_word():
+    lines = highlight_lines(CAPTION)
+
+    assert lines == [
+        "Dialogue: 0,0:00:01.00,0:00:01.20,Caption,,0,0,0,,{\\1c&H0000FFFF&}so{\\r} I said\n",
+        "Dialogue: 0,0:00:01.20,0:00:02.00,Caption,,0,0,0,,so {\\1c&H0000FFFF&}I{\\r} said\n",
+        "Dialogue: 0,0:00:02.00,0:00:02.50,Caption,,0,0,0,,so I {\\1c&H0000FFFF&}said{\\r}\n",
+    ]
+
+
+def test_word_modes_fall_back_to_static_without_words(tmp_path):
+    ass_path = tmp_path / "captions.ass"
+    write_ass_file([{"text": "hi", "start": 0, "end": 1}, CAPTION], str(ass_path), (640, 360), caption_mode="karaoke")
+
+    content = ass_path.read_text(encoding="utf-8")
+    assert "Dialogue: 0,0:00:00.00,0:00:01.00,Caption,,0,0,0,,hi\n" in content
+    assert "Style: Caption,P052,80,&H0000FFFF,&H00FFFFFF," in content
+
+
+def test_word_modes_write_captions_starting_with_unaligned_words(tmp_path):
+    ass_path = tmp_path / "captions.ass"
+    words = [{"text": "42"}, {"text": "dogs", "start": 0.5, "end": 0.9}, {"text": "barked", "start": 1.0, "end": 1.4}, {"text": "7"}]
+    words = WordTranscript.from_segments(words).fill_missing_times().to_segments()
+    captions = list(segment_captions(words, max_words=2, keep_words=True))
+
+    for caption_mode in ("static", "highlight", "karaoke"):
+        write_ass_file(captions, str(ass_path), (640, 360), caption_mode=caption_mode)
+        assert ass_path.read_text().count("Dialogue:") >= 2
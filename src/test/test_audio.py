@@ -4,10 +4,12 @@ import pytest
 from pydub import AudioSegment
 from pyttsx3 import init
 import shutil
+import wave
 from ..audio.concate_audio import (
     get_sorted_audio_files,
     combine_audio_files_directory,
     combine_audio_files_with_random_pause,
+    concatenate_wav_files,
 )
 
 
@@ -58,4 +60,57 @@ def test_combine_audio_files_with_random_pause(audio_files_directory):
     assert os.path.isfile(output_file)
 
 
+def write_wav(path, channels, frame_rate, frames, sample=b'\x01\x00'):
+    with wave.open(path, 'wb') as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(2)
+        wav.setframerate(frame_rate)
+        wav.writeframes(sample * channels * frames)
+
+
+def test_concatenate_wav_files_converts_to_common_format(tmp_path):
+    first = str(tmp_path / 'first.wav')
+    second = str(tmp_path / 'second.wav')
+    output = str(tmp_path / 'combined.wav')
+    write_wav(first, 1, 16000, 16000)
+    write_wav(second, 2, 8000, 8000)
+
+    concatenate_wav_files([first, second], output, pause_range_ms=(500, 500))
+
+    with wave.open(output, 'rb') as combined:
+        assert combined.getnchannels() == 2
+        assert combined.getframerate() == 16000
+        # first file, pause, then the second file resampled to 16 kHz
+        assert combined.getnframes() == pytest.approx(16000 + 8000 + 16000, abs=1)
+
+
+def test_concatenate_wav_files_keeps_order_when_decoding_in_parallel(tmp_path):
+    audio_files = []
+    for i in range(6):
+        audio_file = str(tmp_path / f'track_{i}.wav')
+        # the odd tracks are mono and have to be converted to stereo
+        write_wav(audio_file, 2 if i % 2 == 0 else 1, 8000, 100, sample=bytes([i + 1, 0]))
+        audio_files.append(audio_file)
+    output = str(tmp_path / 'combined.wav')
+
+    concatenate_wav_files(audio_files, output, workers=3, max_in_flight=2)
+
+    with wave.open(output, 'rb') as combined:
+        frames = combined.readframes(combined.getnframes())
+    first_samples = [frames[i * 400] for i in range(6)]
+    assert first_samples == [1, 2, 3, 4, 5, 6]
+
+
+def test_combine_audio_files_directory_writes_empty_wav_for_empty_directory(tmp_path):
+    directory = tmp_path / 'empty'
+    directory.mkdir()
+    output = str(tmp_path / 'combined.wav')
+
+    combined_audio = combine_audio_files_directory(str(directory), output)
+
+    assert len(combined_audio) == 0
+    with wave.open(output, 'rb') as combined:
+        assert combined.getnframes() == 0
+
+
 # Additional tests can be added as needed
@@ -0,0 +1,45 @@
+import numpy as np
+
+from ..video.caption_renderer import CaptionStyle, blend, caption_filter, load_font, render_caption, wrap_text
+
+
+STYLE = CaptionStyle(fontsize=20, stroke_width=2)
+
+
+def test_wrap_text_fits_lines_to_width():
+    font = load_font(STYLE.font, STYLE.fontsize)
+    wrapped = wrap_text("the quick brown fox jumps over the lazy dog", font, 100)
+
+    assert wrapped.replace("\n", " ") == "the quick brown fox jumps over the lazy dog"
+    assert all(font.getlength(line) <= 100 for line in wrapped.split("\n") if " " in line)
+
+
+def test_caption_is_rendered_once_per_text_and_style():
+    first = render_caption("hello there", STYLE, 200)
+
+    assert render_caption("hello there", STYLE, 200) is first
+    premultiplied, alpha = first
+    assert premultiplied.shape[:2] == alpha.shape[:2] and alpha.shape[2] == 1
+    assert alpha.max() == 255 and alpha.min() == 0
+
+
+def test_blend_matches_alpha_compositing_and_crops():
+    frame = np.full((4, 4, 3), 100, dtype=np.uint8)
+    alpha = np.array([[[255], [0]], [[128], [255]]], dtype=np.uint16)
+    color = np.full((2, 2, 3), 200, dtype=np.uint16)
+
+    out = blend(frame, color * alpha, alpha, 3, 3)
+
+    assert out[3, 3].tolist() == [200, 200, 200]
+    assert (out[:3] == 100).all()
+    assert blend(frame, color * alpha, alpha, 1, 1)[2, 1].tolist() == [150, 150, 150]
+    assert (frame == 100).all()
+
+
+def test_filter_draws_only_while_a_caption_is_shown():
+    frame = np.zeros((120, 320, 3), dtype=np.uint8)
+    draw = caption_filter([{"text": "hi", "start": 1.0, "end": 2.0}], (320, 120), STYLE)
+
+    assert draw(lambda t: frame, 0.5) is frame
+    assert draw(lambda t: frame, 2.0) is frame
+    assert draw(lambda t: frame, 1.5).any()
@@ -0,0 +1,58 @@
+import argparse
+
+import pytest
+
+from ..utils.caption_segmenter import CaptionSegmenter, add_caption_arguments, rules_from_args, segment_captions
+
+
+def words(*items):
+    return [{"text": text, "start": start, "end": end} for text, start, end in items]
+
+
+WORDS = words(("I", 0.0, 0.1), ("never", 0.2, 0.5), ("said", 0.6, 0.9), ("that", 1.0, 1.2),
+              ("Whatever", 2.5, 3.0), ("you", 3.1, 3.2), ("say", 3.3, 3.6))
+
+
+def test_word_count_grouping():
+    assert [caption["text"] for caption in segment_captions(WORDS, max_words=3)] == ["I never said", "that Whatever you", "say"]
+
+
+def test_pause_chars_and_duration_rules():
+    assert [caption["text"] for caption in segment_captions(WORDS, max_words=10, max_pause_ms=500)] == [
+        "I never said that", "Whatever you say"]
+    assert [caption["text"] for caption in segment_captions(WORDS, max_words=10, max_chars=12)] == [
+        "I never said", "that", "Whatever you", "say"]
+    captions = list(segment_captions(WORDS, max_words=10, max_duration=1.0, keep_words=True))
+    assert [(caption["start"], caption["end"]) for caption in captions] == [(0.0, 0.9), (1.0, 1.2), (2.5, 3.2), (3.3, 3.6)]
+    assert captions[0]["words"] == WORDS[:3]
+
+
+def test_captions_are_emitted_as_words_arrive():
+    segmenter = CaptionSegmenter(max_words=2)
+
+    assert segmenter.push(WORDS[0]) is None
+    assert segmenter.push(WORDS[1]) is None
+    assert segmenter.push(WORDS[2]) == {"text": "I never", "start": 0.0, "end": 0.5}
+    assert segmenter.flush() == {"text": "said", "start": 0.6, "end": 0.9}
+    assert segmenter.flush() is None
+
+
+def test_words_are_checked_as_they_arrive():
+    captions = segment_captions(WORDS + ["x"], max_words=5)
+
+    assert next(captions)["text"] == "I never said that Whatever"
+    with pytest.raises(TypeError):
+        next(captions)
+    with pytest.raises(ValueError):
+        list(segment_captions([{"text": "x"}]))
+    with pytest.raises(ValueError):
+        CaptionSegmenter(max_words=0)
+
+
+def test_rules_from_args_leave_out_rules_without_a_limit():
+    parser = argparse.ArgumentParser()
+    add_caption_arguments(parser)
+
+    assert rules_from_args(parser.parse_args([])) == {"max_words": 5}
+    assert rules_from_args(parser.parse_args(["--caption_max_chars", "20", "--caption_max_pause_ms", "400"])) == {
+        "max_words": 5, "max_chars": 20, "max_pause_ms": 400.0}
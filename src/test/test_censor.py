@@ -0,0 +1,49 @@
+import re
+
+from ..utils.censor import CensorEngine, Replacer, get_censor_engine, trie_pattern
+
+
+WORDS = ["ass", "asshole", "damn", "son of a bitch", "shit"]
+
+
+def legacy_mask(words, text):
+    pattern = re.compile(r"\b(?:{})\b".format("|".join(re.escape(word) for word in set(words))), flags=re.IGNORECASE)
+    return pattern.sub(lambda match: match.group(0)[0] + "*" * (len(match.group(0)) - 2) + match.group(0)[-1], text)
+
+
+def test_trie_pattern_matches_whole_words_only():
+    pattern = re.compile(r"\b(?:{})\b".format(trie_pattern(WORDS)))
+
+    assert [match.group(0) for match in pattern.finditer("ass asshole assholes bass damn")] == ["ass", "asshole", "damn"]
+
+
+def test_mask_matches_legacy_regex():
+    engine = CensorEngine(WORDS)
+    for text in ["What an ASSHOLE, damn it.", "Bass and class", "you son of a bitch!", "Shit, shitty", ""]:
+        assert engine.mask(text) == legacy_mask(WORDS, text)
+
+
+def test_mask_segments_masks_copies():
+    word_segments = [
+        {"text": "Damn,", "start": 0.0, "end": 0.3},
+        {"text": "that", "start": 0.4, "end": 0.6},
+        {"text": "asshole", "start": 0.7, "end": 1.1},
+    ]
+    masked = get_censor_engine(WORDS).mask_segments(word_segments)
+
+    assert [segment["text"] for segment in masked] == ["D**n,", "that", "a*****e"]
+    assert masked[0]["start"] == 0.0
+    assert word_segments[0]["text"] == "Damn,"
+
+
+def test_engine_is_shared_and_handles_empty_list():
+    assert get_censor_engine(["damn", "ass"]) is get_censor_engine(["ass", "damn", "ass"])
+    assert CensorEngine([]).mask("damn") == "damn"
+    assert not CensorEngine([]).is_swear("damn")
+
+
+def test_replacer_prefers_longest_match_in_one_scan():
+    replacer = Replacer({"ass": "butt", "asshole": "jerk", "butt": "bottom"})
+
+    assert replacer.replace("asshole, ass, classic") == "jerk, butt, clbuttic"
+    assert Replacer({}).replace("ass") == "ass"
@@ -0,0 +1,26 @@
+from ..audio.ffmpeg_censor import merge_segments, censor_filter
+
+
+def test_merge_segments_sorts_merges_and_drops_empty():
+    segments = [
+        {"text": "b", "start": 2.0, "end": 2.5},
+        {"text": "a", "start": 0.5, "end": 1.0},
+        {"text": "a", "start": 0.8, "end": 1.2},
+        {"text": "c", "start": 3.0, "end": 3.0},
+    ]
+    assert merge_segments(segments) == [(0.5, 1.2), (2.0, 2.5)]
+
+
+def test_censor_filter_hard_cut():
+    segments = [{"start": 1.0, "end": 1.5}, {"start": 2.0, "end": 2.25}]
+    assert censor_filter(segments) == (
+        "asetnsamples=n=64:p=0,"
+        "volume=0:enable='between(t,1.000000,1.500000)+between(t,2.000000,2.250000)'"
+    )
+
+
+def test_censor_filter_fade_and_empty():
+    assert censor_filter([]) == "anull"
+    fade = censor_filter([{"start": 1.0, "end": 1.5}], fade_ms=20)
+    assert "clip(max(1.000000-t,t-1.500000)/0.020000,0,1)" in fade
+    assert fade.endswith(":eval=frame")
@@ -0,0 +1,31 @@
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from ..utils.inference import check_compute_type
+
+
+def test_compute_types_are_checked_against_the_device():
+    check_compute_type("int8", "cpu")
+    check_compute_type("float16", "cuda")
+    check_compute_type(None, "cpu")
+
+    with pytest.raises(ValueError):
+        check_compute_type("int8", "cuda")
+    with pytest.raises(ValueError):
+        check_compute_type("float16", "cpu")
+
+
+def test_int8_quantizes_whisper_linear_layers():
+    whisper = pytest.importorskip("whisper")
+    pytest.importorskip("whisperx")
+    from ..utils.model_registry import quantize_asr_model
+
+    dims = whisper.model.ModelDimensions(
+        n_mels=80, n_audio_ctx=16, n_audio_state=8, n_audio_head=2, n_audio_layer=1,
+        n_vocab=64, n_text_ctx=8, n_text_state=8, n_text_head=2, n_text_layer=1)
+    model = quantize_asr_model(whisper.model.Whisper(dims))
+
+    names = [module._get_name() for module in model.modules()]
+    assert "DynamicQuantizedLinear" in names
+    assert not any(isinstance(module, torch.nn.Linear) for module in model.modules())
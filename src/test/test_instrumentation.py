@@ -0,0 +1,79 @@
+import json
+import time
+import threading
+
+import pytest
+
+from ..utils import instrumentation
+
+
+@pytest.fixture
+def metrics_files(tmp_path, monkeypatch):
+    metrics_file = tmp_path / "metrics.jsonl"
+    prom_file = tmp_path / "metrics.prom"
+    monkeypatch.setattr(instrumentation, "PIPELINE_METRICS_FILE", str(metrics_file))
+    monkeypatch.setattr(instrumentation, "PIPELINE_METRICS_PROM_FILE", str(prom_file))
+    monkeypatch.setattr(instrumentation, "_totals", {})
+    return metrics_file, prom_file
+
+
+def test_measure_writes_json_line(metrics_files):
+    metrics_file, _ = metrics_files
+
+    with instrumentation.measure("pipeline.transcribe", job="story_1"):
+        sum(range(10000))
+
+    record = json.loads(metrics_file.read_text().splitlines()[0])
+    assert record["stage"] == "pipeline.transcribe"
+    assert record["job"] == "story_1"
+    assert record["ok"] is True
+    for key in ("wall_seconds", "cpu_seconds", "peak_rss_bytes", "read_bytes", "write_bytes"):
+        assert record[key] >= 0
+
+
+def test_failures_are_recorded(metrics_files):
+    metrics_file, prom_file = metrics_files
+
+    @instrumentation.instrumented("youtube.upload")
+    def upload():
+        raise RuntimeError("quota exceeded")
+
+    with pytest.raises(RuntimeError):
+        upload()
+
+    assert json.loads(metrics_file.read_text())["ok"] is False
+    assert 'pipeline_stage_failures_total{stage="youtube.upload"' in prom_file.read_text()
+
+
+def test_cpu_time_is_charged_to_the_measuring_thread(metrics_files):
+    metrics_file, _ = metrics_files
+    stop = threading.Event()
+
+    def spin():
+        while not stop.is_set():
+            pass
+
+    busy = threading.Thread(target=spin)
+    busy.start()
+    try:
+        with instrumentation.measure("tts.elevenlabs"):
+            time.sleep(0.2)
+    finally:
+        stop.set()
+        busy.join()
+
+    record = json.loads(metrics_file.read_text())
+    assert record["cpu_seconds"] < 0.1
+
+
+def test_rss_sampler_is_shared(metrics_files):
+    pytest.importorskip("psutil")
+
+    with instrumentation.measure("pipeline.render"):
+        pass
+    sampler = instrumentation._sampler
+    with instrumentation.measure("pipeline.render"):
+        pass
+
+    assert instrumentation._sampler is sampler
+    assert sampler.is_alive()
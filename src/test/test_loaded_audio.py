@@ -0,0 +1,40 @@
+import numpy as np
+from pydub import AudioSegment
+
+from ..audio.loaded_audio import LoadedAudio, to_asr_samples
+
+
+def make_tone(path, frame_rate=44100, channels=2, seconds=1.0):
+    t = np.arange(int(frame_rate * seconds)) / frame_rate
+    tone = (0.5 * np.sin(2 * np.pi * 440 * t) * 32767).astype(np.int16)
+    raw = np.repeat(tone, channels).tobytes()
+    AudioSegment(raw, sample_width=2, frame_rate=frame_rate, channels=channels).export(path, format="wav")
+
+
+def test_asr_samples_are_16k_mono_float(tmp_path):
+    path = tmp_path / "tone.wav"
+    make_tone(path)
+
+    samples = to_asr_samples(AudioSegment.from_file(path))
+
+    assert samples.dtype == np.float32
+    assert len(samples) == 16000
+    assert abs(np.abs(samples[1000:-1000]).max() - 0.5) < 0.01
+
+
+def test_file_is_decoded_once_and_shared(tmp_path, monkeypatch):
+    path = tmp_path / "tone.wav"
+    make_tone(path, frame_rate=16000, channels=1)
+    calls = []
+    from_file = AudioSegment.from_file
+    monkeypatch.setattr(AudioSegment, "from_file", lambda *args, **kwargs: calls.append(args) or from_file(*args, **kwargs))
+
+    audio = LoadedAudio(path)
+    assert not calls
+    audio.asr_samples
+    audio.segment
+    audio.asr_samples
+
+    assert len(calls) == 1
+    assert audio.duration == 1.0
+    assert np.allclose(audio.asr_samples * 32768, audio.segment.get_array_of_samples())
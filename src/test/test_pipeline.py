@@ -0,0 +1,67 @@
+import pytest
+
+from ..utils.pipeline import Pipeline, Stage
+
+
+def build_pipeline(directory, calls, fail_on=None, params=None):
+    def make_stage_function(name):
+        def run(artifacts, output):
+            calls.append(name)
+            if name == fail_on:
+                raise RuntimeError(f"{name} failed")
+            upstream = "".join(path.read_text() for path in artifacts.values())
+            output.write_text(upstream + name)
+        return run
+
+    return Pipeline(directory, [
+        Stage("transcribe", make_stage_function("transcribe"), "transcript.txt", params=params or {}),
+        Stage("mask", make_stage_function("mask"), "masked.txt", deps=("transcribe",)),
+        Stage("caption", make_stage_function("caption"), "captioned.txt", deps=("mask",)),
+    ])
+
+
+def test_runs_every_stage_in_order(tmp_path):
+    calls = []
+    output = build_pipeline(tmp_path, calls).run()
+
+    assert calls == ["transcribe", "mask", "caption"]
+    assert output.read_text() == "transcribemaskcaption"
+
+
+def test_resumes_from_failed_stage(tmp_path):
+    calls = []
+    with pytest.raises(RuntimeError):
+        build_pipeline(tmp_path, calls, fail_on="caption").run()
+
+    calls.clear()
+    build_pipeline(tmp_path, calls).run()
+    assert calls == ["caption"]
+
+
+def test_changed_params_invalidate_downstream(tmp_path):
+    calls = []
+    build_pipeline(tmp_path, calls, params={"model": "medium"}).run()
+
+    calls.clear()
+    build_pipeline(tmp_path, calls, params={"model": "medium"}).run()
+    assert calls == []
+
+    build_pipeline(tmp_path, calls, params={"model": "small"}).run()
+    assert calls == ["transcribe", "mask", "caption"]
+
+
+def test_missing_artifact_reruns_stage_and_downstream(tmp_path):
+    calls = []
+    pipeline = build_pipeline(tmp_path, calls)
+    pipeline.run()
+    pipeline.artifact_path("mask").unlink()
+    pipeline.artifact_path("caption").unlink()
+
+    calls.clear()
+    build_pipeline(tmp_path, calls).run()
+    assert calls == ["mask", "caption"]
+
+
+def test_unknown_dependency(tmp_path):
+    with pytest.raises(ValueError):
+        Pipeline(tmp_path, [Stage("mask", lambda artifacts, output: None, "masked.txt", deps=("transcribe",))])
@@ -0,0 +1,39 @@
+import numpy as np
+
+from ..audio.silence import segment_frames, silence_frames, silence_raw_data
+
+
+def test_segment_frames_merges_and_clips():
+    segments = [
+        {"start": 0.5, "end": 0.7},
+        {"start": 0.1, "end": 0.3},
+        {"start": 0.25, "end": 0.4},
+        {"start": 0.9, "end": 2.0},
+        {"start": 0.6, "end": 0.6},
+    ]
+    intervals = segment_frames(segments, frame_rate=100, frame_count=100)
+
+    assert intervals.tolist() == [[10, 40], [50, 70], [90, 100]]
+
+
+def test_silence_raw_data_zeroes_only_segments():
+    samples = np.arange(1, 201, dtype=np.int16).reshape(-1, 2)
+    segments = [{"start": 0.1, "end": 0.2}, {"start": 0.15, "end": 0.3}]
+
+    silenced = np.frombuffer(
+        silence_raw_data(samples.tobytes(), 2, 2, 100, segments), dtype=np.int16).reshape(-1, 2)
+
+    assert silenced.shape == samples.shape
+    assert (silenced[10:30] == 0).all()
+    assert (silenced[:10] == samples[:10]).all()
+    assert (silenced[30:] == samples[30:]).all()
+
+
+def test_fade_lowers_neighbouring_frames():
+    samples = np.full((100, 1), 1000, dtype=np.int16)
+    silence_frames(samples, np.array([[40, 60]]), fade_frames=10)
+
+    assert (samples[40:60] == 0).all()
+    assert (samples[:30] == 1000).all() and (samples[70:] == 1000).all()
+    assert (np.diff(samples[30:40, 0]) < 0).all()
+    assert (np.diff(samples[60:70, 0]) > 0).all()
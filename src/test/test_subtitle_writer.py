@@ -0,0 +1,47 @@
+import io
+
+import pytest
+
+from ..video.subtitle_writer import SubtitleWriter, format_timestamp, write_subtitles
+
+
+SEGMENTS = [
+    {"text": " Hello there.", "start": 0.5, "end": 1.2345},
+    {"text": "General Kenobi!", "start": 3661.0, "end": 3662.9996},
+]
+
+
+def test_format_timestamp_keeps_milliseconds():
+    assert format_timestamp(1.2345) == "00:00:01,234"
+    assert format_timestamp(3662.9996, ".") == "01:01:03.000"
+
+
+def test_srt_and_vtt(tmp_path):
+    write_subtitles(iter(SEGMENTS), str(tmp_path / "captions.srt"))
+    write_subtitles(iter(SEGMENTS), str(tmp_path / "captions.vtt"))
+
+    assert (tmp_path / "captions.srt").read_text(encoding="utf-8") == (
+        "1\n00:00:00,500 --> 00:00:01,234\nHello there.\n\n"
+        "2\n01:01:01,000 --> 01:01:03,000\nGeneral Kenobi!\n\n"
+    )
+    assert (tmp_path / "captions.vtt").read_text(encoding="utf-8") == (
+        "WEBVTT\n\n"
+        "00:00:00.500 --> 00:00:01.234\nHello there.\n\n"
+        "01:01:01.000 --> 01:01:03.000\nGeneral Kenobi!\n\n"
+    )
+
+
+def test_sink_writes_segments_as_they_are_sent():
+    output = io.StringIO()
+    sink = SubtitleWriter(output, "ass", play_res=(640, 360)).sink()
+    for segment in SEGMENTS:
+        sink.send(segment)
+    sink.close()
+
+    assert "PlayResX: 640" in output.getvalue()
+    assert output.getvalue().endswith("Dialogue: 0,1:01:01.00,1:01:03.00,Caption,,0,0,0,,General Kenobi!\n")
+
+
+def test_unknown_format_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        write_subtitles(SEGMENTS, str(tmp_path / "captions.txt"))
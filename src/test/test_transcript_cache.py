@@ -0,0 +1,57 @@
+import os
+import time
+
+import pytest
+
+from ..utils.transcript_cache import TranscriptCache
+
+
+@pytest.fixture
+def audio_file(tmp_path):
+    file_path = tmp_path / "audio.wav"
+    file_path.write_bytes(b"RIFF" + os.urandom(2048))
+    return file_path
+
+
+def test_key_depends_on_content_and_params(tmp_path, audio_file):
+    cache = TranscriptCache(tmp_path / "cache")
+    key = cache.make_key(audio_file, {"model_type": "medium"})
+
+    assert key == cache.make_key(audio_file, {"model_type": "medium"})
+    assert key != cache.make_key(audio_file, {"model_type": "small"})
+
+    audio_file.write_bytes(b"RIFF" + os.urandom(2048))
+    assert key != cache.make_key(audio_file, {"model_type": "medium"})
+
+
+def test_round_trip(tmp_path, audio_file):
+    cache = TranscriptCache(tmp_path / "cache")
+    key = cache.make_key(audio_file, {"model_type": "medium"})
+    transcript = {
+        "segments": [{"text": "hello there", "start": 0.0, "end": 1.2}],
+        "word_segments": [{"text": "hello", "start": 0.0, "end": 0.5}, {"text": "there", "start": 0.6, "end": 1.2}],
+    }
+
+    assert cache.get(key) is None
+    cache.put(key, transcript)
+    assert cache.get(key) == transcript
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = TranscriptCache(tmp_path / "cache", max_bytes=10 ** 9)
+    value = {"text": os.urandom(4096).hex()}
+
+    for key in ("a", "b", "c"):
+        cache.put(key, value)
+    old = time.time() - 100
+    os.utime(cache.directory / "a.json.gz", (old, old))
+    os.utime(cache.directory / "b.json.gz", (old - 10, old - 10))
+    cache.get("a")
+
+    entry_size = (cache.directory / "c.json.gz").stat().st_size
+    cache.max_bytes = entry_size * 2
+    cache.evict()
+
+    assert cache.get("b") is None
+    assert cache.get("a") == value
+    assert cache.get("c") == value
@@ -0,0 +1,81 @@
+import numpy as np
+
+from ..utils.transcript_chunks import find_split_points, plan_chunks, split_script, stitch_transcripts
+
+
+def test_split_points_land_in_pauses():
+    sample_rate = 1000
+    rng = np.random.default_rng(0)
+    audio = rng.uniform(-0.5, 0.5, 100 * sample_rate).astype(np.float32)
+    # pauses at 27s and 61s
+    audio[26500:27500] = 0
+    audio[60500:61500] = 0
+
+    splits = find_split_points(audio, sample_rate, chunk_seconds=30, search_seconds=5)
+
+    assert len(splits) == 2
+    assert abs(splits[0] - 27) < 0.5
+    assert abs(splits[1] - 61) < 0.5
+
+
+def test_plan_chunks_overlap_and_own_the_timeline():
+    chunks = plan_chunks(100.0, [30.0, 60.0], overlap_seconds=1.0)
+
+    assert [(chunk.own_start, chunk.own_end) for chunk in chunks] == [(0.0, 30.0), (30.0, 60.0), (60.0, 100.0)]
+    assert [(chunk.start, chunk.end) for chunk in chunks] == [(0.0, 31.0), (29.0, 61.0), (59.0, 100.0)]
+
+
+def test_stitch_offsets_times_and_drops_boundary_duplicates():
+    chunks = plan_chunks(20.0, [10.0], overlap_seconds=1.0)
+    first = {
+        "segments": [{"text": "hello there", "start": 8.0, "end": 10.2}],
+        "word_segments": [
+            {"text": "hello", "start": 8.0, "end": 9.0},
+            {"text": "there", "start": 9.6, "end": 10.2},
+            {"text": "general", "start": 10.5, "end": 11.0},
+        ],
+    }
+    # the second chunk starts at 9s, so its times are 9s early
+    second = {
+        "segments": [
+            {"text": "there", "start": 0.6, "end": 1.2},
+            {"text": "general", "start": 1.5, "end": 2.0},
+        ],
+        "word_segments": [
+            {"text": "there", "start": 0.6, "end": 1.2},
+            {"text": "general", "start": 1.5, "end": 2.0},
+            {"text": "42"},
+        ],
+    }
+
+    result = stitch_transcripts(chunks, [first, second])
+
+    assert [word["text"] for word in result["word_segments"]] == ["hello", "there", "general", "42"]
+    assert result["word_segments"][2]["start"] == 10.5
+    assert [segment["text"] for segment in result["segments"]] == ["hello there", "general"]
+
+
+def test_split_script_matches_sentences_to_pauses():
+    sample_rate = 1000
+    rng = np.random.default_rng(0)
+    audio = rng.uniform(-0.5, 0.5, 90 * sample_rate).astype(np.float32)
+    # three sentences of equal length, with a pause after each of the first two
+    audio[29000:31000] = 0
+    audio[59000:61000] = 0
+    sentence = " ".join(["word"] * 20)
+    script = f"{sentence}. {sentence}! {sentence}."
+
+    segments = split_script(script, audio, sample_rate, chunk_seconds=30, overlap_seconds=2.0)
+
+    assert [segment["text"] for segment in segments] == [f"{sentence}.", f"{sentence}!", f"{sentence}."]
+    assert segments[0]["start"] == 0.0 and segments[-1]["end"] == 90.0
+    # split in the pauses, reaching 2s past them
+    assert 27 <= segments[1]["start"] <= 29 and 61 <= segments[1]["end"] <= 63
+
+
+def test_split_script_keeps_short_audio_in_one_segment():
+    audio = np.ones(5000, dtype=np.float32)
+
+    segments = split_script("One. Two.", audio, 1000, chunk_seconds=30)
+
+    assert segments == [{"text": "One. Two.", "start": 0.0, "end": 5.0}]
@@ -0,0 +1,38 @@
+import numpy as np
+
+from ..audio.vad import keep_regions, restore_time, restore_transcript, speech_regions
+
+
+def test_long_pauses_are_cut_and_short_ones_kept():
+    sample_rate = 1000
+    rng = np.random.default_rng(0)
+    audio = np.zeros(10 * sample_rate, dtype=np.float32)
+    # speech from 1-3s with a short pause at 2s, and from 6-7s
+    audio[1000:3000] = rng.uniform(-0.5, 0.5, 2000)
+    audio[1900:2100] = 0
+    audio[6000:7000] = rng.uniform(-0.5, 0.5, 1000)
+
+    regions = speech_regions(audio, sample_rate, pad_seconds=0.1)
+
+    assert len(regions) == 2
+    assert abs(regions[0][0] - 0.9) < 0.05 and abs(regions[0][1] - 3.1) < 0.05
+    assert abs(regions[1][0] - 5.9) < 0.05 and abs(regions[1][1] - 7.1) < 0.05
+    assert abs(len(keep_regions(audio, regions, sample_rate)) - 3400) < 100
+    assert speech_regions(np.zeros(1000, dtype=np.float32), sample_rate) == []
+
+
+def test_times_are_restored_to_the_original_audio():
+    regions = [(1.0, 3.0), (6.0, 7.0)]
+
+    assert restore_time(0.5, regions) == 1.5
+    assert restore_time(2.5, regions) == 6.5
+
+    result = restore_transcript({
+        "segments": [{"text": "a b", "start": 0.5, "end": 2.5, "words": [{"text": "a", "start": 0.5, "end": 1.0}]}],
+        "word_segments": [{"text": "a", "start": 0.5, "end": 1.0}, {"text": "42", "start": float("nan")}],
+    }, regions)
+
+    assert (result["segments"][0]["start"], result["segments"][0]["end"]) == (1.5, 6.5)
+    assert result["segments"][0]["words"][0]["end"] == 2.0
+    assert result["word_segments"][0]["start"] == 1.5
+    assert np.isnan(result["word_segments"][1]["start"])
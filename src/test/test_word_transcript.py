@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from ..utils.censor import CensorEngine
+from ..utils.word_transcript import WordTranscript
+
+
+WORD_SEGMENTS = [
+    {"text": "Damn,", "start": 0.0, "end": 0.3},
+    {"text": "that", "start": 0.4, "end": 0.6},
+    {"text": "damn", "start": 0.7, "end": 1.0},
+    {"text": "42"},
+    {"text": "dog", "start": 1.5, "end": 1.9},
+]
+
+
+def test_round_trip_and_shared_text_table():
+    words = WordTranscript.from_segments(WORD_SEGMENTS)
+
+    assert words.to_segments() == WORD_SEGMENTS
+    assert len(words.vocabulary) == 5
+    assert len(WordTranscript.from_segments(WORD_SEGMENTS * 100).vocabulary) == 5
+    assert words[2].text == "damn" and words[-1].end == 1.9
+    assert [word.text for word in words[1:3]] == ["that", "damn"]
+
+
+def test_mask_and_swear_mask_match_censor_engine():
+    engine = CensorEngine(["damn"])
+    words = WordTranscript.from_segments(WORD_SEGMENTS)
+
+    aligned = [segment for segment in WORD_SEGMENTS if "start" in segment]
+
+    assert words.mask(engine).select(~np.isnan(words.starts)).to_segments() == engine.mask_segments(aligned)
+    assert words.select(words.swear_mask(engine)).to_segments() == [
+        segment for segment in aligned if engine.is_swear(segment["text"])]
+
+
+def test_fill_missing_times_places_unaligned_words_between_neighbours():
+    words = WordTranscript.from_segments([{"text": "7"}] + WORD_SEGMENTS[1:3] + [{"text": "42"}])
+
+    # the filled words sit between their neighbours
+    assert words.fill_missing_times().starts.tolist() == [0.0, 0.4, 0.7, 1.0]
+    assert words.fill_missing_times().ends.tolist() == [0.4, 0.6, 1.0, 1.0]
+
+
+def test_checks_segments_in_one_pass():
+    with pytest.raises(TypeError):
+        WordTranscript.from_segments([{"text": "a", "start": 0, "end": 1}, "b"])
+    with pytest.raises(ValueError):
+        WordTranscript.from_segments([{"text": "a"}], require_times=True)
+
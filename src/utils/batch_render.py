@@ -0,0 +1,238 @@
+import os
+import csv
+import json
+import time
+import hashlib
+import traceback
+from dataclasses import dataclass, field
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Dict, Any, Optional
+
+import torch
+
+from src.utils import utils, model_registry, instrumentation
+from src.utils.inference import DEFAULT_OPTIONS
+from src.audio import audio_utils
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+# Rough resident memory of one worker holding a warm "medium" model
+WORKER_MEMORY_MB = 3072
+
+MANIFEST_FIELDS = ["audio_link", "vid_link", "video_output", "swear_word_list", "srtFilename", "script_file"]
+
+
+@dataclass
+class JobResult:
+    index: int
+    job: Dict[str, Any]
+    ok: bool
+    seconds: float
+    error: str = ""
+    traceback: str = field(default="", repr=False)
+
+
+def read_manifest(manifest_path: str) -> List[Dict[str, Any]]:
+    """
+    Read a batch manifest of render jobs.
+
+    The manifest is either a CSV file with a header row or a JSON Lines file with one
+    object per line. Each job needs 'audio_link', 'vid_link' and 'video_output' and may
+    set 'swear_word_list', 'srtFilename' and 'script_file' like the main.py arguments.
+
+    Args:
+        manifest_path (str): The path to the .csv or .jsonl manifest.
+
+    Returns:
+        List[Dict[str, Any]]: The jobs in manifest order.
+
+    Raises:
+        ValueError: If the manifest type is unknown or a job is missing a required field.
+    """
+    extension = os.path.splitext(manifest_path)[1].lower()
+    with open(manifest_path, 'r', encoding='utf-8', newline='') as f:
+        if extension == '.csv':
+            jobs = [dict(row) for row in csv.DictReader(f)]
+        elif extension in ('.jsonl', '.ndjson'):
+            jobs = [json.loads(line) for line in f if line.strip()]
+        else:
+            raise ValueError(f"Unsupported manifest type: {manifest_path}. Use .csv or .jsonl")
+
+    for i, job in enumerate(jobs):
+        for key in ("audio_link", "vid_link", "video_output"):
+            if not job.get(key):
+                raise ValueError(f"Job {i} in {manifest_path} is missing '{key}'")
+        unknown = set(job) - set(MANIFEST_FIELDS)
+        if unknown:
+            raise ValueError(f"Job {i} in {manifest_path} has unknown fields: {sorted(unknown)}")
+    return jobs
+
+
+def default_worker_count(threads_per_worker: int = 4) -> int:
+    """
+    Size the worker pool to the machine.
+
+    Each worker runs its own ASR model with several intra-op threads, so the pool is
+    limited both by the number of cores and by how many warm models fit in memory.
+
+    Args:
+        threads_per_worker (int, optional): Cores given to each worker. Defaults to 4.
+
+    Returns:
+        int: The number of worker processes to start.
+    """
+    workers = max(1, (os.cpu_count() or 1) // threads_per_worker)
+    if psutil is not None:
+        available_mb = psutil.virtual_memory().available // (1024 * 1024)
+        workers = min(workers, max(1, available_mb // WORKER_MEMORY_MB))
+    return workers
+
+
+def init_worker(
+        whisper_model: str,
+        threads: int,
+        preload_asr: bool,
+        compute_type: Optional[str],
+        model_cache_mb: Optional[int],
+        metrics_file: Optional[str],
+        prom_file: Optional[str]) -> None:
+    """
+    Set up a render worker process, for use as a ProcessPoolExecutor initializer.
+
+    Args:
+        whisper_model (str): The Whisper ASR model type to preload.
+        threads (int): The number of torch intra-op threads of the worker.
+        preload_asr (bool): Load the ASR model into the model registry before the first job.
+        compute_type (str, optional): The compute type of the preloaded ASR model.
+        model_cache_mb (int, optional): Memory budget of the worker's model registry in MB.
+        metrics_file (str, optional): The JSON lines file the worker appends measurements to.
+        prom_file (str, optional): The Prometheus text file of the worker. The worker's pid is
+            added to the name, as every worker keeps its own totals.
+    """
+    torch.set_num_threads(threads)
+    if model_cache_mb is not None:
+        model_registry.configure_model_registry(model_cache_mb)
+    if prom_file:
+        # each worker keeps its own totals, so it gets its own file
+        stem, extension = os.path.splitext(prom_file)
+        prom_file = f"{stem}.{os.getpid()}{extension}"
+    instrumentation.configure(metrics_file, prom_file)
+    if preload_asr:
+        model_registry.get_model_registry().get_asr_model(whisper_model, compute_type=compute_type)
+
+
+def _run_job(index: int, job: Dict[str, Any], options: Dict[str, Any]) -> JobResult:
+    started = time.perf_counter()
+    try:
+        if job.get("swear_word_list"):
+            swear_word_list = audio_utils.read_swear_word_file(job["swear_word_list"])
+        else:
+            swear_word_list = list(audio_utils.get_swear_word_list().keys())
+
+        script = ""
+        if job.get("script_file"):
+            with open(job["script_file"], 'r', encoding='utf-8') as f:
+                script = f.read()
+
+        if options.get("checkpoint_dir"):
+            # every job resumes from its own checkpoints
+            job_key = hashlib.sha1(os.path.abspath(job["video_output"]).encode()).hexdigest()[:12]
+            options = dict(options, checkpoint_dir=os.path.join(options["checkpoint_dir"], job_key))
+
+        utils.generate_video_with_subtitles(
+            job["audio_link"],
+            job["vid_link"],
+            swear_word_list,
+            job["video_output"],
+            job.get("srtFilename") or "",
+            script=script,
+            **options
+            )
+    except Exception as e:
+        return JobResult(index, job, False, time.perf_counter() - started, str(e), traceback.format_exc())
+    return JobResult(index, job, True, time.perf_counter() - started)
+
+
+def run_batch(
+        jobs: List[Dict[str, Any]],
+        workers: Optional[int] = None,
+        whisper_model: str = "medium",
+        model_cache_mb: Optional[int] = None,
+        **options) -> List[JobResult]:
+    """
+    Render a batch of jobs on a process pool.
+
+    Every worker loads the ASR model once when it starts and keeps it warm in the
+    model registry for all the jobs it runs. A failing job is recorded and does not
+    stop the batch.
+
+    Args:
+        jobs (List[Dict[str, Any]]): The jobs to render, as returned by read_manifest.
+        workers (int, optional): The number of worker processes. Sized to the machine if
+            not provided.
+        whisper_model (str, optional): The Whisper ASR model type. Defaults to "medium".
+        model_cache_mb (int, optional): Memory budget of each worker's model registry in MB.
+            Defaults to WHISPER_MODEL_CACHE_MB.
+        **options: Extra keyword arguments for utils.generate_video_with_subtitles.
+
+    Raises:
+        ValueError: If asr_workers is more than 1. The jobs already run in parallel, and a
+            worker cannot start a process pool of its own.
+
+    Returns:
+        List[JobResult]: One result per job, in manifest order.
+    """
+    if options.get("asr_workers", 1) > 1:
+        raise ValueError("asr_workers can't be used in a batch, the jobs already run on a process pool")
+    if workers is None:
+        workers = default_worker_count()
+    workers = max(1, min(workers, len(jobs)))
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    preload_asr = any(not job.get("script_file") for job in jobs)
+    options = dict(options, whisper_model=whisper_model)
+    compute_type = options.get("inference_options", DEFAULT_OPTIONS).compute_type
+
+    results = []
+    with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=init_worker,
+            initargs=(
+                whisper_model,
+                threads,
+                preload_asr,
+                compute_type,
+                model_cache_mb,
+                instrumentation.PIPELINE_METRICS_FILE,
+                instrumentation.PIPELINE_METRICS_PROM_FILE)) as executor:
+        futures = [executor.submit(_run_job, i, job, options) for i, job in enumerate(jobs)]
+        for future in as_completed(futures):
+            result = future.result()
+            status = "done" if result.ok else f"FAILED: {result.error}"
+            print(f"[{len(results) + 1}/{len(jobs)}] {result.job['video_output']} {status} ({result.seconds:.1f}s)")
+            results.append(result)
+
+    return sorted(results, key=lambda result: result.index)
+
+
+def print_batch_report(results: List[JobResult], wall_seconds: float) -> None:
+    """
+    Print per-job success or failure and the throughput of a batch.
+
+    Args:
+        results (List[JobResult]): The results returned by run_batch.
+        wall_seconds (float): The wall-clock duration of the whole batch.
+    """
+    succeeded = [result for result in results if result.ok]
+    failed = [result for result in results if not result.ok]
+
+    print(f"\n{len(succeeded)} succeeded, {len(failed)} failed in {wall_seconds:.1f}s")
+    for result in results:
+        status = "ok    " if result.ok else "FAILED"
+        print(f"  {status} {result.job['video_output']} ({result.seconds:.1f}s) {result.error}")
+
+    if wall_seconds > 0:
+        print(f"Throughput: {len(succeeded) * 3600 / wall_seconds:.1f} videos/hour")
@@ -0,0 +1,111 @@
+import time
+import argparse
+import itertools
+from pathlib import Path
+from typing import List, Dict, Any
+
+import torch
+
+from src.audio.loaded_audio import LoadedAudio
+from src.utils import generate_subtitles, model_registry
+from src.utils.inference import InferenceOptions, COMPUTE_TYPES
+
+
+def calibrate(
+        sample_path: str,
+        model_type: str = "medium",
+        device: str = "cpu",
+        compute_types: List[str] = ("int8", "float32"),
+        batch_sizes: List[int] = (1,),
+        threads: List[int] = (None,),
+        vad_filters: List[bool] = (False,),
+        repeat: int = 1,
+        language_code: str = "en") -> List[Dict[str, Any]]:
+    """
+    Time transcribe_and_align on a local sample with every combination of the inference options.
+
+    The sample is decoded once, and the ASR models and the alignment model of
+    language_code are loaded before anything is timed, so the times are transcription and
+    alignment only. The real-time factor is the time taken divided by the length of the
+    sample: below 1 is faster than real time.
+
+    Args:
+        sample_path (str): The audio to transcribe, ideally a minute or two of typical narration.
+        model_type (str, optional): The Whisper model type. Defaults to "medium".
+        device (str, optional): The device to run on. Defaults to "cpu".
+        compute_types (List[str], optional): The compute types to try. Defaults to int8 and float32.
+        batch_sizes (List[int], optional): The batch sizes to try. Defaults to 1.
+        threads (List[int], optional): The thread counts to try. None is torch's default.
+        vad_filters (List[bool], optional): Whether to try with and without the VAD pre-filter.
+        repeat (int, optional): Runs per setting. The fastest run is reported. Defaults to 1.
+        language_code (str, optional): The language of the sample, whose alignment model is
+            loaded up front. Defaults to "en".
+
+    Returns:
+        List[Dict[str, Any]]: One row per setting with the options, 'seconds' and 'rtf', fastest first.
+    """
+    audio = LoadedAudio(sample_path)
+    audio.asr_samples  # decoded before anything is timed
+    duration = audio.duration
+    registry = model_registry.get_model_registry()
+    registry.get_align_model(language_code, device)
+    # options without a thread count leave it as it is, so rows for the default restore it
+    default_threads = torch.get_num_threads()
+
+    rows = []
+    for compute_type, batch_size, thread_count, vad_filter in itertools.product(compute_types, batch_sizes, threads, vad_filters):
+        options = InferenceOptions(compute_type, batch_size, thread_count, vad_filter)
+        registry.get_asr_model(model_type, device, compute_type)
+        torch.set_num_threads(default_threads)
+        times = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            generate_subtitles.transcribe_and_align(sample_path, device, model_type, audio=audio, options=options)
+            times.append(time.perf_counter() - started)
+        seconds = min(times)
+        rows.append({
+            "compute_type": compute_type,
+            "batch_size": batch_size,
+            "threads": thread_count,
+            "vad_filter": vad_filter,
+            "seconds": seconds,
+            "rtf": seconds / duration,
+        })
+        print(f"{compute_type:>8} batch={batch_size:<3} threads={thread_count or 'default':<8} vad={str(vad_filter):<5} {seconds:8.2f}s  rtf {seconds / duration:.3f}")
+
+    return sorted(rows, key=lambda row: row["rtf"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report the real-time factor of transcription with different inference options.")
+    parser.add_argument("sample_path", type=Path, help="Path to a local audio sample.")
+    parser.add_argument("--model_type", type=str, default="medium", help="Type of model to use for transcription (default: 'medium')")
+    parser.add_argument("--device", type=str, default="cpu", help="Device to run on (default: 'cpu')")
+    parser.add_argument("--compute_types", type=str, nargs="+", default=["int8", "float32"], choices=COMPUTE_TYPES, help="Compute types to try (default: int8 float32)")
+    parser.add_argument("--batch_sizes", type=int, nargs="+", default=[1], help="Batch sizes to try (default: 1)")
+    parser.add_argument("--threads", type=int, nargs="+", default=[None], help="Thread counts to try (default: torch default)")
+    parser.add_argument("--vad", action="store_true", help="Also try every setting with the VAD pre-filter")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per setting; the fastest is reported (default: 1)")
+    parser.add_argument("--language", type=str, default="en", help="Language of the sample, whose alignment model is loaded before timing (default: 'en')")
+    args = parser.parse_args()
+
+    rows = calibrate(
+        str(args.sample_path),
+        args.model_type,
+        args.device,
+        args.compute_types,
+        args.batch_sizes,
+        args.threads,
+        [False, True] if args.vad else [False],
+        args.repeat,
+        args.language,
+        )
+    best = rows[0]
+    print(f"\nFastest: --compute_type {best['compute_type']} --asr_batch_size {best['batch_size']}"
+          + (f" --asr_threads {best['threads']}" if best['threads'] else "")
+          + (" --vad_filter" if best['vad_filter'] else "")
+          + f" (rtf {best['rtf']:.3f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+import argparse
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+
+Segment = Dict[str, Union[str, float]]
+
+
+class CaptionSegmenter:
+    """
+    Groups word segments into captions as the words arrive.
+
+    A caption is closed before a word that would break one of the rules: too many words,
+    too many characters, too long on screen, or after a long pause. Push words one at a
+    time and flush at the end, or use segment_captions on an iterable.
+
+    Args:
+        max_words (int, optional): The most words in a caption. Defaults to 5.
+        max_chars (int, optional): The most characters in a caption, counting the spaces
+            between words. A single longer word still gets a caption. No limit by default.
+        max_duration (float, optional): The longest a caption may last, from the start of its
+            first word to the end of its last, in seconds. No limit by default.
+        max_pause_ms (float, optional): A pause between words longer than this, in milliseconds,
+            starts a new caption. No limit by default.
+        keep_words (bool, optional): Add a 'words' key with the word segments of every caption.
+            Defaults to False.
+    """
+
+    def __init__(
+            self,
+            max_words: int = 5,
+            max_chars: Optional[int] = None,
+            max_duration: Optional[float] = None,
+            max_pause_ms: Optional[float] = None,
+            keep_words: bool = False):
+        if not isinstance(max_words, int) or max_words < 1:
+            raise ValueError("Invalid value for 'max_words'. It must be a positive integer.")
+        self.max_words = max_words
+        self.max_chars = max_chars
+        self.max_duration = max_duration
+        self.max_pause = None if max_pause_ms is None else max_pause_ms / 1000
+        self.keep_words = keep_words
+        self._words: List[Segment] = []
+        self._chars = 0
+
+    def push(self, word: Dict[str, Any]) -> Optional[Segment]:
+        """
+        Add the next word.
+
+        Args:
+            word (Dict[str, Any]): A word segment with 'text', 'start' and 'end' keys.
+
+        Raises:
+            TypeError: If the word is not a dictionary.
+            ValueError: If the word is missing a key.
+
+        Returns:
+            Optional[Segment]: The caption closed by this word, if any.
+        """
+        if not isinstance(word, dict):
+            raise TypeError("Each word segment must be a dictionary.")
+        if "text" not in word or "start" not in word or "end" not in word:
+            raise ValueError("Each word segment must have 'text', 'start', and 'end' keys.")
+
+        caption = None
+        if self._words and self._breaks_before(word):
+            caption = self.flush()
+        self._chars += len(word["text"]) + (1 if self._words else 0)
+        self._words.append(word)
+        return caption
+
+    def _breaks_before(self, word: Dict[str, Any]) -> bool:
+        if len(self._words) >= self.max_words:
+            return True
+        if self.max_chars is not None and self._chars + 1 + len(word["text"]) > self.max_chars:
+            return True
+        if self.max_duration is not None and word["end"] - self._words[0]["start"] > self.max_duration:
+            return True
+        if self.max_pause is not None and word["start"] - self._words[-1]["end"] > self.max_pause:
+            return True
+        return False
+
+    def flush(self) -> Optional[Segment]:
+        """
+        Close the current caption, e.g. when there are no more words.
+
+        Returns:
+            Optional[Segment]: The caption, or None if there were no words since the last one.
+        """
+        if not self._words:
+            return None
+        words = self._words
+        caption = {"text": " ".join(word["text"] for word in words), "start": words[0]["start"], "end": words[-1]["end"]}
+        if self.keep_words:
+            caption["words"] = words
+        self._words = []
+        self._chars = 0
+        return caption
+
+
+def segment_captions(word_segments: Iterable[Dict[str, Any]], **rules) -> Iterator[Segment]:
+    """
+    Group word segments into captions, yielding every caption as soon as it is complete.
+
+    Only the words of the current caption are held, so word_segments can be a generator
+    fed while later audio is still being transcribed.
+
+    Args:
+        word_segments (Iterable[Dict[str, Any]]): Word segments with 'text', 'start' and 'end' keys.
+        **rules: max_words, max_chars, max_duration, max_pause_ms and keep_words, see CaptionSegmenter.
+
+    Yields:
+        Segment: Captions with 'text', 'start' and 'end' keys.
+    """
+    segmenter = CaptionSegmenter(**rules)
+    for word in word_segments:
+        caption = segmenter.push(word)
+        if caption is not None:
+            yield caption
+    caption = segmenter.flush()
+    if caption is not None:
+        yield caption
+
+
+def add_caption_arguments(parser: argparse.ArgumentParser) -> None:
+    """
+    Add the command line arguments read by rules_from_args.
+
+    Args:
+        parser (argparse.ArgumentParser): The parser to add the arguments to.
+    """
+    parser.add_argument('--caption_max_words', type=int, required=False, default=5,
+                        help='Most words shown in one caption (default: 5).')
+    parser.add_argument('--caption_max_chars', type=int, required=False, default=None,
+                        help='Most characters shown in one caption, counting spaces (default: no limit).')
+    parser.add_argument('--caption_max_duration', type=float, required=False, default=None,
+                        help='Longest a caption stays on screen, in seconds (default: no limit).')
+    parser.add_argument('--caption_max_pause_ms', type=float, required=False, default=None,
+                        help='A pause between words longer than this many milliseconds starts a new caption (default: no limit).')
+
+
+def rules_from_args(args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    Build the caption rules from the arguments added by add_caption_arguments.
+
+    Args:
+        args (argparse.Namespace): The parsed arguments.
+
+    Returns:
+        Dict[str, Any]: Keyword arguments for CaptionSegmenter. Rules without a limit are left out.
+    """
+    rules = {
+        "max_words": args.caption_max_words,
+        "max_chars": args.caption_max_chars,
+        "max_duration": args.caption_max_duration,
+        "max_pause_ms": args.caption_max_pause_ms,
+    }
+    return {rule: value for rule, value in rules.items() if value is not None}
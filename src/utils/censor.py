@@ -0,0 +1,158 @@
+import re
+import functools
+from typing import Dict, FrozenSet, Iterable, List, Union
+
+
+SegmentList = List[Dict[str, Union[str, float]]]
+
+_NON_ALPHANUMERIC = re.compile(r'[^a-zA-Z\d\s]')
+
+
+def trie_pattern(words: Iterable[str]) -> str:
+    """
+    Build a regex that matches any of the words, shaped like a trie of the words.
+
+    Words sharing a prefix share one branch, so the regex engine tests each character
+    of the text against the remaining candidates instead of trying every word in turn.
+    Where one word is a prefix of another the longer word is tried first.
+
+    Args:
+        words (Iterable[str]): The words to match.
+
+    Returns:
+        str: The pattern, or an empty string if there are no words.
+    """
+    trie = {}
+    for word in words:
+        if not word:
+            continue
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+    return _node_pattern(trie)
+
+
+def _node_pattern(node: Dict[str, dict]) -> str:
+    branches = [re.escape(char) + _node_pattern(child) for char, child in sorted(node.items()) if char]
+    if not branches:
+        return ""
+    if len(branches) == 1 and "" not in node:
+        return branches[0]
+    pattern = "(?:" + "|".join(branches) + ")"
+    # a word ends here, but a longer word continuing from here is preferred
+    return pattern + "?" if "" in node else pattern
+
+
+def mask_word(word: str) -> str:
+    """Replace every character of a word but the first and the last with an asterisk."""
+    return word[0] + "*" * (len(word) - 2) + word[-1]
+
+
+class CensorEngine:
+    """
+    Masks swear words in text and finds the word segments to silence.
+
+    The word list is compiled once into a single trie-shaped regex. Build engines with
+    get_censor_engine so that every job using the same word list shares one engine.
+
+    Args:
+        words (Iterable[str]): The swear words.
+    """
+
+    def __init__(self, words: Iterable[str]):
+        self.words = frozenset(words)
+        pattern = trie_pattern(self.words)
+        self._pattern = re.compile(r"\b(?:{})\b".format(pattern), flags=re.IGNORECASE) if pattern else None
+
+    def mask(self, text: str) -> str:
+        """
+        Mask every swear word in a text, keeping its first and last characters.
+
+        Args:
+            text (str): The text to mask.
+
+        Returns:
+            str: The masked text.
+        """
+        if self._pattern is None:
+            return text
+        return self._pattern.sub(lambda match: mask_word(match.group(0)), text)
+
+    def is_swear(self, text: str) -> bool:
+        """
+        Check whether a transcribed word is a swear word, ignoring punctuation and case.
+
+        Args:
+            text (str): The text of a word segment.
+
+        Returns:
+            bool: True if the word is in the word list.
+        """
+        return _NON_ALPHANUMERIC.sub('', text).lower() in self.words
+
+    def mask_segments(self, segments: SegmentList) -> SegmentList:
+        """
+        Return copies of segments with their text masked.
+
+        Args:
+            segments (SegmentList): Segments with a 'text' key.
+
+        Returns:
+            SegmentList: The masked copies.
+        """
+        masked_segments = []
+        for segment in segments:
+            segment_copy = segment.copy()
+            segment_copy['text'] = self.mask(segment['text'])
+            masked_segments.append(segment_copy)
+        return masked_segments
+
+
+class Replacer:
+    """
+    Replaces words anywhere in a text in a single scan, e.g. to sanitise a script before text-to-speech.
+
+    Matching is case-sensitive and not limited to whole words. At every position the
+    longest matching entry is replaced, and replaced text is not scanned again.
+
+    Args:
+        replacements (Dict[str, str]): The replacement of every word.
+    """
+
+    def __init__(self, replacements: Dict[str, str]):
+        self.replacements = dict(replacements)
+        pattern = trie_pattern(self.replacements)
+        self._pattern = re.compile(pattern) if pattern else None
+
+    def replace(self, text: str) -> str:
+        """
+        Replace every word in a text.
+
+        Args:
+            text (str): The text.
+
+        Returns:
+            str: The text with the words replaced.
+        """
+        if self._pattern is None:
+            return text
+        return self._pattern.sub(lambda match: self.replacements[match.group(0)], text)
+
+
+@functools.lru_cache(maxsize=16)
+def _cached_engine(words: FrozenSet[str]) -> CensorEngine:
+    return CensorEngine(words)
+
+
+def get_censor_engine(words: Iterable[str]) -> CensorEngine:
+    """
+    Return the shared censor engine of a word list, compiling it on first use.
+
+    Args:
+        words (Iterable[str]): The swear words. Order and duplicates do not matter.
+
+    Returns:
+        CensorEngine: The engine.
+    """
+    return _cached_engine(frozenset(words))
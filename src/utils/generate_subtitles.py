@@ -1,39 +1,283 @@
+import os
+import re
+import hashlib
 from pathlib import Path
 import argparse
-from typing import List, Dict, Union
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Union, Optional
 
 import moviepy.editor as mp
+import numpy as np
+import torch
+import whisper
 import whisperx
 import pandas as pd
 from moviepy.video.tools.subtitles import SubtitlesClip
 from moviepy.editor import VideoFileClip
 
 
-from src.video import utils
+from src.video import utils, caption_renderer, ffmpeg_render
+from src.audio import vad
+from src.audio.loaded_audio import LoadedAudio
+from src.utils import model_registry, transcript_chunks, caption_segmenter
+from src.utils.transcript_cache import TranscriptCache
+from src.utils.word_transcript import WordTranscript
+from src.utils.inference import InferenceOptions, DEFAULT_OPTIONS, add_inference_arguments, options_from_args, check_compute_type
 
 TextSegmentList = [List[Dict[str, Union[str, float]]]]
 
-
-def transcribe_and_align(input_path: Path, device: str = "cpu", model_type: str = "medium") -> dict:
+# Scripts are aligned in pieces of about this many seconds, so the alignment trellis stays small
+ALIGN_CHUNK_SECONDS = 30
+# With several ASR workers, long audio is transcribed in chunks of about this many seconds
+ASR_CHUNK_SECONDS = 120
+# Whisper decodes audio in windows of this many seconds
+WINDOW_SECONDS = 30
+
+
+def transcribe_and_align(
+        input_path: Path,
+        device: str = "cpu",
+        model_type: str = "medium",
+        cache: Optional[TranscriptCache] = None,
+        workers: int = 1,
+        chunk_seconds: float = ASR_CHUNK_SECONDS,
+        audio: Optional[LoadedAudio] = None,
+        options: InferenceOptions = DEFAULT_OPTIONS) -> dict:
     """Transcribe and align audio file.
 
+    The ASR and alignment models are taken from the process-wide model registry,
+    so repeated calls in the same process reuse the loaded models. With more than
+    one worker, audio longer than a chunk is split in pauses and the chunks are
+    transcribed and aligned in parallel on a process pool, then stitched back
+    together. Every worker loads its own models.
+
     Args:
         input_path (Path): Path to audio file.
         device (str, optional): Device to use for transcription and alignment.
             Defaults to "cpu".
         model_type (str, optional): Type of model to use for transcription.
             Defaults to "medium".
+        cache (TranscriptCache, optional): If provided, the result is looked up by the
+            audio content and parameters before running ASR, and stored after.
+        workers (int, optional): Number of processes transcribing chunks at the same time.
+            Defaults to 1, which transcribes the whole file in this process.
+        chunk_seconds (float, optional): The target length of a chunk. Defaults to ASR_CHUNK_SECONDS.
+        audio (LoadedAudio, optional): input_path already decoded. Its 16 kHz samples are used for
+            both transcription and alignment instead of decoding the file twice.
+        options (InferenceOptions, optional): Compute type, batching, threads and VAD pre-filter
+            of the ASR model. Defaults to Whisper's defaults.
+
+    Raises:
+        ValueError: If the compute type of the options does not run on the device.
 
     Returns:
         dict: Aligned transcriptions.
     """
-    model = whisperx.load_model(model_type,device)
-    result = model.transcribe(input_path)
-    model_a, metadata = whisperx.load_align_model(language_code=result["language"], device=device)
-    result_aligned = whisperx.align(result["segments"], model_a, metadata, input_path, device)
+    check_compute_type(options.compute_type, device)
+    if cache is not None:
+        params = {"task": "transcribe_and_align", "model_type": model_type, "device": device}
+        if workers > 1:
+            params["chunk_seconds"] = chunk_seconds
+        params.update(options.cache_params())
+        cache_key = cache.make_key(input_path, params)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    if audio is not None:
+        samples = audio.asr_samples
+    else:
+        samples = whisperx.load_audio(str(input_path))
+
+    options.apply_threads()
+    regions = []
+    if options.vad_filter:
+        regions = vad.speech_regions(samples, whisperx.audio.SAMPLE_RATE)
+        samples = vad.keep_regions(samples, regions, whisperx.audio.SAMPLE_RATE)
+
+    if len(samples) == 0:
+        result_aligned = {"segments": [], "word_segments": []}
+    elif workers > 1:
+        result_aligned = _transcribe_chunked(samples, model_type, device, workers, chunk_seconds, options)
+    else:
+        result_aligned = _transcribe_chunk(samples, model_type, device, options)
+    result_aligned = vad.restore_transcript(result_aligned, regions)
+
+    if cache is not None:
+        cache.put(cache_key, result_aligned)
     return result_aligned
 
 
+def _init_chunk_worker(threads: int) -> None:
+    torch.set_num_threads(threads)
+
+
+def _decode_batched(model, audio: np.ndarray, options: InferenceOptions, device: str) -> dict:
+    """
+    Decode the audio in batches of windows of up to 30 seconds cut in pauses.
+
+    Whisper decodes one window at a time, so batching several amortises the cost of
+    each decoder step. The windows are decoded without timestamps and every window
+    becomes one segment, which the alignment model then splits into words.
+    """
+    sample_rate = whisperx.audio.SAMPLE_RATE
+    # windows are at most WINDOW_SECONDS long: chunk_seconds + search_seconds in the middle, 1.5 * chunk_seconds at the end
+    split_points = transcript_chunks.find_split_points(audio, sample_rate, chunk_seconds=WINDOW_SECONDS * 2 / 3, search_seconds=WINDOW_SECONDS / 3)
+    bounds = [0.0] + split_points + [len(audio) / sample_rate]
+    windows = list(zip(bounds, bounds[1:]))
+    mels = [
+        whisper.log_mel_spectrogram(whisper.pad_or_trim(audio[int(start * sample_rate):int(end * sample_rate)]))
+        for start, end in windows
+    ]
+
+    _, probs = model.detect_language(mels[0].to(model.device))
+    language = max(probs, key=probs.get)
+    decoding_options = whisper.DecodingOptions(language=language, without_timestamps=True, **options.decode_options(device))
+
+    segments = []
+    for i in range(0, len(windows), options.batch_size):
+        batch = torch.stack(mels[i:i + options.batch_size]).to(model.device)
+        for (start, end), result in zip(windows[i:i + options.batch_size], whisper.decode(model, batch, decoding_options)):
+            if result.text.strip():
+                segments.append({"text": result.text.strip(), "start": start, "end": end})
+    return {"segments": segments, "language": language}
+
+
+def _transcribe_chunk(audio: np.ndarray, model_type: str, device: str, options: InferenceOptions = DEFAULT_OPTIONS) -> dict:
+    registry = model_registry.get_model_registry()
+    model = registry.get_asr_model(model_type, device, options.compute_type)
+    if options.batch_size > 1:
+        result = _decode_batched(model, audio, options, device)
+    else:
+        result = model.transcribe(audio, **options.decode_options(device))
+    model_a, metadata = registry.get_align_model(result["language"], device)
+    return whisperx.align(result["segments"], model_a, metadata, audio, device)
+
+
+def _transcribe_chunked(
+        audio: np.ndarray,
+        model_type: str,
+        device: str,
+        workers: int,
+        chunk_seconds: float,
+        options: InferenceOptions = DEFAULT_OPTIONS) -> dict:
+    sample_rate = whisperx.audio.SAMPLE_RATE
+    split_points = transcript_chunks.find_split_points(audio, sample_rate, chunk_seconds)
+    chunks = transcript_chunks.plan_chunks(len(audio) / sample_rate, split_points)
+    if len(chunks) == 1:
+        return _transcribe_chunk(audio, model_type, device, options)
+
+    workers = min(workers, len(chunks))
+    threads = options.threads or max(1, (os.cpu_count() or 1) // workers)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_chunk_worker, initargs=(threads,)) as executor:
+        futures = [
+            executor.submit(_transcribe_chunk, audio[int(chunk.start * sample_rate):int(chunk.end * sample_rate)], model_type, device, options)
+            for chunk in chunks
+        ]
+        results = [future.result() for future in futures]
+    return transcript_chunks.stitch_transcripts(chunks, results)
+
+
+def _fill_missing_word_times(word_segments: list) -> list:
+    """
+    Drop punctuation-only words and give words the aligner could not place
+    (e.g. numbers) the gap between their aligned neighbours.
+    """
+    words = [dict(word) for word in word_segments if re.search(r'\w', word['text'])]
+
+    for i, word in enumerate(words):
+        if word.get('start') is None or word['start'] != word['start']:
+            word['start'] = words[i - 1]['end'] if i > 0 else 0.0
+    for i in range(len(words) - 1, -1, -1):
+        word = words[i]
+        if word.get('end') is None or word['end'] != word['end']:
+            word['end'] = words[i + 1]['start'] if i + 1 < len(words) else word['start']
+        word['end'] = max(word['end'], word['start'])
+
+    return words
+
+
+def _sentence_segments(word_segments: list) -> list:
+    """Group word segments into sentence segments at sentence-ending punctuation."""
+    segments = []
+    sentence = []
+    for word in word_segments:
+        sentence.append(word)
+        if re.search(r'[.!?]["\')]*$', word['text']):
+            segments.append(sentence)
+            sentence = []
+    if sentence:
+        segments.append(sentence)
+
+    return [
+        {"text": " ".join(word['text'] for word in sentence), "start": sentence[0]['start'], "end": sentence[-1]['end']}
+        for sentence in segments
+    ]
+
+
+def align_script(
+        input_path: Path,
+        script: str,
+        device: str = "cpu",
+        language_code: str = "en",
+        cache: Optional[TranscriptCache] = None,
+        audio: Optional[LoadedAudio] = None,
+        options: InferenceOptions = DEFAULT_OPTIONS) -> dict:
+    """Align a known script to an audio file without running ASR.
+
+    When the audio is text-to-speech output of a script we already have, only the
+    wav2vec2 alignment step is needed to get word timestamps, which skips the most
+    expensive stage of transcribe_and_align. The result has the same shape as the
+    output of transcribe_and_align, with segments split at sentence boundaries.
+
+    The cost of aligning a segment grows with its length times the length of its text,
+    so the script is split into runs of sentences of about ALIGN_CHUNK_SECONDS, matched
+    to the audio at pauses, and each run is aligned on its own stretch of audio.
+
+    Args:
+        input_path (Path): Path to audio file.
+        script (str): The text spoken in the audio file.
+        device (str, optional): Device to use for alignment. Defaults to "cpu".
+        language_code (str, optional): Language of the script. Defaults to "en".
+        cache (TranscriptCache, optional): If provided, the result is looked up by the
+            audio content, script and parameters before aligning, and stored after.
+        audio (LoadedAudio, optional): input_path already decoded, used instead of decoding it again.
+        options (InferenceOptions, optional): Only the thread count applies, as there is no ASR.
+
+    Returns:
+        dict: Aligned transcription with 'segments' and 'word_segments' keys.
+    """
+    if cache is not None:
+        cache_key = cache.make_key(input_path, {
+            "task": "align_script",
+            "script": hashlib.sha256(script.encode()).hexdigest(),
+            "language_code": language_code,
+            "device": device,
+            "chunk_seconds": ALIGN_CHUNK_SECONDS,
+        })
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    if audio is not None:
+        samples = audio.asr_samples
+    else:
+        samples = whisperx.load_audio(str(input_path))
+    options.apply_threads()
+    transcript = transcript_chunks.split_script(script, samples, whisperx.audio.SAMPLE_RATE, ALIGN_CHUNK_SECONDS)
+
+    model_a, metadata = model_registry.get_model_registry().get_align_model(language_code, device)
+    result_aligned = whisperx.align(transcript, model_a, metadata, samples, device)
+
+    word_segments = _fill_missing_word_times(result_aligned["word_segments"])
+    result = {"segments": _sentence_segments(word_segments), "word_segments": word_segments}
+
+    if cache is not None:
+        cache.put(cache_key, result)
+    return result
+
+
+
 def segment_text_by_word_length(
     my_list: list,
     word_length_max: int = 5
@@ -51,52 +295,68 @@ def segment_text_by_word_length(
     if not isinstance(my_list, list):
         raise TypeError("Input 'my_list' must be a list of dictionaries.")
 
-    if not all(isinstance(item, dict) for item in my_list):
-        raise TypeError("Each item in 'my_list' must be a dictionary.")
-
-    if not all(
-        all(key in item for key in ["text", "start", "end"])
-        for item in my_list
-    ):
-        raise ValueError("Each dictionary in 'my_list' must have 'text', 'start', and 'end' keys.")
-
     if not isinstance(word_length_max, int) or word_length_max < 1:
         raise ValueError("Invalid value for 'word_length_max'. It must be a positive integer.")
 
-    segmented_text = []
-    temp_segment = []
-
-    for item in my_list:
-        temp_segment.append(item)
-        if len(temp_segment) == word_length_max:
-            segmented_text.append(temp_segment)
-            temp_segment = []
-
-    if temp_segment:
-        segmented_text.append(temp_segment)
-
-    complete_segments = []
-    for segment in segmented_text:
-        start_time = segment[0]['start']
-        end_time = segment[-1]['end']
-        text = " ".join(item['text'] for item in segment)
-        complete_segments.append({"text": text, "start": start_time, "end": end_time})
+    # the items are checked as they are grouped, in a single pass
+    return list(caption_segmenter.segment_captions(my_list, max_words=word_length_max))
 
-    return complete_segments
-
-def add_subtitles_to_video(input_path: str, output_path: str, word_segments: TextSegmentList) -> None:
+def add_subtitles_to_video(
+        input_path: str,
+        output_path: str,
+        word_segments: TextSegmentList,
+        temp_dir: Optional[str] = None,
+        renderer: str = "textclip",
+        caption_mode: str = "static") -> None:
     """
     Add subtitles to a video file based on word segments with start and end times.
 
+    The "textclip" renderer makes an ImageMagick TextClip for every caption and composites
+    them with a CompositeVideoClip. The "pillow" renderer draws every distinct caption once
+    with Pillow and blends it onto only the frames where it is shown. The "ass" renderer
+    writes the captions to an ASS file and burns them in with ffmpeg's subtitles filter
+    while encoding, so no frame goes through Python.
+
     Args:
         input_path (str): The path to the input video file.
         output_path (str): The path to the output video file with subtitles added.
         word_segments (TextSegmentList): A list of dictionaries containing 'text', 'start', and 'end' keys
             for each word segment.
+        temp_dir (str, optional): The directory for moviepy's temporary audio file. Defaults to the
+            current working directory.
+        renderer (str, optional): "textclip", "pillow" or "ass". Defaults to "textclip".
+        caption_mode (str, optional): "static", or with the "ass" renderer "highlight" to draw the
+            current word in a highlight colour or "karaoke" to fill the words as they are spoken.
+            Word modes need captions with a 'words' key. Defaults to "static".
 
     Returns:
         None
     """
+    if renderer == "ass":
+        return ffmpeg_render.burn_captions(input_path, output_path, word_segments, scratch_dir=temp_dir, caption_mode=caption_mode)
+    if caption_mode != "static":
+        raise ValueError(f"caption_mode {caption_mode!r} needs the 'ass' renderer")
+
+    if renderer == "pillow":
+        video = VideoFileClip(input_path)
+        final_clip = video.fl(caption_renderer.caption_filter(word_segments, video.size))
+    else:
+        final_clip = _textclip_captions(input_path, word_segments)
+
+    temp_audiofile = None
+    if temp_dir:
+        temp_audiofile = str(Path(temp_dir) / "subtitles_TEMP_MPY_wvf_snd.mp3")
+
+    try:
+        final_clip.write_videofile(output_path, fps=24, temp_audiofile=temp_audiofile)
+    except OSError:
+        Path(output_path).unlink()
+        final_clip.write_videofile(output_path, fps=24, temp_audiofile=temp_audiofile)
+        
+    return output_path
+
+
+def _textclip_captions(input_path: str, word_segments: TextSegmentList):
     text_clip_data = {
         'start': [segment['start'] for segment in word_segments],
         'end': [segment['end'] for segment in word_segments],
@@ -114,15 +374,7 @@ def add_subtitles_to_video(input_path: str, output_path: str, word_segments: Tex
     subtitles = SubtitlesClip(subs, generator,)
 
 
-    final_clip = mp.CompositeVideoClip([video, subtitles.set_pos(('center','center')),])
-
-    try:
-        final_clip.write_videofile(output_path, fps=24)
-    except OSError:
-        Path(output_path).unlink()
-        final_clip.write_videofile(output_path, fps=24)
-        
-    return output_path
+    return mp.CompositeVideoClip([video, subtitles.set_pos(('center','center')),])
 
 
 def main():
@@ -132,6 +384,11 @@ def main():
     parser.add_argument("output_path",  type=Path, default=None, help="Path to the output video file. If not provided, the input path will be used with a different file extension.")
     parser.add_argument("--device", type=str, default="cpu", help="Device to use for transcription and alignment (default: 'cpu')")
     parser.add_argument("--model_type", type=str, default="medium", help="Type of model to use for transcription (default: 'medium')")
+    parser.add_argument("--workers", type=int, default=1, help="Processes transcribing chunks of long audio in parallel (default: 1)")
+    parser.add_argument("--renderer", type=str, choices=["textclip", "pillow", "ass"], default="textclip", help="Draw captions with ImageMagick TextClips, cached Pillow bitmaps or libass in ffmpeg (default: 'textclip')")
+    parser.add_argument("--caption_mode", type=str, choices=["static", "highlight", "karaoke"], default="static", help="Show captions as they are or highlight the spoken word (needs --renderer ass)")
+    caption_segmenter.add_caption_arguments(parser)
+    add_inference_arguments(parser)
     args = parser.parse_args()
     
     # Set the output path
@@ -145,11 +402,14 @@ def main():
     output_path = str(output_path)
 
     #  Transcribe the audio file and align the transcript
-    word_segments = transcribe_and_align(input_path, args.device, args.model_type)
+    word_segments = transcribe_and_align(input_path, args.device, args.model_type, workers=args.workers, options=options_from_args(args))
     word_segments = word_segments['word_segments']
     
     # Add the subtitles to the video
-    add_subtitles_to_video(input_path, output_path, word_segments)
+    if args.caption_mode != "static":
+        word_segments = WordTranscript.from_segments(word_segments).fill_missing_times().to_segments()
+        word_segments = list(caption_segmenter.segment_captions(word_segments, keep_words=True, **caption_segmenter.rules_from_args(args)))
+    add_subtitles_to_video(input_path, output_path, word_segments, renderer=args.renderer, caption_mode=args.caption_mode)
 
 if __name__ == "__main__":
     main()
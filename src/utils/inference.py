@@ -0,0 +1,110 @@
+import argparse
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, Optional
+
+import torch
+
+
+COMPUTE_TYPES = ("int8", "float16", "float32")
+
+
+@dataclass(frozen=True)
+class InferenceOptions:
+    """
+    How the Whisper ASR model runs.
+
+    Args:
+        compute_type (str, optional): "int8" quantizes the model's linear layers, which is
+            the fastest on CPU and only runs there. "float16" only runs on GPU. "float32" is
+            full precision.
+            Defaults to None, which is float16 on GPU and float32 on CPU.
+        batch_size (int, optional): Number of 30 second windows decoded together. Above 1 the
+            audio is cut into windows in pauses and decoded in batches without timestamps,
+            and alignment places the words. Defaults to 1, Whisper's sequential decoding.
+        threads (int, optional): Intra-op threads torch uses. Defaults to None, torch's default.
+        vad_filter (bool, optional): Cut long silences out of the audio before transcribing
+            and move the times back after aligning. Defaults to False.
+    """
+    compute_type: Optional[str] = None
+    batch_size: int = 1
+    threads: Optional[int] = None
+    vad_filter: bool = False
+
+    def __post_init__(self):
+        if self.compute_type is not None and self.compute_type not in COMPUTE_TYPES:
+            raise ValueError(f"compute_type must be one of {COMPUTE_TYPES}, not {self.compute_type!r}")
+        if self.batch_size < 1:
+            raise ValueError("batch_size must be a positive integer")
+        if self.threads is not None and self.threads < 1:
+            raise ValueError("threads must be a positive integer")
+
+    def cache_params(self) -> Dict[str, Any]:
+        """The options that change the transcript, for transcript cache keys. Empty for the defaults."""
+        params = asdict(self)
+        del params["threads"]
+        return {key: value for key, value in params.items() if value != getattr(DEFAULT_OPTIONS, key)}
+
+    def decode_options(self, device: str) -> Dict[str, Any]:
+        """Keyword arguments for Whisper's transcribe and DecodingOptions."""
+        compute_type = self.compute_type or ("float16" if device != "cpu" else "float32")
+        return {"fp16": compute_type == "float16"}
+
+    def apply_threads(self) -> None:
+        """Set the intra-op thread count of this process, if one was given."""
+        if self.threads is not None:
+            torch.set_num_threads(self.threads)
+
+
+DEFAULT_OPTIONS = InferenceOptions()
+
+
+def check_compute_type(compute_type: Optional[str], device: str) -> None:
+    """
+    Check that a compute type runs on a device.
+
+    Args:
+        compute_type (str, optional): The compute type, or None for the device's default.
+        device (str): The device, e.g. "cpu" or "cuda".
+
+    Raises:
+        ValueError: For int8 on any device but the CPU, or float16 on the CPU.
+    """
+    if compute_type == "int8" and device != "cpu":
+        raise ValueError(f"compute_type 'int8' only runs on the CPU, not on {device!r}")
+    if compute_type == "float16" and device == "cpu":
+        raise ValueError("compute_type 'float16' needs a GPU device")
+
+
+def add_inference_arguments(parser: argparse.ArgumentParser) -> None:
+    """
+    Add the command line arguments read by options_from_args.
+
+    Args:
+        parser (argparse.ArgumentParser): The parser to add the arguments to.
+    """
+    parser.add_argument('--compute_type', type=str, required=False, default=None, choices=COMPUTE_TYPES,
+                        help='Whisper compute type. int8 is the fastest on CPU (default: float16 on GPU, float32 on CPU).')
+    parser.add_argument('--asr_batch_size', type=int, required=False, default=1,
+                        help='30 second windows of audio Whisper decodes together (default: 1, sequential decoding).')
+    parser.add_argument('--asr_threads', type=int, required=False, default=None,
+                        help='Intra-op threads for transcription and alignment (default: torch default).')
+    parser.add_argument('--vad_filter', action='store_true',
+                        help='Cut long silences out of the audio before transcribing it.')
+
+
+def options_from_args(args: argparse.Namespace) -> InferenceOptions:
+    """
+    Build the inference options from the arguments added by add_inference_arguments.
+
+    Args:
+        args (argparse.Namespace): The parsed arguments.
+
+    Returns:
+        InferenceOptions: The inference options.
+    """
+    return InferenceOptions(
+        compute_type=args.compute_type,
+        batch_size=args.asr_batch_size,
+        threads=args.asr_threads,
+        vad_filter=args.vad_filter,
+        )
@@ -0,0 +1,271 @@
+import os
+import sys
+import json
+import time
+import logging
+import functools
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+# JSON lines file every measurement is appended to
+PIPELINE_METRICS_FILE = os.getenv('PIPELINE_METRICS_FILE')
+# Prometheus text exposition file rewritten after every measurement, e.g. for node_exporter's textfile collector
+PIPELINE_METRICS_PROM_FILE = os.getenv('PIPELINE_METRICS_PROM_FILE')
+
+_RSS_SAMPLE_INTERVAL = 0.05
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_totals = {}
+
+
+def configure(metrics_file: Optional[str] = None, prom_file: Optional[str] = None) -> None:
+    """
+    Set where measurements are written, overriding PIPELINE_METRICS_FILE and PIPELINE_METRICS_PROM_FILE.
+
+    Args:
+        metrics_file (str, optional): The JSON lines file to append measurements to.
+        prom_file (str, optional): The Prometheus text file to rewrite after every measurement.
+    """
+    global PIPELINE_METRICS_FILE, PIPELINE_METRICS_PROM_FILE
+    if metrics_file is not None:
+        PIPELINE_METRICS_FILE = metrics_file
+    if prom_file is not None:
+        PIPELINE_METRICS_PROM_FILE = prom_file
+
+
+def _io_counters() -> Dict[str, int]:
+    if psutil is not None:
+        try:
+            counters = psutil.Process().io_counters()
+            return {"read_bytes": counters.read_bytes, "write_bytes": counters.write_bytes}
+        except (AttributeError, psutil.Error):
+            pass
+    try:
+        with open("/proc/self/io") as f:
+            fields = dict(line.split(": ") for line in f.read().splitlines())
+        return {"read_bytes": int(fields["read_bytes"]), "write_bytes": int(fields["write_bytes"])}
+    except (OSError, KeyError, ValueError):
+        return {"read_bytes": 0, "write_bytes": 0}
+
+
+def _max_rss_bytes(who: int) -> int:
+    if resource is None:
+        return 0
+    max_rss = resource.getrusage(who).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+class _RssSampler(threading.Thread):
+    """
+    Samples the resident set size of this process and its children while any measured
+    block runs. One sampler thread is shared by every measure() call, and each call gets
+    the peak seen while it ran.
+    """
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.pid = os.getpid()
+        self._process = psutil.Process()
+        self._peaks = {}
+        self._next_token = 0
+        self._condition = threading.Condition()
+
+    def _rss(self) -> int:
+        try:
+            rss = self._process.memory_info().rss
+            return rss + sum(child.memory_info().rss for child in self._process.children(recursive=True))
+        except psutil.Error:
+            return 0
+
+    def begin(self) -> int:
+        rss = self._rss()
+        with self._condition:
+            token = self._next_token
+            self._next_token += 1
+            self._peaks[token] = rss
+            self._condition.notify()
+        return token
+
+    def end(self, token: int) -> int:
+        rss = self._rss()
+        with self._condition:
+            return max(self._peaks.pop(token), rss)
+
+    def run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._peaks:
+                    self._condition.wait()
+            rss = self._rss()
+            with self._condition:
+                for token, peak in self._peaks.items():
+                    self._peaks[token] = max(peak, rss)
+            time.sleep(_RSS_SAMPLE_INTERVAL)
+
+
+_sampler = None
+
+
+def _get_sampler() -> _RssSampler:
+    global _sampler
+    with _lock:
+        # a forked worker inherits the object but not the thread
+        if _sampler is None or _sampler.pid != os.getpid():
+            _sampler = _RssSampler()
+            _sampler.start()
+        return _sampler
+
+
+def _emit(record: Dict[str, Any]) -> None:
+    logger.debug("%s", record)
+    with _lock:
+        if PIPELINE_METRICS_FILE:
+            with open(PIPELINE_METRICS_FILE, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record) + "\n")
+
+        totals = _totals.setdefault(record["stage"], {"count": 0, "failures": 0, "wall_seconds": 0.0, "cpu_seconds": 0.0})
+        totals["count"] += 1
+        totals["failures"] += 0 if record["ok"] else 1
+        totals["wall_seconds"] += record["wall_seconds"]
+        totals["cpu_seconds"] += record["cpu_seconds"]
+        totals["last"] = record
+
+        if PIPELINE_METRICS_PROM_FILE:
+            write_prometheus_file(PIPELINE_METRICS_PROM_FILE)
+
+
+def _prometheus_lines() -> List[str]:
+    pid = os.getpid()
+    lines = [
+        "# HELP pipeline_stage_runs_total Number of times a stage ran.",
+        "# TYPE pipeline_stage_runs_total counter",
+    ]
+    lines += [f'pipeline_stage_runs_total{{stage="{stage}",pid="{pid}"}} {totals["count"]}' for stage, totals in _totals.items()]
+    lines += [
+        "# HELP pipeline_stage_failures_total Number of times a stage raised.",
+        "# TYPE pipeline_stage_failures_total counter",
+    ]
+    lines += [f'pipeline_stage_failures_total{{stage="{stage}",pid="{pid}"}} {totals["failures"]}' for stage, totals in _totals.items()]
+    lines += [
+        "# HELP pipeline_stage_wall_seconds_total Wall-clock time spent in a stage.",
+        "# TYPE pipeline_stage_wall_seconds_total counter",
+    ]
+    lines += [f'pipeline_stage_wall_seconds_total{{stage="{stage}",pid="{pid}"}} {totals["wall_seconds"]:.6f}' for stage, totals in _totals.items()]
+    lines += [
+        "# HELP pipeline_stage_cpu_seconds_total CPU time of the thread running a stage.",
+        "# TYPE pipeline_stage_cpu_seconds_total counter",
+    ]
+    lines += [f'pipeline_stage_cpu_seconds_total{{stage="{stage}",pid="{pid}"}} {totals["cpu_seconds"]:.6f}' for stage, totals in _totals.items()]
+    for metric in ("peak_rss_bytes", "read_bytes", "write_bytes"):
+        lines += [
+            f"# HELP pipeline_stage_last_{metric} {metric} of the last run of a stage.",
+            f"# TYPE pipeline_stage_last_{metric} gauge",
+        ]
+        lines += [f'pipeline_stage_last_{metric}{{stage="{stage}",pid="{pid}"}} {totals["last"][metric]}' for stage, totals in _totals.items()]
+    return lines
+
+
+def write_prometheus_file(path: str) -> None:
+    """
+    Write the totals of every stage measured so far in the Prometheus text format.
+
+    Args:
+        path (str): The file to write. It is replaced atomically.
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write("\n".join(_prometheus_lines()) + "\n")
+    os.replace(tmp_path, path)
+
+
+@contextmanager
+def measure(stage: str, **labels: Any) -> Iterator[Dict[str, Any]]:
+    """
+    Measure the wall time, CPU time, peak memory and I/O of a block of code.
+
+    cpu_seconds is the CPU time of the calling thread, so blocks measured at the same time
+    on other threads are not counted. children_cpu_seconds, peak_rss_bytes, read_bytes and
+    write_bytes are process-wide: they include child processes such as ffmpeg that finished
+    inside the block, and the work of any other thread running at the same time. Peak RSS
+    covers this process and its children when psutil is installed; otherwise it is the
+    lifetime peak of the process. The measurement is appended as a JSON line to
+    PIPELINE_METRICS_FILE and added to the totals in PIPELINE_METRICS_PROM_FILE.
+
+    Args:
+        stage (str): The name of the measured stage, e.g. "pipeline.transcribe".
+        **labels: Extra JSON serializable fields recorded with the measurement.
+
+    Yields:
+        Dict[str, Any]: The record, which is filled in when the block exits.
+    """
+    record = {"stage": stage, **labels}
+    sampler = token = None
+    if psutil is not None:
+        sampler = _get_sampler()
+        token = sampler.begin()
+
+    io_before = _io_counters()
+    times_before = os.times()
+    thread_time_before = time.thread_time()
+    started = time.perf_counter()
+    ok = False
+    try:
+        yield record
+        ok = True
+    finally:
+        wall_seconds = time.perf_counter() - started
+        cpu_seconds = time.thread_time() - thread_time_before
+        times_after = os.times()
+        io_after = _io_counters()
+
+        if sampler is not None:
+            peak_rss = sampler.end(token)
+        else:
+            peak_rss = _max_rss_bytes(resource.RUSAGE_SELF) if resource is not None else 0
+
+        children_cpu_seconds = sum(after - before for before, after in zip(times_before[2:4], times_after[2:4]))
+        record.update({
+            "ok": ok,
+            "timestamp": time.time(),
+            "wall_seconds": wall_seconds,
+            "cpu_seconds": cpu_seconds,
+            "children_cpu_seconds": children_cpu_seconds,
+            "peak_rss_bytes": peak_rss,
+            "read_bytes": io_after["read_bytes"] - io_before["read_bytes"],
+            "write_bytes": io_after["write_bytes"] - io_before["write_bytes"],
+        })
+        _emit(record)
+
+
+def instrumented(stage: str) -> Callable:
+    """
+    Decorator that measures every call of a function with measure().
+
+    Args:
+        stage (str): The name the calls are recorded under.
+
+    Returns:
+        Callable: The decorator.
+    """
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with measure(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
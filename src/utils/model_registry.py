@@ -0,0 +1,222 @@
+import os
+import gc
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Optional, Tuple
+
+import torch
+import whisper
+import whisperx
+
+from src.utils.inference import check_compute_type
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+# Memory budget for warm models, in megabytes
+WHISPER_MODEL_CACHE_MB = int(os.getenv('WHISPER_MODEL_CACHE_MB', '6144'))
+
+ModelKey = Tuple[str, str, str, Optional[str], Optional[str]]
+
+
+def _process_rss() -> int:
+    if psutil is None:
+        return 0
+    return psutil.Process().memory_info().rss
+
+
+def estimate_model_bytes(model: Any) -> int:
+    """
+    Estimate the memory held by a loaded model.
+
+    Torch modules are measured from their parameters and buffers, and a tuple such as
+    the (model, metadata) pair of an alignment model from its items. Anything else
+    (e.g. a CTranslate2 backed whisper pipeline) returns 0 so the caller can fall
+    back to measuring the resident set size around the load.
+
+    Args:
+        model (Any): The loaded model.
+
+    Returns:
+        int: The estimated size in bytes, or 0 if it could not be estimated.
+    """
+    if isinstance(model, tuple):
+        return sum(estimate_model_bytes(item) for item in model)
+    if not hasattr(model, "parameters"):
+        return 0
+    total = sum(p.numel() * p.element_size() for p in model.parameters())
+    if hasattr(model, "buffers"):
+        total += sum(b.numel() * b.element_size() for b in model.buffers())
+    return total
+
+
+def quantize_asr_model(model: torch.nn.Module) -> torch.nn.Module:
+    """
+    Dynamically quantize the linear layers of a Whisper model to int8, in place.
+
+    Whisper's linear layers are a subclass of torch.nn.Linear that only casts its weights
+    to the input's dtype, and quantize_dynamic matches layers by their exact type, so they
+    are made plain torch.nn.Linear layers first. The model then only runs in float32 on CPU.
+
+    Args:
+        model (torch.nn.Module): The Whisper model.
+
+    Returns:
+        torch.nn.Module: The quantized model.
+    """
+    for module in model.modules():
+        if type(module) is whisper.model.Linear:
+            # same parameters, so no weights are copied
+            module.__class__ = torch.nn.Linear
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+
+
+def _load_asr_model(model_type: str, device: str, compute_type: Optional[str]) -> Any:
+    check_compute_type(compute_type, device)
+    model = whisperx.load_model(model_type, device)
+    if compute_type == "int8":
+        model = quantize_asr_model(model)
+    return model
+
+
+class ModelRegistry:
+    """
+    Process-wide cache of loaded Whisper ASR and alignment models.
+
+    Models are keyed on (kind, model_type, device, compute_type, language) and kept
+    warm until the total estimated size goes over max_bytes, at which point the least
+    recently used models are evicted. The most recently loaded model is never evicted,
+    so a single model larger than the budget still loads.
+    """
+
+    def __init__(self, max_bytes: int = WHISPER_MODEL_CACHE_MB * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._models = OrderedDict()
+        self._sizes = {}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._models)
+
+    def __contains__(self, key: ModelKey) -> bool:
+        return key in self._models
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(self._sizes.values())
+
+    def get(self, key: ModelKey, loader: Callable[[], Any]) -> Any:
+        """
+        Return the model stored under key, loading it with loader on a miss.
+
+        Args:
+            key (ModelKey): The registry key of the model.
+            loader (Callable[[], Any]): Called with no arguments to load the model.
+
+        Returns:
+            Any: Whatever the loader returned.
+        """
+        with self._lock:
+            if key in self._models:
+                self._models.move_to_end(key)
+                return self._models[key]
+
+            rss_before = _process_rss()
+            model = loader()
+            size = estimate_model_bytes(model) or max(_process_rss() - rss_before, 0)
+
+            self._models[key] = model
+            self._sizes[key] = size
+            self._evict()
+            return model
+
+    def get_asr_model(
+            self,
+            model_type: str,
+            device: str = "cpu",
+            compute_type: Optional[str] = None) -> Any:
+        """
+        Return a warm whisperx ASR model, loading it if needed.
+
+        Args:
+            model_type (str): The Whisper model type, e.g. "medium".
+            device (str, optional): The device to load the model on. Defaults to "cpu".
+            compute_type (str, optional): The compute type, e.g. "int8" or "float32".
+                "int8" dynamically quantizes the linear layers, which only runs on CPU.
+                The precision of the others is chosen when decoding.
+
+        Raises:
+            ValueError: If the compute type does not run on the device.
+
+        Returns:
+            Any: The loaded ASR model.
+        """
+        # the language is detected per file, so ASR models leave the language slot empty
+        key = ("asr", model_type, device, compute_type, None)
+        return self.get(key, lambda: _load_asr_model(model_type, device, compute_type))
+
+    def get_align_model(self, language_code: str, device: str = "cpu") -> Tuple[Any, dict]:
+        """
+        Return a warm wav2vec2 alignment model and its metadata, loading it if needed.
+
+        Args:
+            language_code (str): The language of the transcript to align.
+            device (str, optional): The device to load the model on. Defaults to "cpu".
+
+        Returns:
+            Tuple[Any, dict]: The alignment model and its metadata.
+        """
+        key = ("align", "wav2vec2", device, None, language_code)
+        return self.get(key, lambda: whisperx.load_align_model(language_code=language_code, device=device))
+
+    def resize(self, max_bytes: int) -> None:
+        """
+        Change the memory budget, evicting models if the new budget is exceeded.
+
+        Args:
+            max_bytes (int): The new memory budget in bytes.
+        """
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._evict()
+
+    def clear(self) -> None:
+        """Drop every cached model."""
+        with self._lock:
+            self._models.clear()
+            self._sizes.clear()
+        gc.collect()
+
+    def _evict(self) -> None:
+        evicted = False
+        while len(self._models) > 1 and self.total_bytes > self.max_bytes:
+            key, _ = self._models.popitem(last=False)
+            del self._sizes[key]
+            evicted = True
+        if evicted:
+            gc.collect()
+
+
+_registry = ModelRegistry()
+
+
+def get_model_registry() -> ModelRegistry:
+    """Return the process-wide model registry."""
+    return _registry
+
+
+def configure_model_registry(max_mb: int) -> ModelRegistry:
+    """
+    Set the memory budget of the process-wide model registry.
+
+    Args:
+        max_mb (int): The memory budget in megabytes.
+
+    Returns:
+        ModelRegistry: The process-wide registry.
+    """
+    _registry.resize(max_mb * 1024 * 1024)
+    return _registry
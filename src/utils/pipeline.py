@@ -0,0 +1,168 @@
+import os
+import json
+import time
+import uuid
+import hashlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple, Union
+
+from src.utils import instrumentation
+from src.utils.transcript_cache import to_jsonable
+
+
+MANIFEST_NAME = "pipeline.json"
+
+# Called with the artifact paths of the stage's dependencies and the path to write its own artifact to
+StageFunction = Callable[[Dict[str, Path], Path], None]
+
+
+@dataclass
+class Stage:
+    """
+    A named step of a pipeline that turns the artifacts of its dependencies into one artifact.
+
+    Args:
+        name (str): The unique name of the stage.
+        run (StageFunction): Called with the artifact paths of the dependencies keyed by stage
+            name and the path the stage must write its artifact to.
+        output (str): The artifact file name, relative to the pipeline directory, or an absolute path.
+        deps (Tuple[str, ...]): The names of the stages whose artifacts this stage reads.
+        params (Dict[str, Any]): JSON serializable parameters. Changing them invalidates the stage.
+        inputs (Tuple[str, ...]): External files the stage reads. Changing them invalidates the stage.
+    """
+    name: str
+    run: StageFunction
+    output: str
+    deps: Tuple[str, ...] = ()
+    params: Dict[str, Any] = field(default_factory=dict)
+    inputs: Tuple[str, ...] = ()
+
+
+def write_json(path: Union[str, Path], value: Any) -> None:
+    """Write a JSON artifact, converting numpy and pandas values."""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(value, f, default=to_jsonable)
+
+
+def read_json(path: Union[str, Path]) -> Any:
+    """Read a JSON artifact."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _file_signature(path: str) -> List[Any]:
+    stat = os.stat(path)
+    return [os.path.abspath(path), stat.st_size, stat.st_mtime_ns]
+
+
+class Pipeline:
+    """
+    Runs a DAG of stages and checkpoints each artifact so a rerun can resume.
+
+    A manifest in the pipeline directory records, for every completed stage, a
+    fingerprint of its parameters, its input files and the runs of its dependencies.
+    On the next run a stage is skipped when its artifact still exists and its
+    fingerprint is unchanged. Otherwise it and every stage downstream of it run again.
+    Stages are run on demand, so a stage whose artifact is already complete does not
+    require the artifacts of its own dependencies to still exist. Every stage that runs
+    is measured with instrumentation.measure under the name "pipeline.<stage>".
+    """
+
+    def __init__(self, directory: Union[str, Path], stages: List[Stage]):
+        self.directory = Path(directory)
+        self.stages = {stage.name: stage for stage in stages}
+        self.manifest_path = self.directory / MANIFEST_NAME
+
+        for stage in stages:
+            for dep in stage.deps:
+                if dep not in self.stages:
+                    raise ValueError(f"Stage '{stage.name}' depends on unknown stage '{dep}'")
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.manifest = self._load_manifest()
+        self.executed = []
+        self.skipped = []
+
+    def _load_manifest(self) -> Dict[str, Any]:
+        try:
+            return read_json(self.manifest_path)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _save_manifest(self) -> None:
+        tmp_path = self.manifest_path.with_suffix(".json.tmp")
+        write_json(tmp_path, self.manifest)
+        os.replace(tmp_path, self.manifest_path)
+
+    def artifact_path(self, name: str) -> Path:
+        """Return the artifact path of a stage."""
+        return self.directory / self.stages[name].output
+
+    def _fingerprint(self, stage: Stage) -> str:
+        description = {
+            "params": stage.params,
+            "inputs": [_file_signature(path) for path in stage.inputs],
+            "deps": [self.manifest[dep]["run_id"] for dep in stage.deps],
+        }
+        return hashlib.sha256(json.dumps(description, sort_keys=True, default=str).encode()).hexdigest()
+
+    def _is_current(self, name: str) -> bool:
+        entry = self.manifest.get(name)
+        if entry is None:
+            return False
+        stage = self.stages[name]
+        if not all(self._is_current(dep) for dep in stage.deps):
+            return False
+        return entry["fingerprint"] == self._fingerprint(stage)
+
+    def is_complete(self, name: str) -> bool:
+        """
+        Check whether a stage's artifact exists and it and everything upstream of it are up to date.
+
+        Args:
+            name (str): The name of the stage.
+
+        Returns:
+            bool: True if the stage does not need to run again.
+        """
+        return self.artifact_path(name).exists() and self._is_current(name)
+
+    def run(self, target: str = "") -> Path:
+        """
+        Bring a stage up to date, running only the stages that are incomplete or invalidated.
+
+        Args:
+            target (str, optional): The stage to produce. Defaults to the last stage.
+
+        Returns:
+            Path: The artifact path of the target stage.
+        """
+        target = target or list(self.stages)[-1]
+        self._ensure(target)
+        return self.artifact_path(target)
+
+    def _ensure(self, name: str) -> None:
+        if self.is_complete(name):
+            if name not in self.skipped and name not in self.executed:
+                self.skipped.append(name)
+            return
+
+        stage = self.stages[name]
+        for dep in stage.deps:
+            self._ensure(dep)
+
+        self.manifest.pop(name, None)
+        self._save_manifest()
+
+        with instrumentation.measure(f"pipeline.{name}", pipeline=str(self.directory)):
+            stage.run({dep: self.artifact_path(dep) for dep in stage.deps}, self.artifact_path(name))
+
+        self.manifest[name] = {
+            "fingerprint": self._fingerprint(stage),
+            "run_id": uuid.uuid4().hex,
+            "artifact": stage.output,
+            "completed_at": time.time(),
+        }
+        self._save_manifest()
+        self.executed.append(name)
@@ -6,6 +6,8 @@ import urllib.request
 from dotenv import load_dotenv
 import math
 
+from src.utils import instrumentation
+
 # Load the .env file
 load_dotenv()
 
@@ -98,6 +100,7 @@ def ultra_play_ht_get_id(transaction_id: str):
     return json.loads(response.text)['audioUrl'][0]
 
 
+@instrumentation.instrumented("tts.playht")
 def generate_track_on_machine(body, file_name, directory, voice="Larry", speed="0.85"):
     """
     Generate an audio track on a local machine with the given text, voice, and speed.
@@ -3,7 +3,7 @@ from dotenv import load_dotenv
 
 import praw
 
-from src.utils import text_utils
+from src.utils import text_utils, instrumentation
 
 # Load the .env file
 load_dotenv()
@@ -11,6 +11,7 @@ load_dotenv()
 REDDIT_CLIENT_ID = os.getenv('REDDIT_CLIENT_ID')
 REDDIT_CLIENT_SECRET = os.getenv('REDDIT_CLIENT_SECRET')
 
+@instrumentation.instrumented("reddit.fetch")
 def fetch_reddit_posts(subreddit_name:str, top_posts_limit:int=3) -> dict:
     # Get the data from a selected subreddit
     reddit_subreddit = get_subreddit(subreddit_name)
@@ -0,0 +1,226 @@
+import os
+import time
+import asyncio
+import functools
+from dataclasses import dataclass, field
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from src.utils import batch_render, instrumentation, reddit_api, utils
+
+
+# Writes the narration of a script to an audio file: synthesize(script, audio_path)
+SynthesizeFunction = Callable[[str, str], None]
+# Publishes a rendered story: upload(story)
+UploadFunction = Callable[["Story"], None]
+
+
+@dataclass
+class Story:
+    """
+    A story moving through the orchestrator, filled in stage by stage.
+
+    Args:
+        index (int): The position of the story in the input.
+        title (str): The title of the post.
+        script (str): The narration script.
+        directory (str): The directory the story's files are written to.
+        audio_path (str): The narration, once synthesized.
+        video_path (str): The rendered video, once rendered.
+        stage (str): The last stage the story reached, or the stage that failed.
+        error (str): The error of the failed stage, empty if the story succeeded.
+        seconds (float): The wall-clock time from the story entering the first queue until it finished.
+    """
+    index: int
+    title: str
+    script: str
+    directory: str
+    audio_path: str = ""
+    video_path: str = ""
+    stage: str = "queued"
+    error: str = ""
+    seconds: float = 0.0
+    started: float = field(default=0.0, repr=False)
+
+    @property
+    def ok(self) -> bool:
+        return not self.error
+
+
+def _render_story(
+        audio_path: str,
+        source_video: str,
+        swear_word_list: List[str],
+        video_path: str,
+        script: str,
+        options: Dict[str, Any]) -> None:
+    # runs in a render worker, where the exception is pickled back to the event loop
+    utils.generate_video_with_subtitles(audio_path, source_video, swear_word_list, video_path, script=script, **options)
+
+
+async def _stage_worker(
+        name: str,
+        inbox: asyncio.Queue,
+        outbox: Optional[asyncio.Queue],
+        handler: Callable[[Story], Awaitable[None]],
+        finished: List[Story]) -> None:
+    while True:
+        story = await inbox.get()
+        if story is None:
+            return
+        story.stage = name
+        try:
+            await handler(story)
+        except Exception as e:
+            story.error = f"{type(e).__name__}: {e}"
+        if story.error or outbox is None:
+            story.seconds = time.perf_counter() - story.started
+            status = "done" if story.ok else f"FAILED in {name}: {story.error}"
+            print(f"[story {story.index}] {story.title[:60]} {status} ({story.seconds:.1f}s)")
+            finished.append(story)
+        else:
+            # blocks while the next stage is busy, which keeps at most queue_size stories in flight per stage
+            await outbox.put(story)
+
+
+async def _run_stage(
+        name: str,
+        workers: int,
+        inbox: asyncio.Queue,
+        outbox: Optional[asyncio.Queue],
+        downstream_workers: int,
+        handler: Callable[[Story], Awaitable[None]],
+        finished: List[Story]) -> None:
+    await asyncio.gather(*(_stage_worker(name, inbox, outbox, handler, finished) for _ in range(workers)))
+    if outbox is not None:
+        for _ in range(downstream_workers):
+            await outbox.put(None)
+
+
+async def run_stories(
+        posts: Iterable[Dict[str, str]],
+        synthesize: SynthesizeFunction,
+        source_video: str,
+        output_directory: str,
+        swear_word_list: List[str],
+        upload: Optional[UploadFunction] = None,
+        tts_workers: int = 2,
+        render_workers: int = 1,
+        upload_workers: int = 1,
+        queue_size: int = 2,
+        whisper_model: str = "medium",
+        **options) -> List[Story]:
+    """
+    Turn several posts into videos, overlapping the network-bound and CPU-bound stages.
+
+    Each story goes through text-to-speech, rendering (alignment, censoring and encoding)
+    and optionally upload. The stages run concurrently on different stories: while one
+    story is rendered on the process pool the next ones are already being narrated and
+    the previous one uploaded. Narration and upload are blocking network calls and run
+    on a thread pool; rendering runs on a process pool of render_workers warm workers set
+    up like batch_render.run_batch. The stages are connected by queues of queue_size
+    stories, so a slow stage holds back the ones before it instead of letting finished
+    audio pile up. A failing story is reported and does not stop the others.
+
+    Args:
+        posts (Iterable[Dict[str, str]]): Posts with 'title' and 'body' keys, as returned
+            by reddit_api.fetch_reddit_posts.
+        synthesize (SynthesizeFunction): Writes the narration of a script to an audio file.
+            Called from a thread.
+        source_video (str): The background video the clips are sampled from.
+        output_directory (str): Every story gets its own numbered subdirectory here.
+        swear_word_list (List[str]): The words to censor.
+        upload (UploadFunction, optional): Publishes a rendered story. Called from a thread.
+            The story is not uploaded if not provided.
+        tts_workers (int, optional): Stories narrated at the same time. Defaults to 2.
+        render_workers (int, optional): Render processes. Defaults to 1.
+        upload_workers (int, optional): Stories uploaded at the same time. Defaults to 1.
+        queue_size (int, optional): Stories waiting between two stages. Defaults to 2.
+        whisper_model (str, optional): The Whisper model type. Defaults to "medium".
+        **options: Extra keyword arguments for utils.generate_video_with_subtitles.
+
+    Returns:
+        List[Story]: One story per post, in input order.
+    """
+    loop = asyncio.get_running_loop()
+    io_executor = ThreadPoolExecutor(max_workers=tts_workers + upload_workers)
+    render_executor = ProcessPoolExecutor(
+        max_workers=render_workers,
+        initializer=batch_render.init_worker,
+        initargs=(
+            whisper_model,
+            max(1, (os.cpu_count() or 1) // render_workers),
+            False,  # the scripts are known, so the stories are aligned rather than transcribed
+            None,
+            instrumentation.PIPELINE_METRICS_FILE,
+            instrumentation.PIPELINE_METRICS_PROM_FILE))
+    render_options = dict(options, whisper_model=whisper_model)
+
+    async def narrate(story: Story) -> None:
+        os.makedirs(story.directory, exist_ok=True)
+        story.audio_path = os.path.join(story.directory, "story.wav")
+        await loop.run_in_executor(io_executor, synthesize, story.script, story.audio_path)
+
+    async def render(story: Story) -> None:
+        video_path = os.path.join(story.directory, "video.mp4")
+        await loop.run_in_executor(render_executor, functools.partial(
+            _render_story, story.audio_path, source_video, swear_word_list, video_path, story.script, render_options))
+        story.video_path = video_path
+
+    async def publish(story: Story) -> None:
+        await loop.run_in_executor(io_executor, upload, story)
+
+    stages = [("tts", tts_workers, narrate), ("render", render_workers, render)]
+    if upload is not None:
+        stages.append(("upload", upload_workers, publish))
+    queues = [asyncio.Queue(maxsize=queue_size) for _ in stages]
+
+    finished = []
+    try:
+        tasks = []
+        for i, (name, workers, handler) in enumerate(stages):
+            last = i == len(stages) - 1
+            tasks.append(asyncio.ensure_future(_run_stage(
+                name,
+                workers,
+                queues[i],
+                None if last else queues[i + 1],
+                0 if last else stages[i + 1][1],
+                handler,
+                finished)))
+
+        for index, post in enumerate(posts):
+            story = Story(
+                index,
+                post["title"],
+                reddit_api.turn_post_into_script(post["body"], post["title"]),
+                os.path.join(output_directory, f"story_{index}"))
+            story.started = time.perf_counter()
+            await queues[0].put(story)
+        for _ in range(tts_workers):
+            await queues[0].put(None)
+
+        await asyncio.gather(*tasks)
+    finally:
+        io_executor.shutdown(wait=True)
+        render_executor.shutdown(wait=True)
+
+    return sorted(finished, key=lambda story: story.index)
+
+
+def print_story_report(stories: List[Story], wall_seconds: float) -> None:
+    """
+    Print the outcome of every story and the throughput of the run.
+
+    Args:
+        stories (List[Story]): The stories returned by run_stories.
+        wall_seconds (float): The wall-clock duration of the whole run.
+    """
+    succeeded = [story for story in stories if story.ok]
+    print(f"\n{len(succeeded)} succeeded, {len(stories) - len(succeeded)} failed in {wall_seconds:.1f}s")
+    for story in stories:
+        status = "ok    " if story.ok else f"FAILED in {story.stage}:"
+        print(f"  {status} {story.video_path or story.directory} ({story.seconds:.1f}s) {story.error}")
+
+    if wall_seconds > 0:
+        print(f"Throughput: {len(succeeded) * 3600 / wall_seconds:.1f} videos/hour")
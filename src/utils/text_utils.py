@@ -1,6 +1,8 @@
 import re
 from typing import List, Dict, Union
 
+from src.utils import censor
+
 
 def replace_caps_with_hyphens(sentence):
     pattern = r'\b([A-Z]+)\b'
@@ -102,10 +104,5 @@ def turn_post_into_script(reddit_post,reddit_title):
 
 def filter_text_by_list(text_list: List[Dict[str, Union[str, float]]], word_list: List[str]) -> List[Dict[str, Union[str, float]]]:
     '''returns segments of swear words'''
-    filtered_list = []
-    for item in text_list:
-        # Remove all non-alphanumeric characters from the item's text
-        cleaned_text = re.sub(r'[^a-zA-Z\d\s]', '', item['text'])
-        if cleaned_text.lower() in word_list:
-            filtered_list.append(item)
-    return filtered_list
+    engine = censor.get_censor_engine(word_list)
+    return [item for item in text_list if engine.is_swear(item['text'])]
@@ -0,0 +1,153 @@
+import os
+import json
+import gzip
+import hashlib
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+
+TRANSCRIPT_CACHE_LOCATION = os.getenv('TRANSCRIPT_CACHE_LOCATION', 'assets/cache/transcripts')
+TRANSCRIPT_CACHE_MB = int(os.getenv('TRANSCRIPT_CACHE_MB', '512'))
+
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(path: Union[str, Path]) -> str:
+    """
+    Compute the SHA-256 digest of a file's contents.
+
+    Args:
+        path (Union[str, Path]): The path to the file.
+
+    Returns:
+        str: The hex digest of the file contents.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def to_jsonable(value: Any) -> Any:
+    """
+    Convert values json can not serialize, such as the numpy scalars and arrays and
+    pandas DataFrames found in whisperx output. Used as the default hook of json.dump.
+    """
+    if hasattr(value, "to_dict"):
+        return value.to_dict("records")
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    if hasattr(value, "item"):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class TranscriptCache:
+    """
+    Content-addressed on-disk cache for transcription results.
+
+    Entries are keyed on the SHA-256 of the audio file plus the parameters used to
+    produce the transcript, stored as gzipped JSON and evicted least recently used
+    first once the directory grows past max_bytes. The modification time of an entry
+    is bumped on every hit and is what the eviction order is based on.
+    """
+
+    def __init__(self, directory: Union[str, Path] = TRANSCRIPT_CACHE_LOCATION, max_bytes: int = TRANSCRIPT_CACHE_MB * 1024 * 1024):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def make_key(self, audio_path: Union[str, Path], params: Dict[str, Any]) -> str:
+        """
+        Build the cache key for an audio file and the parameters used to transcribe it.
+
+        Args:
+            audio_path (Union[str, Path]): The path to the audio file.
+            params (Dict[str, Any]): The model and alignment parameters. Must be JSON serializable.
+
+        Returns:
+            str: The cache key.
+        """
+        digest = hashlib.sha256(hash_file(audio_path).encode())
+        digest.update(json.dumps(params, sort_keys=True).encode())
+        return digest.hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.directory / f"{key}.json.gz"
+
+    def get(self, key: str) -> Optional[dict]:
+        """
+        Return the cached transcript for key, or None on a miss.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            Optional[dict]: The cached transcript.
+        """
+        entry = self._entry_path(key)
+        try:
+            with gzip.open(entry, 'rt', encoding='utf-8') as f:
+                value = json.load(f)
+        except (FileNotFoundError, OSError, ValueError):
+            return None
+        try:
+            os.utime(entry)
+        except OSError:
+            pass
+        return value
+
+    def put(self, key: str, value: dict) -> None:
+        """
+        Store a transcript under key and evict old entries if the cache is over budget.
+
+        Args:
+            key (str): The cache key.
+            value (dict): The transcript to store.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        entry = self._entry_path(key)
+        tmp_entry = entry.with_name(f"{entry.name}.{os.getpid()}.tmp")
+        with gzip.open(tmp_entry, 'wt', encoding='utf-8') as f:
+            json.dump(value, f, separators=(',', ':'), default=to_jsonable)
+        os.replace(tmp_entry, entry)
+        self.evict()
+
+    def evict(self) -> None:
+        """Remove least recently used entries until the cache fits in max_bytes."""
+        with self._lock:
+            entries = []
+            for entry in self.directory.glob("*.json.gz"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry))
+
+            total = sum(size for _, size, _ in entries)
+            for _, size, entry in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    entry.unlink()
+                except FileNotFoundError:
+                    pass
+                total -= size
+
+    def clear(self) -> None:
+        """Remove every entry from the cache."""
+        for entry in self.directory.glob("*.json.gz"):
+            entry.unlink()
+
+
+_default_cache = None
+
+
+def get_transcript_cache() -> TranscriptCache:
+    """Return the cache configured by TRANSCRIPT_CACHE_LOCATION and TRANSCRIPT_CACHE_MB."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = TranscriptCache()
+    return _default_cache
@@ -0,0 +1,219 @@
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List
+
+import numpy as np
+
+from src.audio import vad
+
+
+# Length of the frames the loudness of the audio is measured on, in seconds
+FRAME_SECONDS = 0.03
+# Loudness is averaged over this long, so chunks are split in pauses rather than between syllables
+PAUSE_SECONDS = 0.3
+
+
+@dataclass
+class Chunk:
+    """
+    A piece of long audio transcribed on its own.
+
+    Args:
+        start (float): Where the chunk's audio starts, in seconds. Its transcript is offset by this.
+        end (float): Where the chunk's audio ends, in seconds.
+        own_start (float): The start of the part of the timeline this chunk's words are kept for.
+        own_end (float): The end of the part of the timeline this chunk's words are kept for.
+    """
+    start: float
+    end: float
+    own_start: float
+    own_end: float
+
+
+def find_split_points(audio: np.ndarray, sample_rate: int, chunk_seconds: float, search_seconds: float = 10.0) -> List[float]:
+    """
+    Choose where to split long audio, at the quietest moment near every chunk_seconds.
+
+    Args:
+        audio (np.ndarray): Mono samples.
+        sample_rate (int): The sample rate of the audio.
+        chunk_seconds (float): The target length of a chunk.
+        search_seconds (float, optional): How far before or after the target a split may
+            be moved to land in a pause. Defaults to 10.
+
+    Returns:
+        List[float]: The split points in seconds, in order.
+    """
+    frame = max(1, int(sample_rate * FRAME_SECONDS))
+    n_frames = len(audio) // frame
+    duration = len(audio) / sample_rate
+    if n_frames == 0:
+        return []
+
+    frames = np.asarray(audio[:n_frames * frame], dtype=np.float32).reshape(n_frames, frame)
+    energy = np.sqrt(np.mean(frames ** 2, axis=1))
+    width = max(1, int(PAUSE_SECONDS / FRAME_SECONDS))
+    energy = np.convolve(energy, np.ones(width) / width, mode="same")
+
+    frame_seconds = frame / sample_rate
+    splits = []
+    target = chunk_seconds
+    # the last chunk takes the remainder, so it is between half and one and a half chunks long
+    while target < duration - chunk_seconds / 2:
+        previous = splits[-1] if splits else 0.0
+        low = int(max(target - search_seconds, previous + chunk_seconds / 2) / frame_seconds)
+        high = min(n_frames, int((target + search_seconds) / frame_seconds) + 1)
+        if high <= low:
+            break
+        quietest = low + int(np.argmin(energy[low:high]))
+        splits.append((quietest + 0.5) * frame_seconds)
+        target = splits[-1] + chunk_seconds
+    return splits
+
+
+def plan_chunks(duration: float, split_points: List[float], overlap_seconds: float = 1.0) -> List[Chunk]:
+    """
+    Turn split points into chunks that overlap their neighbours a little.
+
+    The overlap lets a word cut by a split still be recognised whole in one of the two
+    chunks. Each chunk owns the part of the timeline between its split points, which is
+    what stitch_transcripts uses to drop the duplicates.
+
+    Args:
+        duration (float): The length of the audio in seconds.
+        split_points (List[float]): The split points, as returned by find_split_points.
+        overlap_seconds (float, optional): How far a chunk reaches past its split points. Defaults to 1.
+
+    Returns:
+        List[Chunk]: The chunks, in order.
+    """
+    bounds = [0.0] + list(split_points) + [duration]
+    return [
+        Chunk(max(0.0, own_start - overlap_seconds), min(duration, own_end + overlap_seconds), own_start, own_end)
+        for own_start, own_end in zip(bounds, bounds[1:])
+    ]
+
+
+def _shift(item: Dict[str, Any], offset: float) -> Dict[str, Any]:
+    item = dict(item)
+    for key in ("start", "end"):
+        if item.get(key) is not None:
+            item[key] = item[key] + offset
+    if "words" in item:
+        item["words"] = [_shift(word, offset) for word in item["words"]]
+    return item
+
+
+def _owned_by(items: List[Dict[str, Any]], chunk: Chunk, is_last: bool) -> List[Dict[str, Any]]:
+    kept = []
+    owned = False
+    for item in items:
+        if item.get("start") is not None and item.get("end") is not None:
+            middle = (item["start"] + item["end"]) / 2
+            owned = chunk.own_start <= middle and (middle < chunk.own_end or is_last)
+        # items the aligner could not place follow the item before them
+        if owned:
+            kept.append(item)
+    return kept
+
+
+def stitch_transcripts(chunks: List[Chunk], results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Join the aligned transcripts of the chunks into one transcript of the whole audio.
+
+    Times are moved from chunk time to audio time. A segment or word recognised in two
+    overlapping chunks is kept only from the chunk that owns its midpoint.
+
+    Args:
+        chunks (List[Chunk]): The chunks, as returned by plan_chunks.
+        results (List[Dict[str, Any]]): The aligned transcript of every chunk, with
+            'segments' and 'word_segments' keys in chunk time.
+
+    Returns:
+        Dict[str, Any]: The transcript with 'segments' and 'word_segments' keys.
+    """
+    segments = []
+    word_segments = []
+    for i, (chunk, result) in enumerate(zip(chunks, results)):
+        is_last = i == len(chunks) - 1
+        chunk_segments = [_shift(segment, chunk.start) for segment in result["segments"]]
+        for segment in _owned_by(chunk_segments, chunk, is_last):
+            if "words" in segment:
+                segment["words"] = _owned_by(segment["words"], chunk, is_last)
+            segments.append(segment)
+        chunk_words = [_shift(word, chunk.start) for word in result["word_segments"]]
+        word_segments.extend(_owned_by(chunk_words, chunk, is_last))
+    return {"segments": segments, "word_segments": word_segments}
+
+
+def _sentences(script: str) -> List[str]:
+    sentences = []
+    sentence = []
+    for word in script.split():
+        sentence.append(word)
+        if re.search(r'[.!?]["\')]*$', word):
+            sentences.append(" ".join(sentence))
+            sentence = []
+    if sentence:
+        sentences.append(" ".join(sentence))
+    return sentences
+
+
+def split_script(
+        script: str,
+        audio: np.ndarray,
+        sample_rate: int,
+        chunk_seconds: float,
+        overlap_seconds: float = 2.0) -> List[Dict[str, Any]]:
+    """
+    Split a script spoken in the audio into segments of whole sentences, each with the
+    stretch of audio it is spoken in, so every segment can be aligned on its own.
+
+    The audio is split in pauses near every chunk_seconds. Every split is matched to the
+    sentence break nearest to the share of the script spoken by then, which is estimated
+    from the share of the speech heard by then, so long pauses don't skew it. A segment's
+    audio reaches overlap_seconds past its split points in case a sentence landed on the
+    wrong side of one.
+
+    Args:
+        script (str): The text spoken in the audio.
+        audio (np.ndarray): Mono samples.
+        sample_rate (int): The sample rate of the audio.
+        chunk_seconds (float): The target length of a segment.
+        overlap_seconds (float, optional): How far a segment reaches past its split points. Defaults to 2.
+
+    Returns:
+        List[Dict[str, Any]]: Segments with 'text', 'start' and 'end' keys, in order.
+    """
+    duration = len(audio) / sample_rate
+    sentences = _sentences(script)
+    if not sentences:
+        return []
+
+    split_points = find_split_points(audio, sample_rate, chunk_seconds) if len(sentences) > 1 else []
+    regions = np.array(vad.speech_regions(audio, sample_rate), dtype=np.float64).reshape(-1, 2)
+    speech_seconds = float(np.sum(regions[:, 1] - regions[:, 0]))
+    # share of the script spoken by the end of every sentence, by word characters
+    weights = np.array([len(re.findall(r'\w', sentence)) + 1 for sentence in sentences], dtype=np.float64)
+    spoken = np.cumsum(weights)[:-1] / np.sum(weights)
+
+    breaks = []
+    times = []
+    for split in split_points if speech_seconds > 0 else []:
+        heard = float(np.sum(np.clip(split, regions[:, 0], regions[:, 1]) - regions[:, 0])) / speech_seconds
+        sentence_break = int(np.argmin(np.abs(spoken - heard))) + 1
+        if breaks and sentence_break <= breaks[-1]:
+            continue
+        breaks.append(sentence_break)
+        times.append(split)
+
+    bounds = [0] + breaks + [len(sentences)]
+    time_bounds = [0.0] + times + [duration]
+    return [
+        {
+            "text": " ".join(sentences[first:last]),
+            "start": max(0.0, start - overlap_seconds),
+            "end": min(duration, end + overlap_seconds),
+        }
+        for first, last, start, end in zip(bounds, bounds[1:], time_bounds, time_bounds[1:])
+    ]
@@ -9,6 +9,8 @@ from googleapiclient.discovery import build
 
 from moviepy.editor import VideoFileClip
 
+from src.utils import instrumentation
+
 
 CLIENT_SECRETS_FILE = "client_secret.json"
 SCOPES = ['https://www.googleapis.com/auth/youtube.upload']
@@ -48,6 +50,7 @@ def validate_shorts(options: Namespace) -> None:
         raise ValueError("Video is too long for YouTube Shorts. It must be 60 seconds or less.")
 
 
+@instrumentation.instrumented("youtube.upload")
 def initialize_upload(youtube: build, options: Namespace) -> None:
     """
     Initialize the video upload to YouTube.
@@ -1,15 +1,22 @@
 import os
+import shutil
 import subprocess
 import re
-from typing import List, Dict, Any
-
-from datetime import timedelta
+import contextlib
+from typing import Iterable, List, Dict, Any, Optional
 from pathlib import Path
 import argparse
 
-from src.video import random_sample_clip
-from src.utils import generate_subtitles, text_utils
+from src.video import random_sample_clip, ffmpeg_render, subtitle_writer
+from src.utils import generate_subtitles, transcript_cache, workspace, pipeline, censor, caption_segmenter
+from src.utils.caption_segmenter import add_caption_arguments, rules_from_args
+from src.utils.word_transcript import WordTranscript
+from src.utils.inference import InferenceOptions, DEFAULT_OPTIONS, add_inference_arguments, options_from_args
 from src.audio import audio_utils
+from src.audio.loaded_audio import LoadedAudio
+
+# Words shown per caption, unless the caption rules say otherwise
+CAPTION_WORDS = 5
 
 
 def combine_audio_and_video(
@@ -42,13 +49,186 @@ def combine_audio_and_video(
     
     subprocess.run(ffmpeg_cmd, check=True)
 
+def build_video_pipeline(
+        work_dir: Path,
+        uncensored_audio_file: str,
+        source_video: str,
+        swear_word_list: List[str],
+        video_output_location: str,
+        srtFilename: str = "",
+        whisper_model: str = "medium",
+        render_mode: str = "moviepy",
+        use_transcript_cache: bool = True,
+        script: str = "",
+        censor_mode: str = "pydub",
+        asr_workers: int = 1,
+        inference_options: InferenceOptions = DEFAULT_OPTIONS,
+        caption_renderer: str = "textclip",
+        caption_mode: str = "static",
+        caption_rules: Optional[Dict[str, Any]] = None) -> pipeline.Pipeline:
+    """
+    Build the stages that turn an uncensored narration and a background video into a
+    censored, captioned video.
+
+    The stages are:
+        transcribe: transcribe the audio, or align the known script to it.
+        mask: mask swear words in the transcript, find when they are spoken and group captions.
+        silence: silence the swear words in the audio.
+        sample_clip: cut a random clip matching the audio from the background video (moviepy mode only).
+        caption: burn the captions into the clip.
+        mux: move the captioned video and the subtitle file to their output locations.
+
+    Args:
+        work_dir (Path): The directory the stage artifacts and manifest are written to.
+        See generate_video_with_subtitles for the other arguments.
+
+    Returns:
+        pipeline.Pipeline: The video pipeline.
+    """
+    if caption_mode != "static" and render_mode != "ffmpeg" and caption_renderer != "ass":
+        raise ValueError(f"caption_mode {caption_mode!r} needs render_mode 'ffmpeg' or caption_renderer 'ass'")
+
+    swear_word_list = list(swear_word_list)
+    caption_rules = {"max_words": CAPTION_WORDS, **(caption_rules or {})}
+    cache = transcript_cache.get_transcript_cache() if use_transcript_cache else None
+    video_suffix = Path(video_output_location).suffix or ".mp4"
+    # decoded on first use and shared by the transcribe and silence stages
+    audio = LoadedAudio(uncensored_audio_file)
+
+    def transcribe(artifacts, output):
+        #complete script generated from audio file
+        if script:
+            raw_transcript = generate_subtitles.align_script(
+                uncensored_audio_file,
+                script,
+                cache=cache,
+                audio=audio,
+                options=inference_options
+                )
+        else:
+            raw_transcript = generate_subtitles.transcribe_and_align(
+                uncensored_audio_file,
+                model_type=whisper_model,
+                cache=cache,
+                workers=asr_workers,
+                audio=audio,
+                options=inference_options
+                )
+        pipeline.write_json(output, raw_transcript)
+
+    def mask(artifacts, output):
+        raw_transcript = pipeline.read_json(artifacts["transcribe"])
+
+        engine = censor.get_censor_engine(swear_word_list)
+        segments = engine.mask_segments(raw_transcript['segments'])
+
+        #adds mask to existing script and finds times when the speaker swears
+        words = WordTranscript.from_segments(raw_transcript['word_segments'])
+        swear_words = words.select(words.swear_mask(engine))
+
+        # words the aligner could not place get times, as every caption needs a start and an end
+        masked_words = words.mask(engine).fill_missing_times()
+        # word highlighting needs the words of every caption
+        n_segment = list(caption_segmenter.segment_captions(
+            masked_words.to_segments(), keep_words=caption_mode != "static", **caption_rules))
+
+        pipeline.write_json(output, {
+            "segments": segments,
+            "swear_segments": swear_words.to_segments(),
+            "captions": n_segment,
+            })
+
+    def silence(artifacts, output):
+        masked = pipeline.read_json(artifacts["mask"])
+        audio_utils.silence_segments(
+            uncensored_audio_file,
+            str(output),
+            masked["swear_segments"],
+            engine=censor_mode,
+            audio=audio
+            )
+
+    def sample_clip(artifacts, output):
+        random_sample_clip.create_clip_with_matching_audio(
+            source_video,
+            str(artifacts["silence"]),
+            str(output),
+            temp_dir=str(work_dir)
+            )
+
+    def caption(artifacts, output):
+        captions = pipeline.read_json(artifacts["mask"])["captions"]
+        if render_mode == "ffmpeg":
+            ffmpeg_render.render_clip_with_captions(
+                source_video,
+                str(artifacts["silence"]),
+                str(output),
+                captions,
+                scratch_dir=str(work_dir),
+                caption_mode=caption_mode
+                )
+        else:
+            generate_subtitles.add_subtitles_to_video(
+                str(artifacts["sample_clip"]),
+                str(output),
+                captions,
+                temp_dir=str(work_dir),
+                renderer=caption_renderer,
+                caption_mode=caption_mode
+                )
+
+    def mux(artifacts, output):
+        if srtFilename:
+            #generate srt file from segments
+            write_srt_file(pipeline.read_json(artifacts["mask"])["segments"], srtFilename)
+
+        shutil.move(str(artifacts["caption"]), str(output))
+
+    stages = [
+        pipeline.Stage("transcribe", transcribe, "transcript.json",
+                       params={"whisper_model": whisper_model, "script": script, "asr_workers": asr_workers,
+                               **inference_options.cache_params()},
+                       inputs=(uncensored_audio_file,)),
+        pipeline.Stage("mask", mask, "masked.json", deps=("transcribe",),
+                       params={"swear_word_list": sorted(swear_word_list), "caption_mode": caption_mode,
+                               "caption_rules": caption_rules}),
+        pipeline.Stage("silence", silence, "censored.wav", deps=("mask",),
+                       params={"censor_mode": censor_mode}, inputs=(uncensored_audio_file,)),
+    ]
+    if render_mode == "ffmpeg":
+        stages.append(pipeline.Stage("caption", caption, f"captioned{video_suffix}", deps=("silence", "mask"),
+                                     params={"render_mode": render_mode, "caption_mode": caption_mode}, inputs=(source_video,)))
+    else:
+        stages.append(pipeline.Stage("sample_clip", sample_clip, "sample.mp4", deps=("silence",),
+                                     inputs=(source_video,)))
+        stages.append(pipeline.Stage("caption", caption, f"captioned{video_suffix}", deps=("sample_clip", "mask"),
+                                     params={"render_mode": render_mode, "caption_renderer": caption_renderer,
+                                             "caption_mode": caption_mode}))
+    stages.append(pipeline.Stage("mux", mux, os.path.abspath(video_output_location), deps=("caption", "mask"),
+                                 params={"srtFilename": srtFilename}))
+
+    return pipeline.Pipeline(work_dir, stages)
+
+
 def generate_video_with_subtitles(
         uncensored_audio_file: str, 
         source_video: str, 
         swear_word_list: List[str], 
         video_output_location: str, 
         srtFilename: str = "", 
-        whisper_model: str = "medium") -> None:
+        whisper_model: str = "medium",
+        render_mode: str = "moviepy",
+        use_transcript_cache: bool = True,
+        script: str = "",
+        scratch_dir: str = "",
+        checkpoint_dir: str = "",
+        keep_checkpoints: bool = False,
+        censor_mode: str = "pydub",
+        asr_workers: int = 1,
+        inference_options: InferenceOptions = DEFAULT_OPTIONS,
+        caption_renderer: str = "textclip",
+        caption_mode: str = "static",
+        caption_rules: Optional[Dict[str, Any]] = None) -> None:
     """
     Generate a censored video with masked audio and subtitles.
 
@@ -59,6 +239,40 @@ def generate_video_with_subtitles(
         video_output_location (str): The path to save the generated video.
         srtFilename (str, optional): The path to save the subtitle file. If not provided, no subtitle file will be saved.
         whisper_model (str, optional): The Whisper ASR model type. Defaults to "medium".
+        render_mode (str, optional): "moviepy" renders the clip and then burns in the captions in a
+            second encode. "ffmpeg" seeks, trims, swaps the audio and burns in the captions in a
+            single ffmpeg encode. Defaults to "moviepy".
+        use_transcript_cache (bool, optional): Reuse the cached transcript of unchanged audio
+            instead of running ASR again. Defaults to True.
+        script (str, optional): The text spoken in the audio file, e.g. the script it was generated
+            from with text-to-speech. If provided, ASR is skipped and the script is aligned to the
+            audio instead, so censoring and captions follow the original script.
+        scratch_dir (str, optional): The directory to create this run's private scratch workspace in,
+            e.g. a tmpfs mount. Defaults to SCRATCH_DIRECTORY or the system temporary directory. The
+            workspace is removed when the run finishes or fails.
+        checkpoint_dir (str, optional): If provided, every stage's artifact and a manifest are kept in
+            this directory instead of a scratch workspace, so rerunning after a failure resumes from
+            the first incomplete or invalidated stage.
+        keep_checkpoints (bool, optional): Keep checkpoint_dir after the video has been written.
+            Defaults to False.
+        censor_mode (str, optional): "pydub" decodes the audio and silences the swear words in
+            memory. "ffmpeg" censors the audio as a stream with an ffmpeg filter, which keeps
+            memory constant for long audio. Defaults to "pydub".
+        asr_workers (int, optional): Processes transcribing chunks of long audio in parallel.
+            Defaults to 1. Ignored when a script is provided.
+        inference_options (InferenceOptions, optional): Compute type, batch size, thread count and
+            VAD pre-filter of the Whisper model. Defaults to Whisper's defaults.
+        caption_renderer (str, optional): How captions are drawn in "moviepy" render mode. "textclip"
+            makes an ImageMagick TextClip per caption. "pillow" draws every distinct caption once with
+            Pillow and blends it onto only the frames where it is shown. "ass" burns the captions in
+            with libass while ffmpeg encodes the clip. Defaults to "textclip".
+        caption_mode (str, optional): "static" shows every caption as it is. "highlight" draws the word
+            being spoken in a highlight colour and "karaoke" fills the words with it as they are spoken.
+            The word modes are rendered by libass, so they need render_mode "ffmpeg" or caption_renderer
+            "ass". Defaults to "static".
+        caption_rules (Dict[str, Any], optional): When a caption is closed: max_words, max_chars,
+            max_duration and max_pause_ms, see caption_segmenter.CaptionSegmenter. Defaults to
+            CAPTION_WORDS words per caption and no other limit.
 
     Returns:
         None
@@ -66,68 +280,35 @@ def generate_video_with_subtitles(
     
     parent_folder = os.path.dirname(video_output_location)
     srtFilename = os.path.join(parent_folder, srtFilename) if srtFilename else ""
-    video_clip = Path("sample.mp4")
-    family_friendly_audio = Path(uncensored_audio_file).with_name("uncensored.wav")
-    
-    #complete script generated from audio file
 
-    raw_transcript = generate_subtitles.transcribe_and_align(
-        uncensored_audio_file,
-        model_type=whisper_model
-        )
-    
-    segments = raw_transcript['segments']
-
-    segments = audio_utils.mask_swear_segments(
-        swear_word_list,
-        segments
-        )
-    
-    
-    if srtFilename:
-        if os.path.exists(srtFilename):
-            os.remove(srtFilename)
-
-        #generate srt file from segments
-        write_srt_file(segments, srtFilename)
-
-    raw_word_segments  = raw_transcript['word_segments']
-
-    #adds mask to existing script
-    masked_script = audio_utils.mask_swear_segments(
-        swear_word_list,
-        raw_word_segments
-        )
-    
-    #find times when the speaker swears
-    swear_segments = text_utils.filter_text_by_list(
-        raw_word_segments,
-        swear_word_list
-        )
-    
-    n_segment = generate_subtitles.segment_text_by_word_length(masked_script,)
-
-    audio_utils.silence_segments(
-        uncensored_audio_file,
-        str(family_friendly_audio),
-        swear_segments
-        )
-    
-    random_sample_clip.create_clip_with_matching_audio(
-        source_video,
-        str(family_friendly_audio),
-        str(video_clip)
-        )
-
-    generate_subtitles.add_subtitles_to_video(
-        str(video_clip),
-        video_output_location,
-        n_segment
-        )
-    
-    #remove temp files
-    os.remove(video_clip)
-    os.remove(family_friendly_audio)
+    if checkpoint_dir:
+        work_context = contextlib.nullcontext(Path(checkpoint_dir))
+    else:
+        work_context = workspace.job_workspace(scratch_dir)
+
+    with work_context as work_dir:
+        video_pipeline = build_video_pipeline(
+            work_dir,
+            uncensored_audio_file,
+            source_video,
+            swear_word_list,
+            video_output_location,
+            srtFilename,
+            whisper_model,
+            render_mode,
+            use_transcript_cache,
+            script,
+            censor_mode,
+            asr_workers,
+            inference_options,
+            caption_renderer,
+            caption_mode,
+            caption_rules
+            )
+        video_pipeline.run()
+
+    if checkpoint_dir and not keep_checkpoints:
+        shutil.rmtree(checkpoint_dir, ignore_errors=True)
 
 
 def create_next_dir(input_directory: str) -> str:
@@ -157,37 +338,24 @@ def create_next_dir(input_directory: str) -> str:
 
     return directory_path
 
-def write_srt_file(segments: List[Dict[str, Any]], srt_filename: str) -> None:
+def write_srt_file(segments: Iterable[Dict[str, Any]], srt_filename: str) -> None:
     """
     Write an SRT file from a list of video segments.
 
     This function writes the given segments into an SRT (SubRip Text) file,
     which is a common format for subtitles. Each segment includes start and end times
-    and the associated text.
+    and the associated text. Timestamps keep their milliseconds, and the file is written
+    through one buffered handle, so segments may also come from a generator.
 
     Args:
-        segments: A list of dictionaries representing video segments, where each
+        segments: An iterable of dictionaries representing video segments, where each
                   dictionary includes 'start', 'end', and 'text' keys.
-        srt_filename: The filename for the resulting SRT file.
+        srt_filename: The filename for the resulting SRT file. Overwritten if it exists.
 
     Returns:
         None
     """
-
-    for i, segment in enumerate(segments):
-        # Convert start and end times to SRT time format (hh:mm:ss,ms)
-        start_time = str(0)+str(timedelta(seconds=int(segment['start'])))+',000'
-        end_time = str(0)+str(timedelta(seconds=int(segment['end'])))+',000'
-
-        # Get the text associated with this segment
-        text = segment['text']
-
-        # Create the SRT-formatted string for this segment
-        srt_segment = f"{i+1}\n{start_time} --> {end_time}\n{text[1:] if text[0] == ' ' else text}\n\n"
-
-        # Append this segment to the SRT file
-        with open(srt_filename, 'a', encoding='utf-8') as srt_file:
-            srt_file.write(srt_segment)
+    subtitle_writer.write_subtitles(segments, srt_filename, "srt")
 
 
 if __name__ == "__main__":
@@ -198,6 +366,13 @@ if __name__ == "__main__":
     parser.add_argument("source_video", type=str, help="Path to the source video file")
     parser.add_argument("video_output_location", type=str, help="Path to the output video file")
     parser.add_argument("--swear_word_list", type=str, nargs="+", help="List of swear words to mask", default=swear_word_list)
+    parser.add_argument("--render_mode", type=str, choices=["moviepy", "ffmpeg"], default="moviepy", help="Render with moviepy (two encodes) or a single ffmpeg pass")
+    parser.add_argument("--scratch_dir", type=str, default="", help="Directory for the run's scratch workspace, e.g. a tmpfs mount")
+    parser.add_argument("--censor_mode", type=str, choices=["pydub", "ffmpeg"], default="pydub", help="Silence swear words in memory or stream the audio through ffmpeg")
+    parser.add_argument("--caption_renderer", type=str, choices=["textclip", "pillow", "ass"], default="textclip", help="Draw captions with ImageMagick TextClips, cached Pillow bitmaps or libass in ffmpeg")
+    parser.add_argument("--caption_mode", type=str, choices=["static", "highlight", "karaoke"], default="static", help="Show captions as they are or highlight the spoken word (needs --render_mode ffmpeg or --caption_renderer ass)")
+    add_caption_arguments(parser)
+    add_inference_arguments(parser)
     args = parser.parse_args()
 
-    generate_video_with_subtitles(args.uncensored_audio_file, args.source_video, args.swear_word_list, args.video_output_location)
\ No newline at end of file
+    generate_video_with_subtitles(args.uncensored_audio_file, args.source_video, args.swear_word_list, args.video_output_location, render_mode=args.render_mode, scratch_dir=args.scratch_dir, censor_mode=args.censor_mode, inference_options=options_from_args(args), caption_renderer=args.caption_renderer, caption_mode=args.caption_mode, caption_rules=rules_from_args(args))
\ No newline at end of file
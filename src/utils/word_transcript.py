@@ -0,0 +1,225 @@
+from typing import Any, Dict, Iterable, Iterator, List, Union
+
+import numpy as np
+
+from src.utils.censor import CensorEngine
+
+
+SegmentList = List[Dict[str, Union[str, float]]]
+
+
+class Word:
+    """
+    A view of one word of a WordTranscript. Nothing is copied until it is read.
+    """
+    __slots__ = ("_transcript", "_index")
+
+    def __init__(self, transcript: "WordTranscript", index: int):
+        self._transcript = transcript
+        self._index = index
+
+    @property
+    def text(self) -> str:
+        return self._transcript.vocabulary[self._transcript.codes[self._index]]
+
+    @property
+    def start(self) -> float:
+        return float(self._transcript.starts[self._index])
+
+    @property
+    def end(self) -> float:
+        return float(self._transcript.ends[self._index])
+
+    def to_dict(self) -> Dict[str, Union[str, float]]:
+        return _segment(self.text, self.start, self.end)
+
+    def __repr__(self) -> str:
+        return f"Word(text={self.text!r}, start={self.start}, end={self.end})"
+
+
+def _segment(text: str, start: float, end: float) -> Dict[str, Union[str, float]]:
+    segment = {"text": text}
+    # words the aligner could not place have no times
+    if start == start:
+        segment["start"] = start
+    if end == end:
+        segment["end"] = end
+    return segment
+
+
+class WordTranscript:
+    """
+    Word segments stored as parallel arrays instead of a list of dicts.
+
+    The start and end times are float arrays, with NaN for words the aligner could not
+    place. The texts are a table of distinct strings indexed by an integer array, so
+    masking and swear word lookups run once per distinct word, and transcripts derived
+    from one another share the arrays they did not change.
+
+    Build one with from_segments and convert back with to_segments.
+
+    Args:
+        vocabulary (List[str]): The distinct texts.
+        codes (np.ndarray): The index into vocabulary of every word.
+        starts (np.ndarray): The start of every word in seconds.
+        ends (np.ndarray): The end of every word in seconds.
+    """
+    __slots__ = ("vocabulary", "codes", "starts", "ends")
+
+    def __init__(self, vocabulary: List[str], codes: np.ndarray, starts: np.ndarray, ends: np.ndarray):
+        self.vocabulary = vocabulary
+        self.codes = codes
+        self.starts = starts
+        self.ends = ends
+
+    @classmethod
+    def from_segments(cls, segments: Iterable[Dict[str, Any]], require_times: bool = False) -> "WordTranscript":
+        """
+        Build a transcript from word segments, checking them in the same pass.
+
+        Args:
+            segments (Iterable[Dict[str, Any]]): Word segments with a 'text' key and
+                'start' and 'end' keys in seconds.
+            require_times (bool, optional): Raise if a segment has no 'start' or 'end' key,
+                instead of storing NaN. Defaults to False.
+
+        Raises:
+            TypeError: If a segment is not a dictionary.
+            ValueError: If a segment is missing a required key.
+
+        Returns:
+            WordTranscript: The transcript.
+        """
+        index = {}
+        vocabulary = []
+        codes = []
+        starts = []
+        ends = []
+        for segment in segments:
+            if not isinstance(segment, dict):
+                raise TypeError("Each word segment must be a dictionary.")
+            try:
+                text = segment["text"]
+                start = segment["start"] if require_times else segment.get("start")
+                end = segment["end"] if require_times else segment.get("end")
+            except KeyError:
+                raise ValueError("Each word segment must have 'text', 'start', and 'end' keys.") from None
+            code = index.get(text)
+            if code is None:
+                code = index[text] = len(vocabulary)
+                vocabulary.append(text)
+            codes.append(code)
+            starts.append(np.nan if start is None else start)
+            ends.append(np.nan if end is None else end)
+
+        return cls(
+            vocabulary,
+            np.array(codes, dtype=np.int32),
+            np.array(starts, dtype=np.float64),
+            np.array(ends, dtype=np.float64),
+            )
+
+    def to_segments(self) -> SegmentList:
+        """
+        Convert back to word segments.
+
+        Returns:
+            SegmentList: One dictionary per word with 'text', 'start' and 'end' keys. Words
+                without times have no 'start' or 'end' key.
+        """
+        return [
+            _segment(text, start, end)
+            for text, start, end in zip(self.texts, self.starts.tolist(), self.ends.tolist())
+        ]
+
+    @property
+    def texts(self) -> List[str]:
+        """The text of every word."""
+        vocabulary = self.vocabulary
+        return [vocabulary[code] for code in self.codes.tolist()]
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __iter__(self) -> Iterator[Word]:
+        return (Word(self, i) for i in range(len(self)))
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return WordTranscript(self.vocabulary, self.codes[key], self.starts[key], self.ends[key])
+        if key < 0:
+            key += len(self)
+        if not 0 <= key < len(self):
+            raise IndexError("word index out of range")
+        return Word(self, key)
+
+    def select(self, mask: np.ndarray) -> "WordTranscript":
+        """
+        Keep the words where mask is true.
+
+        Args:
+            mask (np.ndarray): A boolean array with one value per word.
+
+        Returns:
+            WordTranscript: The selected words, sharing the text table.
+        """
+        return WordTranscript(self.vocabulary, self.codes[mask], self.starts[mask], self.ends[mask])
+
+    def map_texts(self, function) -> "WordTranscript":
+        """
+        Apply a function to the text of every word, calling it once per distinct text.
+
+        Args:
+            function (Callable[[str], str]): The function.
+
+        Returns:
+            WordTranscript: The transcript with the new texts, sharing the time arrays.
+        """
+        return WordTranscript([function(text) for text in self.vocabulary], self.codes, self.starts, self.ends)
+
+    def mask(self, engine: CensorEngine) -> "WordTranscript":
+        """
+        Mask the swear words of every word.
+
+        Args:
+            engine (CensorEngine): The censor engine of the word list.
+
+        Returns:
+            WordTranscript: The masked transcript.
+        """
+        return self.map_texts(engine.mask)
+
+    def swear_mask(self, engine: CensorEngine) -> np.ndarray:
+        """
+        Find the swear words.
+
+        Args:
+            engine (CensorEngine): The censor engine of the word list.
+
+        Returns:
+            np.ndarray: A boolean array, true for every swear word.
+        """
+        is_swear = np.array([engine.is_swear(text) for text in self.vocabulary], dtype=bool)
+        return is_swear[self.codes] if len(self.vocabulary) else np.zeros(len(self), dtype=bool)
+
+    def fill_missing_times(self) -> "WordTranscript":
+        """
+        Give the words the aligner could not place, e.g. numerals, the time between their neighbours.
+
+        A word without a start starts when the word before it ends, or at 0 if it is the
+        first word. A word without an end ends when the word after it starts, or when it
+        starts if it is the last word.
+
+        Returns:
+            WordTranscript: The transcript with a start and an end for every word, sharing the text table.
+        """
+        if not (np.isnan(self.starts).any() or np.isnan(self.ends).any()):
+            return self
+        starts, ends = self.starts.copy(), self.ends.copy()
+        for i in np.flatnonzero(np.isnan(starts)).tolist():
+            previous = ends[i - 1] if i > 0 else 0.0
+            starts[i] = starts[i - 1] if np.isnan(previous) else previous
+        for i in reversed(np.flatnonzero(np.isnan(ends)).tolist()):
+            following = starts[i + 1] if i + 1 < len(ends) else starts[i]
+            ends[i] = max(following, starts[i])
+        return WordTranscript(self.vocabulary, self.codes, starts, ends)
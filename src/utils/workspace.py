@@ -0,0 +1,39 @@
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+
+# Where job scratch directories are created, e.g. a tmpfs mount such as /dev/shm.
+# Defaults to the system temporary directory.
+SCRATCH_DIRECTORY = os.getenv('SCRATCH_DIRECTORY')
+
+
+@contextmanager
+def job_workspace(base_dir: Optional[str] = None, prefix: str = "job_") -> Iterator[Path]:
+    """
+    Create a private scratch directory for one pipeline run.
+
+    Every intermediate file of a run goes in its own directory, so several runs can
+    share a working directory or host without overwriting each other's files. The
+    directory and everything in it is removed when the block exits, whether the run
+    succeeded or failed.
+
+    Args:
+        base_dir (str, optional): The directory to create the workspace in. Defaults to
+            SCRATCH_DIRECTORY, or the system temporary directory if that is not set.
+        prefix (str, optional): The prefix of the workspace directory name. Defaults to "job_".
+
+    Yields:
+        Path: The path of the scratch directory.
+    """
+    base_dir = base_dir or SCRATCH_DIRECTORY
+    if base_dir:
+        os.makedirs(base_dir, exist_ok=True)
+    workspace = Path(tempfile.mkdtemp(prefix=prefix, dir=base_dir))
+    try:
+        yield workspace
+    finally:
+        shutil.rmtree(workspace, ignore_errors=True)
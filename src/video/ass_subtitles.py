@@ -0,0 +1,263 @@
+from dataclasses import dataclass, astuple, fields, replace
+from typing import Iterable, List, Dict, Tuple, Union
+
+CaptionSegmentList = List[Dict[str, Union[str, float]]]
+
+CAPTION_MODES = ("static", "highlight", "karaoke")
+# The colour of spoken words in the highlight and karaoke modes, yellow
+HIGHLIGHT_COLOUR = "&H0000FFFF"
+
+
+@dataclass(frozen=True)
+class AssStyle:
+    """
+    A style of an ASS subtitle file, in the units of the file's PlayResX and PlayResY.
+
+    Colours are ASS colours, &HAABBGGRR with 00 alpha for opaque. The defaults are the
+    caption style of generate_subtitles.add_subtitles_to_video: bold white text with a
+    black outline, centred.
+    """
+    Name: str = "Caption"
+    Fontname: str = "P052"
+    Fontsize: float = 80
+    PrimaryColour: str = "&H00FFFFFF"
+    SecondaryColour: str = "&H00FFFFFF"
+    OutlineColour: str = "&H00000000"
+    BackColour: str = "&H00000000"
+    Bold: int = -1
+    Italic: int = 0
+    Underline: int = 0
+    StrikeOut: int = 0
+    ScaleX: float = 100
+    ScaleY: float = 100
+    Spacing: float = 0
+    Angle: float = 0
+    BorderStyle: int = 1
+    Outline: float = 3
+    Shadow: float = 0
+    Alignment: int = 5
+    MarginL: int = 0
+    MarginR: int = 0
+    MarginV: int = 0
+    Encoding: int = 1
+
+
+def caption_style(movie_width: int, movie_height: int, fontsize: int = 80, **overrides) -> AssStyle:
+    """
+    Build the ASS style matching the moviepy captions of generate_subtitles.add_subtitles_to_video:
+    white text with a black stroke, centred, wrapped to half the video width.
+
+    The file is written with the video size as its PlayRes, so sizes are in video pixels.
+
+    Args:
+        movie_width (int): The width of the video in pixels.
+        movie_height (int): The height of the video in pixels.
+        fontsize (int, optional): The caption font size in pixels. Defaults to 80.
+        **overrides: Other AssStyle fields to change.
+
+    Returns:
+        AssStyle: The style.
+    """
+    side_margin = round(movie_width / 4)
+    return AssStyle(Fontsize=fontsize, MarginL=side_margin, MarginR=side_margin, **overrides)
+
+
+def format_ass_timestamp(seconds: float) -> str:
+    """
+    Format a time in seconds as an ASS timestamp (h:mm:ss.cc).
+
+    Args:
+        seconds (float): The time in seconds.
+
+    Returns:
+        str: The formatted timestamp.
+    """
+    total_cs = int(round(max(seconds, 0) * 100))
+    hours, remainder = divmod(total_cs, 360000)
+    minutes, remainder = divmod(remainder, 6000)
+    secs, cs = divmod(remainder, 100)
+    return f"{hours:d}:{minutes:02d}:{secs:02d}.{cs:02d}"
+
+
+def escape_ass_text(text: str) -> str:
+    """
+    Escape text so libass draws it as it is, with newlines as line breaks.
+
+    Args:
+        text (str): The text.
+
+    Returns:
+        str: The text for the Text field of a Dialogue line.
+    """
+    text = text.strip().replace("{", "\\{").replace("}", "\\}")
+    return text.replace("\r\n", "\\N").replace("\n", "\\N")
+
+
+def ass_header(play_res: Tuple[int, int], styles: Iterable[AssStyle]) -> str:
+    """
+    Build the [Script Info], [V4+ Styles] and [Events] format sections of an ASS file.
+
+    Args:
+        play_res (Tuple[int, int]): The width and height the styles and positions are in, usually the video size.
+        styles (Iterable[AssStyle]): The styles used by the events.
+
+    Returns:
+        str: The header, followed by the Dialogue lines.
+    """
+    style_fields = [field.name for field in fields(AssStyle)]
+    lines = [
+        "[Script Info]",
+        "ScriptType: v4.00+",
+        f"PlayResX: {play_res[0]}",
+        f"PlayResY: {play_res[1]}",
+        "WrapStyle: 0",
+        "ScaledBorderAndShadow: yes",
+        "",
+        "[V4+ Styles]",
+        "Format: " + ", ".join(style_fields),
+    ]
+    lines += ["Style: " + ",".join(_format_value(value) for value in astuple(style)) for style in styles]
+    lines += [
+        "",
+        "[Events]",
+        "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def _format_value(value) -> str:
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def dialogue_line(start: float, end: float, text: str, style: str = "Caption", layer: int = 0) -> str:
+    """
+    Build a Dialogue line of the [Events] section.
+
+    Args:
+        start (float): When the line is shown, in seconds.
+        end (float): When the line is hidden, in seconds.
+        text (str): The Text field, already escaped and with any override tags.
+        style (str, optional): The name of the style. Defaults to "Caption".
+        layer (int, optional): Lines on higher layers are drawn on top. Defaults to 0.
+
+    Returns:
+        str: The line, with a trailing newline.
+    """
+    return f"Dialogue: {layer},{format_ass_timestamp(start)},{format_ass_timestamp(end)},{style},,0,0,0,,{text}\n"
+
+
+def _word_times(caption: Dict) -> List[Tuple[str, float, float]]:
+    """
+    The text of every word of a caption, with when it starts being and stops being the current word.
+
+    A word is current until the next word starts, and the last one until the caption ends.
+    Words the aligner could not place start when the word before them ends.
+    """
+    words = caption["words"]
+    starts = []
+    previous = caption["start"]
+    for word in words:
+        start = word.get("start")
+        previous = previous if start is None else max(start, previous)
+        starts.append(previous)
+        previous = max(word.get("end", previous), previous)
+    ends = starts[1:] + [max(caption["end"], starts[-1])]
+    return [(word["text"], start, end) for word, start, end in zip(words, starts, ends)]
+
+
+def karaoke_text(caption: Dict) -> str:
+    """
+    Build the Text field of a caption whose words fill with the highlight colour as they are spoken.
+
+    Every word gets a \\k tag with its duration in centiseconds. Durations are taken between
+    rounded times, so they add up to the caption's length without drift.
+
+    Args:
+        caption (Dict): A caption with 'start', 'end' and 'words' keys.
+
+    Returns:
+        str: The Text field.
+    """
+    parts = []
+    lead = int(round(caption["start"] * 100))
+    for text, start, end in _word_times(caption):
+        start_cs, end_cs = int(round(start * 100)), int(round(end * 100))
+        if start_cs > lead:
+            # a pause before the word, so it fills when it is spoken
+            parts.append(f"{{\\k{start_cs - lead}}}")
+        parts.append(f"{{\\k{end_cs - max(start_cs, lead)}}}{escape_ass_text(text)}")
+        lead = max(end_cs, lead)
+    return " ".join(parts)
+
+
+def highlight_lines(caption: Dict, style: str = "Caption", colour: str = HIGHLIGHT_COLOUR) -> List[str]:
+    """
+    Build the Dialogue lines of a caption whose current word is drawn in the highlight colour.
+
+    There is one line per word, shown while that word is the current word, with a colour
+    override around it. libass draws each as cheaply as a static caption.
+
+    Args:
+        caption (Dict): A caption with 'start', 'end' and 'words' keys.
+        style (str, optional): The name of the style. Defaults to "Caption".
+        colour (str, optional): The ASS colour of the current word. Defaults to HIGHLIGHT_COLOUR.
+
+    Returns:
+        List[str]: The Dialogue lines.
+    """
+    word_times = _word_times(caption)
+    texts = [escape_ass_text(text) for text, _, _ in word_times]
+    lines = []
+    for i, (_, start, end) in enumerate(word_times):
+        if end <= start:
+            continue
+        highlighted = texts[:i] + [f"{{\\1c{colour}&}}{texts[i]}{{\\r}}"] + texts[i + 1:]
+        lines.append(dialogue_line(start, end, " ".join(highlighted), style))
+    return lines
+
+
+def write_ass_file(
+        caption_segments: CaptionSegmentList,
+        ass_path: str,
+        play_res: Tuple[int, int],
+        style: AssStyle = AssStyle(),
+        caption_mode: str = "static",
+        highlight_colour: str = HIGHLIGHT_COLOUR) -> None:
+    """
+    Write caption segments to an ASS file.
+
+    In the "static" mode every caption is one Dialogue line. In the "highlight" mode the
+    current word of a caption is drawn in the highlight colour, and in the "karaoke" mode
+    the words fill with it as they are spoken. Both word modes are plain timed style
+    runs, so libass renders them at about the cost of static captions. Captions without
+    a 'words' key are written as static captions.
+
+    Args:
+        caption_segments (CaptionSegmentList): A list of dictionaries containing 'text', 'start', and 'end'
+            keys, and for the word modes a 'words' key with the caption's word segments.
+        ass_path (str): The path of the ASS file to write.
+        play_res (Tuple[int, int]): The width and height of the video.
+        style (AssStyle, optional): The style of the captions.
+        caption_mode (str, optional): "static", "highlight" or "karaoke". Defaults to "static".
+        highlight_colour (str, optional): The ASS colour of spoken words. Defaults to HIGHLIGHT_COLOUR.
+
+    Returns:
+        None
+    """
+    if caption_mode not in CAPTION_MODES:
+        raise ValueError(f"caption_mode must be one of {CAPTION_MODES}, not {caption_mode!r}")
+    if caption_mode == "karaoke":
+        # \\k fills words from SecondaryColour to PrimaryColour
+        style = replace(style, PrimaryColour=highlight_colour, SecondaryColour=style.PrimaryColour)
+
+    with open(ass_path, 'w', encoding='utf-8') as ass_file:
+        ass_file.write(ass_header(play_res, [style]))
+        for segment in caption_segments:
+            if caption_mode == "static" or not segment.get("words"):
+                ass_file.write(dialogue_line(segment['start'], segment['end'], escape_ass_text(segment['text']), style.Name))
+            elif caption_mode == "karaoke":
+                ass_file.write(dialogue_line(segment['start'], segment['end'], karaoke_text(segment), style.Name))
+            else:
+                ass_file.writelines(highlight_lines(segment, style.Name, highlight_colour))
@@ -0,0 +1,200 @@
+import shutil
+import functools
+import subprocess
+from dataclasses import dataclass
+from typing import Callable, List, Dict, Tuple, Union
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+CaptionSegmentList = List[Dict[str, Union[str, float]]]
+
+# Captions kept rendered. Each is up to a few MB at 1080p, and frames are drawn in time order,
+# so only the current caption and the few before it need to stay
+CAPTION_CACHE_SIZE = 16
+
+
+@dataclass(frozen=True)
+class CaptionStyle:
+    """
+    How captions look. The defaults match the TextClip captions of add_subtitles_to_video.
+
+    Args:
+        font (str): A font file or a fontconfig font name.
+        fontsize (int): The font size in pixels.
+        color (str): The text color.
+        stroke_color (str): The outline color.
+        stroke_width (int): The outline width in pixels.
+        width_ratio (float): Captions are wrapped to this fraction of the video width.
+        line_spacing (int): Extra pixels between lines.
+    """
+    font: str = "P052-Bold"
+    fontsize: int = 80
+    color: str = "white"
+    stroke_color: str = "black"
+    stroke_width: int = 3
+    width_ratio: float = 0.5
+    line_spacing: int = 4
+
+
+@functools.lru_cache(maxsize=None)
+def _font_path(font: str) -> str:
+    # font names are resolved the way ImageMagick resolves them for TextClip
+    if shutil.which("fc-match"):
+        result = subprocess.run(["fc-match", "-f", "%{file}", font], capture_output=True, text=True)
+        if result.returncode == 0 and result.stdout:
+            return result.stdout
+    return font
+
+
+@functools.lru_cache(maxsize=32)
+def load_font(font: str, size: int) -> ImageFont.FreeTypeFont:
+    """
+    Load a font once per font and size.
+
+    Args:
+        font (str): A font file or a fontconfig font name.
+        size (int): The font size in pixels.
+
+    Returns:
+        ImageFont.FreeTypeFont: The font. Falls back to DejaVu Sans Bold if the font is not found.
+    """
+    for candidate in (font, _font_path(font), "DejaVuSans-Bold.ttf"):
+        try:
+            return ImageFont.truetype(candidate, size)
+        except OSError:
+            continue
+    return ImageFont.load_default()
+
+
+@functools.lru_cache(maxsize=4096)
+def _text_width(font: ImageFont.FreeTypeFont, text: str) -> float:
+    return font.getlength(text)
+
+
+def wrap_text(text: str, font: ImageFont.FreeTypeFont, max_width: float) -> str:
+    """
+    Wrap text into lines no wider than max_width, breaking between words.
+
+    Args:
+        text (str): The text.
+        font (ImageFont.FreeTypeFont): The font the text is drawn with.
+        max_width (float): The widest a line may be in pixels. A single word wider than this gets a line of its own.
+
+    Returns:
+        str: The wrapped text, with lines separated by newlines.
+    """
+    space = _text_width(font, " ")
+    lines = []
+    line = []
+    width = 0.0
+    for word in text.split():
+        word_width = _text_width(font, word)
+        if line and width + space + word_width > max_width:
+            lines.append(" ".join(line))
+            line = []
+            width = 0.0
+        width += (space if line else 0.0) + word_width
+        line.append(word)
+    if line:
+        lines.append(" ".join(line))
+    return "\n".join(lines)
+
+
+@functools.lru_cache(maxsize=CAPTION_CACHE_SIZE)
+def render_caption(text: str, style: CaptionStyle, max_width: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Render a caption once per text, style and width.
+
+    The bitmap is returned ready to blend: the color multiplied by the opacity, and the
+    opacity itself, both as uint16 so blending needs no conversions.
+
+    Args:
+        text (str): The caption.
+        style (CaptionStyle): How the caption looks.
+        max_width (int): The widest a line may be in pixels.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The (h, w, 3) premultiplied color and the (h, w, 1) opacity, 0 to 255.
+    """
+    font = load_font(style.font, style.fontsize)
+    wrapped = wrap_text(text, font, max_width)
+    measure = ImageDraw.Draw(Image.new("RGBA", (1, 1)))
+    left, top, right, bottom = measure.multiline_textbbox(
+        (0, 0), wrapped, font=font, spacing=style.line_spacing, align="center", stroke_width=style.stroke_width)
+
+    image = Image.new("RGBA", (max(1, right - left), max(1, bottom - top)), (0, 0, 0, 0))
+    ImageDraw.Draw(image).multiline_text(
+        (-left, -top), wrapped, font=font, fill=style.color, spacing=style.line_spacing, align="center",
+        stroke_width=style.stroke_width, stroke_fill=style.stroke_color)
+
+    rgba = np.asarray(image, dtype=np.uint16)
+    alpha = rgba[:, :, 3:4]
+    return rgba[:, :, :3] * alpha, alpha
+
+
+def blend(frame: np.ndarray, premultiplied: np.ndarray, alpha: np.ndarray, x: int, y: int) -> np.ndarray:
+    """
+    Blend a rendered caption onto a frame with its top left corner at (x, y).
+
+    Only the pixels under the caption are touched. The caption is cropped to the frame.
+
+    Args:
+        frame (np.ndarray): An (H, W, 3) uint8 frame. It is not modified.
+        premultiplied (np.ndarray): The caption color multiplied by its opacity, as returned by render_caption.
+        alpha (np.ndarray): The caption opacity, as returned by render_caption.
+        x (int): The left of the caption in the frame.
+        y (int): The top of the caption in the frame.
+
+    Returns:
+        np.ndarray: A copy of the frame with the caption.
+    """
+    height, width = frame.shape[:2]
+    top, left = max(0, y), max(0, x)
+    bottom, right = min(height, y + alpha.shape[0]), min(width, x + alpha.shape[1])
+    frame = frame.copy()
+    if bottom <= top or right <= left:
+        return frame
+
+    crop = (slice(top - y, bottom - y), slice(left - x, right - x))
+    region = frame[top:bottom, left:right].astype(np.uint16)
+    region = (region * (255 - alpha[crop]) + premultiplied[crop] + 127) // 255
+    frame[top:bottom, left:right] = region.astype(np.uint8)
+    return frame
+
+
+def caption_filter(
+        captions: CaptionSegmentList,
+        frame_size: Tuple[int, int],
+        style: CaptionStyle = CaptionStyle()) -> Callable[[Callable[[float], np.ndarray], float], np.ndarray]:
+    """
+    Build a moviepy frame filter that draws the captions centred on the frames where they are shown.
+
+    The active caption is found with a binary search on the start times, and frames
+    without a caption are passed through untouched.
+
+    Args:
+        captions (CaptionSegmentList): A list of dictionaries containing 'text', 'start', and 'end' keys.
+        frame_size (Tuple[int, int]): The width and height of the video.
+        style (CaptionStyle, optional): How the captions look.
+
+    Returns:
+        Callable: A filter for VideoClip.fl, called with the clip's get_frame and the time.
+    """
+    captions = sorted(captions, key=lambda caption: caption["start"])
+    starts = np.array([caption["start"] for caption in captions], dtype=np.float64)
+    ends = np.array([caption["end"] for caption in captions], dtype=np.float64)
+    width, height = frame_size
+    max_width = int(width * style.width_ratio)
+
+    def draw(get_frame, t):
+        frame = get_frame(t)
+        i = int(np.searchsorted(starts, t, side="right")) - 1
+        if i < 0 or t >= ends[i]:
+            return frame
+        premultiplied, alpha = render_caption(captions[i]["text"], style, max_width)
+        x = (width - alpha.shape[1]) // 2
+        y = (height - alpha.shape[0]) // 2
+        return blend(frame, premultiplied, alpha, x, y)
+
+    return draw
@@ -0,0 +1,192 @@
+import os
+import random
+import argparse
+import subprocess
+from typing import List, Dict, Tuple, Union, Optional
+
+from src.video import utils, ass_subtitles
+
+CaptionSegmentList = List[Dict[str, Union[str, float]]]
+
+
+def escape_filter_path(path: str) -> str:
+    """
+    Escape a file path so it can be used as an option value inside an ffmpeg filter graph.
+
+    Args:
+        path (str): The path to escape.
+
+    Returns:
+        str: The escaped path.
+    """
+    path = path.replace("\\", "/")
+    for char in (":", "'", ",", "[", "]", ";"):
+        path = path.replace(char, "\\" + char)
+    return path
+
+
+def subtitle_filter(
+        caption_segments: CaptionSegmentList,
+        movie_size: Tuple[int, int],
+        ass_path: str,
+        caption_mode: str = "static") -> str:
+    """
+    Write the captions to an ASS file in the caption style and build the ffmpeg filter that burns it in.
+
+    Args:
+        caption_segments (CaptionSegmentList): A list of dictionaries containing 'text', 'start', and 'end' keys.
+        movie_size (Tuple[int, int]): The width and height of the video the captions are burnt into.
+        ass_path (str): The path of the ASS file to write.
+        caption_mode (str, optional): "static", or "highlight" or "karaoke" to highlight the spoken
+            words of captions with a 'words' key. Defaults to "static".
+
+    Returns:
+        str: The subtitles filter.
+    """
+    ass_subtitles.write_ass_file(
+        caption_segments, ass_path, movie_size, ass_subtitles.caption_style(*movie_size), caption_mode)
+    return "subtitles=filename='{}'".format(escape_filter_path(os.path.abspath(ass_path)))
+
+
+def _caption_file_path(output_path: str, scratch_dir: Optional[str]) -> str:
+    if scratch_dir:
+        return os.path.join(scratch_dir, "captions.ass")
+    return os.path.splitext(output_path)[0] + ".captions.ass"
+
+
+def burn_captions(
+        input_path: str,
+        output_path: str,
+        caption_segments: CaptionSegmentList,
+        fps: int = 24,
+        scratch_dir: Optional[str] = None,
+        caption_mode: str = "static") -> str:
+    """
+    Burn captions into a video with libass while ffmpeg encodes it.
+
+    The captions are written to an ASS file in the same style as the moviepy captions of
+    generate_subtitles.add_subtitles_to_video, so no frame passes through Python. The
+    audio is copied.
+
+    Args:
+        input_path (str): The path to the input video file.
+        output_path (str): The path to save the captioned video.
+        caption_segments (CaptionSegmentList): A list of dictionaries containing 'text', 'start', and 'end' keys.
+        fps (int, optional): The frame rate of the output video. Defaults to 24.
+        scratch_dir (str, optional): The directory for the temporary caption file. Defaults to the
+            directory of the output file.
+        caption_mode (str, optional): "static", "highlight" or "karaoke". See subtitle_filter.
+
+    Returns:
+        str: The path of the captioned video.
+    """
+    ass_path = _caption_file_path(output_path, scratch_dir)
+    ffmpeg_cmd = [
+        "ffmpeg",
+        "-i", input_path,
+        "-vf", subtitle_filter(caption_segments, utils.get_video_size(input_path), ass_path, caption_mode),
+        "-r", str(fps),
+        "-c:v", "libx264",
+        "-c:a", "copy",
+        output_path,
+        "-y"
+    ]
+
+    try:
+        subprocess.run(ffmpeg_cmd, check=True)
+    finally:
+        os.remove(ass_path)
+
+    return output_path
+
+
+def render_clip_with_captions(
+        source_video: str,
+        audio_path: str,
+        output_path: str,
+        caption_segments: CaptionSegmentList,
+        start_time: Optional[float] = None,
+        fps: int = 24,
+        scratch_dir: Optional[str] = None,
+        caption_mode: str = "static") -> str:
+    """
+    Render a captioned clip from a background video in a single ffmpeg encode.
+
+    A random section of the source video with the same duration as the audio file is
+    selected, its audio is replaced with the provided audio and the captions are burnt
+    in. This replaces the two encodes done by random_sample_clip.create_clip_with_matching_audio
+    followed by generate_subtitles.add_subtitles_to_video.
+
+    Args:
+        source_video (str): The path to the background video file.
+        audio_path (str): The path to the audio file to play over the clip.
+        output_path (str): The path to save the rendered video.
+        caption_segments (CaptionSegmentList): A list of dictionaries containing 'text', 'start', and 'end' keys.
+        start_time (float, optional): Where to start in the source video in seconds. A random
+            start time is chosen if not provided.
+        fps (int, optional): The frame rate of the output video. Defaults to 24.
+        scratch_dir (str, optional): The directory for the temporary caption file. Defaults to the
+            directory of the output file.
+        caption_mode (str, optional): "static", "highlight" or "karaoke". See subtitle_filter.
+
+    Returns:
+        str: The path of the rendered video.
+
+    Raises:
+        ValueError: If the source video is shorter than the audio.
+    """
+    duration = utils.get_media_duration(audio_path)
+
+    if start_time is None:
+        video_duration = utils.get_media_duration(source_video)
+        if video_duration < duration:
+            raise ValueError(f"Video {source_video} is shorter than audio {audio_path}.")
+        start_time = random.uniform(0, video_duration - duration)
+
+    movie_width, movie_height = utils.get_video_size(source_video)
+
+    ffmpeg_cmd = [
+        "ffmpeg",
+        "-ss", f"{start_time:.3f}",
+        "-t", f"{duration:.3f}",
+        "-i", source_video,
+        "-i", audio_path,
+        "-map", "0:v:0",
+        "-map", "1:a:0",
+    ]
+
+    ass_path = None
+    if caption_segments:
+        ass_path = _caption_file_path(output_path, scratch_dir)
+        ffmpeg_cmd += ["-vf", subtitle_filter(caption_segments, (movie_width, movie_height), ass_path, caption_mode)]
+
+    ffmpeg_cmd += [
+        "-r", str(fps),
+        "-c:v", "libx264",
+        "-c:a", "aac",
+        "-shortest",
+        output_path,
+        "-y"
+    ]
+
+    try:
+        subprocess.run(ffmpeg_cmd, check=True)
+    finally:
+        if ass_path:
+            os.remove(ass_path)
+
+    return output_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Render a captioned clip with matching audio in a single ffmpeg pass')
+    parser.add_argument('video_path', type=str, help='path to background video file')
+    parser.add_argument('audio_path', type=str, help='path to audio file')
+    parser.add_argument('output_path', type=str, help='path to output file')
+    parser.add_argument('--start_time', type=float, default=None, help='start time in the background video (default: random)')
+    args = parser.parse_args()
+    render_clip_with_captions(args.video_path, args.audio_path, args.output_path, [], args.start_time)
+
+
+if __name__ == "__main__":
+    main()
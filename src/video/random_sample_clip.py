@@ -1,12 +1,14 @@
+import os
 import random
 import argparse
+from typing import Optional
 
 from moviepy.video.io.VideoFileClip import VideoFileClip
 from moviepy.audio.io.AudioFileClip import AudioFileClip
 
 
 
-def create_clip_with_matching_audio(video_path: str, audio_path: str, output_path: str) -> None:
+def create_clip_with_matching_audio(video_path: str, audio_path: str, output_path: str, temp_dir: Optional[str] = None) -> None:
     """
     Create a video clip with the same duration as the provided audio file.
     The video clip is extracted from the input video file and the audio is set to the provided audio file.
@@ -16,6 +18,8 @@ def create_clip_with_matching_audio(video_path: str, audio_path: str, output_pat
         video_path (str): The path to the input video file.
         audio_path (str): The path to the input audio file.
         output_path (str): The path to the output file where the resulting video clip will be saved.
+        temp_dir (str, optional): The directory for moviepy's temporary audio file. Defaults to the
+            current working directory.
 
     Returns:
         None
@@ -37,7 +41,10 @@ def create_clip_with_matching_audio(video_path: str, audio_path: str, output_pat
     clip = clip.set_audio(audio)
 
     # Save the clip
-    clip.write_videofile(output_path, audio_codec="aac")
+    temp_audiofile = None
+    if temp_dir:
+        temp_audiofile = os.path.join(temp_dir, "clip_TEMP_MPY_wvf_snd.mp4")
+    clip.write_videofile(output_path, audio_codec="aac", temp_audiofile=temp_audiofile)
 
 
 def main():
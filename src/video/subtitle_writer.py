@@ -0,0 +1,172 @@
+import os
+from typing import Dict, Generator, Iterable, Optional, TextIO, Tuple, Union
+
+from src.video import ass_subtitles
+
+Segment = Dict[str, Union[str, float]]
+
+SUBTITLE_FORMATS = ("srt", "vtt", "ass")
+# Size of the write buffer, so a long transcript costs a few large writes
+BUFFER_BYTES = 1 << 16
+
+
+def format_timestamp(seconds: float, separator: str = ",") -> str:
+    """
+    Format a time in seconds as hh:mm:ss followed by the separator and milliseconds.
+
+    Args:
+        seconds (float): The time in seconds. Rounded to the nearest millisecond.
+        separator (str, optional): "," for SRT, "." for WebVTT. Defaults to ",".
+
+    Returns:
+        str: The formatted timestamp.
+    """
+    total_ms = int(round(max(seconds, 0) * 1000))
+    hours, remainder = divmod(total_ms, 3600000)
+    minutes, remainder = divmod(remainder, 60000)
+    secs, ms = divmod(remainder, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{separator}{ms:03d}"
+
+
+def infer_format(path: str) -> str:
+    """
+    Infer the subtitle format from a file extension.
+
+    Args:
+        path (str): The path of the subtitle file.
+
+    Raises:
+        ValueError: If the extension is not .srt, .vtt or .ass.
+
+    Returns:
+        str: "srt", "vtt" or "ass".
+    """
+    extension = os.path.splitext(path)[1].lower().lstrip(".")
+    if extension not in SUBTITLE_FORMATS:
+        raise ValueError(f"Unknown subtitle format {extension!r}, expected one of {SUBTITLE_FORMATS}")
+    return extension
+
+
+class SubtitleWriter:
+    """
+    Writes segments as SRT, WebVTT or ASS cues to one buffered file as they come.
+
+    Nothing but the current segment is held in memory, so the segments can come from a
+    generator, and write() can be called while the transcript is still being produced.
+    Use it as a context manager, or call close().
+
+    Args:
+        output (Union[str, TextIO]): A path, or an open text file which is not closed by close().
+        subtitle_format (str, optional): "srt", "vtt" or "ass". Inferred from the path if not provided.
+        play_res (Tuple[int, int], optional): The video size for ASS. Defaults to 1920x1080.
+        style (AssStyle, optional): The caption style for ASS. Defaults to the caption style at play_res.
+    """
+
+    def __init__(
+            self,
+            output: Union[str, TextIO],
+            subtitle_format: Optional[str] = None,
+            play_res: Tuple[int, int] = (1920, 1080),
+            style: Optional[ass_subtitles.AssStyle] = None):
+        if isinstance(output, str):
+            self.format = subtitle_format or infer_format(output)
+            self._file = open(output, 'w', encoding='utf-8', buffering=BUFFER_BYTES)
+            self._owns_file = True
+        else:
+            if subtitle_format is None:
+                raise ValueError("subtitle_format is required when writing to an open file")
+            self.format = subtitle_format
+            self._file = output
+            self._owns_file = False
+        if self.format not in SUBTITLE_FORMATS:
+            raise ValueError(f"subtitle_format must be one of {SUBTITLE_FORMATS}, not {self.format!r}")
+
+        self.count = 0
+        self._style = style or ass_subtitles.caption_style(*play_res)
+        if self.format == "vtt":
+            self._file.write("WEBVTT\n\n")
+        elif self.format == "ass":
+            self._file.write(ass_subtitles.ass_header(play_res, [self._style]))
+
+    def write(self, segment: Segment) -> None:
+        """
+        Write one segment as the next cue.
+
+        Args:
+            segment (Segment): A dictionary with 'text', 'start' and 'end' keys.
+        """
+        self.count += 1
+        text = segment['text'].strip()
+        if self.format == "srt":
+            self._file.write(f"{self.count}\n{format_timestamp(segment['start'])} --> {format_timestamp(segment['end'])}\n{text}\n\n")
+        elif self.format == "vtt":
+            self._file.write(f"{format_timestamp(segment['start'], '.')} --> {format_timestamp(segment['end'], '.')}\n{text}\n\n")
+        else:
+            self._file.write(ass_subtitles.dialogue_line(
+                segment['start'], segment['end'], ass_subtitles.escape_ass_text(text), self._style.Name))
+
+    def write_all(self, segments: Iterable[Segment]) -> int:
+        """
+        Write every segment of an iterable, consuming it lazily.
+
+        Args:
+            segments (Iterable[Segment]): The segments.
+
+        Returns:
+            int: The number of cues written so far.
+        """
+        for segment in segments:
+            self.write(segment)
+        return self.count
+
+    def sink(self) -> Generator[None, Segment, None]:
+        """
+        Return a generator that writes every segment sent to it and closes the writer when it is closed.
+
+        The generator is already started, so segments can be sent to it straight away.
+
+        Returns:
+            Generator[None, Segment, None]: The sink.
+        """
+        def consume():
+            try:
+                while True:
+                    self.write((yield))
+            finally:
+                self.close()
+
+        sink = consume()
+        next(sink)
+        return sink
+
+    def close(self) -> None:
+        """Flush the buffer, and close the file if the writer opened it."""
+        if self._file.closed:
+            return
+        if self._owns_file:
+            self._file.close()
+        else:
+            self._file.flush()
+
+    def __enter__(self) -> "SubtitleWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def write_subtitles(segments: Iterable[Segment], path: str, subtitle_format: Optional[str] = None, **kwargs) -> int:
+    """
+    Write segments to a subtitle file through one buffered handle.
+
+    Args:
+        segments (Iterable[Segment]): Dictionaries with 'text', 'start' and 'end' keys, e.g. a generator.
+        path (str): The path of the subtitle file. Overwritten if it exists.
+        subtitle_format (str, optional): "srt", "vtt" or "ass". Inferred from the path if not provided.
+        **kwargs: play_res and style for ASS, see SubtitleWriter.
+
+    Returns:
+        int: The number of cues written.
+    """
+    with SubtitleWriter(path, subtitle_format, **kwargs) as writer:
+        return writer.write_all(segments)
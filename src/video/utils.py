@@ -1,9 +1,9 @@
+import subprocess
 from typing import Tuple
-from moviepy.editor import VideoFileClip
 
 def get_video_size(filename: str) -> Tuple[int, int]:
     """
-    Get the dimensions (width and height) of a video file.
+    Get the dimensions (width and height) of a video file using ffprobe.
 
     Args:
         filename (str): The path to the video file.
@@ -11,5 +11,35 @@ def get_video_size(filename: str) -> Tuple[int, int]:
     Returns:
         Tuple[int, int]: A tuple containing the width and height of the video, in the format (width, height).
     """
-    video = VideoFileClip(filename)
-    return (video.w, video.h)
+    ffprobe_cmd = [
+        "ffprobe",
+        "-v", "error",
+        "-select_streams", "v:0",
+        "-show_entries", "stream=width,height",
+        "-of", "csv=s=x:p=0",
+        filename
+    ]
+    result = subprocess.run(ffprobe_cmd, check=True, capture_output=True, text=True)
+    width, height = result.stdout.strip().split("x")
+    return (int(width), int(height))
+
+
+def get_media_duration(filename: str) -> float:
+    """
+    Get the duration of an audio or video file using ffprobe.
+
+    Args:
+        filename (str): The path to the media file.
+
+    Returns:
+        float: The duration of the file in seconds.
+    """
+    ffprobe_cmd = [
+        "ffprobe",
+        "-v", "error",
+        "-show_entries", "format=duration",
+        "-of", "default=noprint_wrappers=1:nokey=1",
+        filename
+    ]
+    result = subprocess.run(ffprobe_cmd, check=True, capture_output=True, text=True)
+    return float(result.stdout.strip())